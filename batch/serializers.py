@@ -0,0 +1,59 @@
+from django.conf import settings
+from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """
+    Serializer para una sub-petición dentro de un batch.
+    """
+    METHOD_CHOICES = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+    id = serializers.CharField(required=False, help_text='Identificador opcional para correlacionar la respuesta')
+    method = serializers.ChoiceField(choices=METHOD_CHOICES, default='GET')
+    path = serializers.CharField(help_text='Ruta de la API, por ejemplo /api/transactions/')
+    params = serializers.DictField(child=serializers.CharField(), required=False, help_text='Parámetros de query')
+    body = serializers.JSONField(required=False, help_text='Cuerpo JSON de la sub-petición')
+
+    def validate_path(self, value):
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError('La ruta debe comenzar con /api/')
+        return value
+
+
+@extend_schema_serializer(
+    examples=[
+        OpenApiExample(
+            'Carga del dashboard',
+            value={
+                'requests': [
+                    {'id': 'stats', 'method': 'GET', 'path': '/api/transactions/statistics/',
+                     'params': {'start_date': '2024-01-01', 'end_date': '2024-01-31'}},
+                    {'id': 'categories', 'method': 'GET', 'path': '/api/categories/'},
+                    {'id': 'budgets', 'method': 'GET', 'path': '/api/budgets/', 'params': {'active': 'true'}},
+                ]
+            }
+        )
+    ]
+)
+class BatchRequestSerializer(serializers.Serializer):
+    """
+    Serializer para el cuerpo de una petición batch.
+    """
+    requests = BatchOperationSerializer(many=True, allow_empty=False, max_length=settings.BATCH_MAX_REQUESTS)
+
+
+class BatchResultSerializer(serializers.Serializer):
+    """
+    Serializer para el resultado de una sub-petición.
+    """
+    id = serializers.CharField(allow_null=True)
+    status = serializers.IntegerField()
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    """
+    Serializer para la respuesta de una petición batch.
+    """
+    responses = BatchResultSerializer(many=True)
@@ -0,0 +1,148 @@
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit, parse_qsl
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import resolve, Resolver404
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from financetracker.schema import extend_schema
+from financetracker.memo import get_request_memo, set_request_memo
+from .serializers import BatchRequestSerializer, BatchResponseSerializer
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Cabeceras de la petición padre que no deben heredar las sub-peticiones
+EXCLUDED_META_KEYS = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'PATH_INFO', 'REQUEST_METHOD', 'wsgi.input')
+
+
+class BatchView(APIView):
+    """
+    Vista para ejecutar varias peticiones de la API en una sola llamada.
+
+    La autenticación se realiza una única vez para el batch. Las sub-peticiones
+    de lectura consecutivas se ejecutan en paralelo; las de escritura actúan como
+    barrera y se ejecutan en orden en el hilo de la petición. Todas comparten la
+    memoización de agregados de la petición padre.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="Ejecutar peticiones en batch",
+        description="Ejecuta una lista de sub-peticiones sobre los endpoints existentes y devuelve todas las respuestas en un único payload",
+        request=BatchRequestSerializer,
+        responses=BatchResponseSerializer,
+        tags=['batch']
+    )
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['requests']
+
+        memo = get_request_memo(request)
+        results = [None] * len(operations)
+
+        # Agrupar lecturas consecutivas para ejecutarlas en paralelo
+        pending_reads = []
+        for index, operation in enumerate(operations):
+            if operation['method'] in SAFE_METHODS:
+                pending_reads.append(index)
+                continue
+            self._run_concurrently(request, operations, pending_reads, memo, results)
+            pending_reads = []
+            results[index] = self._dispatch(request, operation, memo)
+        self._run_concurrently(request, operations, pending_reads, memo, results)
+
+        return Response({'responses': results}, status=status.HTTP_200_OK)
+
+    def _run_concurrently(self, request, operations, indexes, memo, results):
+        """Ejecuta un grupo de sub-peticiones de lectura independientes"""
+        max_workers = min(settings.BATCH_MAX_WORKERS, len(indexes))
+        if max_workers <= 1:
+            for index in indexes:
+                results[index] = self._dispatch(request, operations[index], memo)
+            return
+
+        def run(index):
+            try:
+                return self._dispatch(request, operations[index], memo)
+            finally:
+                # Las conexiones de Django son por hilo y no admiten consultas concurrentes: cada hilo
+                # abre la suya (a lo sumo BATCH_MAX_WORKERS por batch) y la libera al terminar
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, result in zip(indexes, executor.map(run, indexes)):
+                results[index] = result
+
+    def _dispatch(self, request, operation, memo):
+        """Resuelve y ejecuta una sub-petición sin pasar por el middleware"""
+        operation_id = operation.get('id')
+        url = urlsplit(operation['path'])
+
+        if url.path.rstrip('/') == request.path.rstrip('/'):
+            return self._result(operation_id, status.HTTP_400_BAD_REQUEST,
+                                {'error': 'No se permiten batches anidados'})
+
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return self._result(operation_id, status.HTTP_404_NOT_FOUND,
+                                {'error': 'Ruta no encontrada'})
+
+        params = parse_qsl(url.query, keep_blank_values=True)
+        params.extend(operation.get('params', {}).items())
+        sub_request = self._build_request(request, operation['method'], url.path,
+                                          urlencode(params), operation.get('body'))
+        set_request_memo(sub_request, memo)
+
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Error en la sub-petición %s %s del batch', operation['method'], url.path)
+            return self._result(operation_id, status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                {'error': 'Error interno al procesar la sub-petición'})
+
+        if hasattr(response, 'data'):
+            body = response.data
+        elif response.content:
+            try:
+                body = json.loads(response.content)
+            except ValueError:
+                body = response.content.decode(response.charset or 'utf-8')
+        else:
+            body = None
+        return self._result(operation_id, response.status_code, body)
+
+    def _build_request(self, request, method, path, query_string, body):
+        """Construye la sub-petición reutilizando el usuario ya autenticado"""
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        environ = {
+            key: value for key, value in request.META.items()
+            if key not in EXCLUDED_META_KEYS
+        }
+        environ.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query_string,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload),
+        })
+
+        sub_request = WSGIRequest(environ)
+        sub_request.user = request.user
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
+
+    @staticmethod
+    def _result(operation_id, status_code, body):
+        return {'id': operation_id, 'status': status_code, 'body': body}
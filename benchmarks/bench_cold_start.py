@@ -0,0 +1,158 @@
+"""
+Benchmark: arranque en frío de un worker hasta la primera respuesta.
+
+Lanza procesos nuevos que cargan la aplicación WSGI y atienden una primera
+petición, con el esquema OpenAPI dinámico (sin `API_SCHEMA_FILE`) y con el
+esquema pregenerado (se genera antes en un archivo temporal). Informa el
+tiempo desde que se lanza el proceso hasta la primera respuesta, el de
+`django.setup()` + aplicación WSGI, el de la primera petición (incluye la
+carga de las URLs y las vistas) y el de la primera petición a `/api/schema/`.
+
+Con `--profile` informa además el tiempo de importación de cada módulo
+(`python -X importtime`) en el arranque con el esquema pregenerado.
+
+Uso:
+    python benchmarks/bench_cold_start.py --runs 5
+    python benchmarks/bench_cold_start.py --profile --top 30
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from wsgiref.util import setup_testing_defaults
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = (('dinámico', False), ('pregenerado', True))
+
+
+def request(application, path):
+    environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET'}
+    setup_testing_defaults(environ)
+    statuses = []
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return statuses[0]
+
+
+def child(path):
+    """Se ejecuta en el proceso nuevo: carga la aplicación y atiende las primeras peticiones"""
+    started = time.perf_counter()
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'financetracker.settings')
+    from financetracker.wsgi import application
+
+    ready = time.perf_counter()
+    request(application, path)
+    responded = time.perf_counter()
+    responded_at = time.time()
+    request(application, '/api/schema/')
+    schema_served = time.perf_counter()
+    print(json.dumps({
+        'setup': ready - started,
+        'first_request': responded - ready,
+        'responded_at': responded_at,
+        'schema': schema_served - responded,
+        'modules': len(sys.modules),
+    }))
+
+
+def environment(schema_file):
+    env = dict(os.environ)
+    env.pop('API_SCHEMA_FILE', None)
+    if schema_file:
+        env['API_SCHEMA_FILE'] = schema_file
+    return env
+
+
+def cold_start(path, schema_file):
+    spawned_at = time.time()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', path],
+        env=environment(schema_file), capture_output=True, text=True, check=True,
+    )
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result['total'] = result['responded_at'] - spawned_at
+    return result
+
+
+def build_schema(path):
+    subprocess.run(
+        [sys.executable, os.path.join(BASE_DIR, 'manage.py'), 'build_schema', '--output', path],
+        env=environment(None), capture_output=True, check=True,
+    )
+
+
+def import_profile(schema_file, top):
+    """Tiempo propio y acumulado de importación por módulo (µs), según `python -X importtime`"""
+    code = (
+        f'import os, sys; sys.path.insert(0, {BASE_DIR!r}); '
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'financetracker.settings'); "
+        'import django; django.setup(); '
+        'from django.urls import get_resolver; get_resolver().url_patterns'
+    )
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        env=environment(schema_file), capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line.split(':', 1)[1].split('|')
+        modules.append((int(own), int(cumulative), name.strip()))
+
+    packages = {}
+    for own, _, name in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+
+    print(f'\nImportaciones al arrancar: {len(modules)} módulos, {sum(packages.values()) / 1000:.0f} ms')
+    print(f'{"Módulo":<56}{"Propio (ms)":>12}{"Acumulado (ms)":>16}')
+    for own, cumulative, name in sorted(modules, reverse=True)[:top]:
+        print(f'{name:<56}{own / 1000:>12.1f}{cumulative / 1000:>16.1f}')
+    print(f'\n{"Paquete":<56}{"Propio (ms)":>12}')
+    for package, own in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f'{package:<56}{own / 1000:>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/transactions/', help='Ruta de la primera petición')
+    parser.add_argument('--profile', action='store_true', help='Informar el tiempo de importación por módulo')
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        schema_file = os.path.join(directory, 'openapi.json')
+        build_schema(schema_file)
+
+        print(f'Primera petición: GET {args.path} (mediana de {args.runs} arranques)')
+        print(f'{"Esquema":<14}{"Total (ms)":>12}{"Setup (ms)":>12}{"Petición (ms)":>15}{"Esquema (ms)":>14}{"Módulos":>10}')
+        for name, pregenerated in MODES:
+            runs = [cold_start(args.path, schema_file if pregenerated else None) for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs) for key in ('total', 'setup', 'first_request', 'schema')}
+            print(
+                f'{name:<14}{median["total"] * 1000:>12.0f}{median["setup"] * 1000:>12.0f}'
+                f'{median["first_request"] * 1000:>15.0f}{median["schema"] * 1000:>14.0f}{runs[0]["modules"]:>10}'
+            )
+
+        if args.profile:
+            import_profile(schema_file, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: tamaño y tiempo de parseo de las respuestas normales y compactas.
+
+Para el listado de transacciones, `statistics` y `analysis` compara la
+respuesta normal con la de `?compact=true`: bytes sin comprimir, con gzip
+(nivel de `COMPRESSION_LEVELS`) y tiempo de `json.loads` en el cliente.
+Verifica además que la respuesta compacta reconstruye la normal.
+
+Uso:
+    python benchmarks/bench_compact_payloads.py --rows 5000 --repeat 20
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'financetracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from bench_transaction_serialization import populate  # noqa: E402
+
+
+def rows(columns):
+    fields = list(columns)
+    return [dict(zip(fields, values)) for values in zip(*columns.values())]
+
+
+def expand(path, data):
+    """Reconstruye la respuesta normal a partir de la compacta"""
+    if 'statistics' in path:
+        for key in ('by_category', 'recent_transactions', 'largest_transactions'):
+            data[key] = rows(data[key])
+        return data
+    if 'analysis' in path:
+        daily = data['trend_data']['daily']
+        dates = daily.pop('date')
+        data['trend_data']['daily'] = dict(zip(dates, rows(daily)))
+        data['top_transactions'] = rows(data['top_transactions'])
+        return data
+    return rows(data)
+
+
+def parse_time(content, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        json.loads(content)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    database_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        user = populate(args.rows)
+        # El benchmark mide las respuestas, no los presupuestos de las cuotas
+        settings.THROTTLE_BUDGETS = {
+            scope: {**budget, 'capacity': 10 ** 9} for scope, budget in settings.THROTTLE_BUDGETS.items()
+        }
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        category = user.categories.first()
+        endpoints = (
+            ('listado', '/api/transactions/'),
+            ('statistics', '/api/transactions/statistics/?start_date=2020-01-01&end_date=2024-12-31'),
+            ('analysis', f'/api/categories/{category.id}/analysis/?start_date=2020-01-01&end_date=2024-12-31'),
+        )
+        level = settings.COMPRESSION_LEVELS.get('gzip')
+
+        print(f'Transacciones: {args.rows} (mínimo de {args.repeat} parseos)')
+        print(f'{"Endpoint":<12}{"Modo":<10}{"JSON (KB)":>11}{"gzip (KB)":>11}{"Parseo (ms)":>13}')
+        for name, path in endpoints:
+            separator = '&' if '?' in path else '?'
+            normal = client.get(path).content
+            compact = client.get(f'{path}{separator}compact=true').content
+            if expand(path, json.loads(compact)) != json.loads(normal):
+                raise SystemExit(f'ERROR: la respuesta compacta de {name} no reconstruye la normal')
+            for mode, content in (('normal', normal), ('compacto', compact)):
+                print(
+                    f'{name:<12}{mode:<10}{len(content) / 1024:>11.1f}'
+                    f'{len(gzip.compress(content, compresslevel=level)) / 1024:>11.1f}'
+                    f'{parse_time(content, args.repeat) * 1000:>13.2f}'
+                )
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: serialización de listados de transacciones.
+
+Compara la ruta estándar (TransactionSerializer + JSONRenderer) con la ruta
+rápida (values_list + conversor precompilado + FastJSONRenderer) y verifica
+que ambas producen exactamente los mismos bytes.
+
+Uso:
+    python benchmarks/bench_transaction_serialization.py --rows 10000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'financetracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from financetracker.renderers import FastJSONRenderer  # noqa: E402
+from transactions.fast_serialization import serialize_rows  # noqa: E402
+from transactions.models import Category, Transaction  # noqa: E402
+from transactions.serializers import TransactionSerializer  # noqa: E402
+
+
+def populate(rows):
+    user = User.objects.create_user('benchmark', password='benchmark')
+    categories = [
+        Category.objects.create(user=user, name=f'Categoría {index}') for index in range(10)
+    ]
+    start = date(2020, 1, 1)
+    transactions = []
+    for index in range(rows):
+        amount = Decimal(random.randint(100, 500000)) / 100
+        transactions.append(Transaction(
+            user=user,
+            category=random.choice(categories + [None]),
+            transaction_type=random.choice(['income', 'expense']),
+            amount=amount,
+            base_amount=amount,
+            date=start + timedelta(days=random.randint(0, 1500)),
+            description=f'Transacción número {index} — café ☕',
+        ))
+    Transaction.objects.bulk_create(transactions, batch_size=1000)
+    return user
+
+
+def standard(queryset):
+    return JSONRenderer().render(TransactionSerializer(queryset, many=True).data)
+
+
+def fast(queryset):
+    return FastJSONRenderer().render(serialize_rows(queryset, TransactionSerializer()))
+
+
+def measure(function, queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(queryset)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    database_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        user = populate(args.rows)
+        queryset = Transaction.objects.filter(user=user)
+
+        standard_output = standard(queryset)
+        fast_output = fast(queryset)
+        if standard_output != fast_output:
+            raise SystemExit('ERROR: la ruta rápida no produce los mismos bytes que la estándar')
+
+        standard_time = measure(standard, queryset, args.repeat)
+        fast_time = measure(fast, queryset, args.repeat)
+
+        print(f'Filas: {args.rows} ({len(fast_output) / 1024:.0f} KB de JSON, salida idéntica)')
+        print(f'{"Ruta":<12}{"Tiempo (ms)":>14}{"Filas/s":>14}')
+        for name, elapsed in (('estándar', standard_time), ('rápida', fast_time)):
+            print(f'{name:<12}{elapsed * 1000:>14.1f}{args.rows / elapsed:>14.0f}')
+        print(f'Aceleración: {standard_time / fast_time:.1f}x')
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
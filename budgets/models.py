@@ -1,13 +1,21 @@
 from django.db import models
 from django.contrib.auth.models import User
+from currencies.models import default_currency, validate_currency_code
+from sync.models import SyncTrackedModel
 from transactions.models import Category
 
-class Budget(models.Model):
+class Budget(SyncTrackedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=default_currency, validators=[validate_currency_code])
     start_date = models.DateField()
     end_date = models.DateField()
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'sync_version'], name='budget_sync_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username} - {self.category.name} Budget'
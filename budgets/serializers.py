@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
+from currencies.serializers import CurrencyField
 from .models import Budget
 
 @extend_schema_serializer(
@@ -11,6 +12,7 @@ from .models import Budget
                 'user': 1,
                 'category': 1,
                 'amount': '500.00',
+                'currency': 'USD',
                 'start_date': '2024-01-01',
                 'end_date': '2024-01-31'
             }
@@ -23,7 +25,9 @@ class BudgetSerializer(serializers.ModelSerializer):
     
     Permite serializar y deserializar presupuestos financieros por categoría.
     """
+    currency = CurrencyField()
+
     class Meta:
         model = Budget
-        fields = ['id', 'user', 'category', 'amount', 'start_date', 'end_date']
+        fields = ['id', 'user', 'category', 'amount', 'currency', 'start_date', 'end_date']
         read_only_fields = ['id', 'user'] 
\ No newline at end of file
@@ -1,13 +1,15 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions
-from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
+from drf_spectacular.utils import OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
+from financetracker.schema import extend_schema, extend_schema_view
 from .models import Budget
 from .serializers import BudgetSerializer
-from transactions.views import IsOwner
+from households import scope
 
 # Create your views here.
 
+@extend_schema(parameters=[scope.PARAMETER])
 @extend_schema_view(
     list=extend_schema(
         summary="Listar presupuestos",
@@ -74,10 +76,10 @@ class BudgetViewSet(viewsets.ModelViewSet):
     """
     queryset = Budget.objects.all()
     serializer_class = BudgetSerializer
-    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = self.request.user.budgets.all()
+        queryset = scope.visible(self.request, Budget.objects.all())
         
         # Filtros opcionales
         category = self.request.query_params.get('category', None)
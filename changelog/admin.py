@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import ChangeConsumer, ChangeEvent
+
+# Register your models here.
+admin.site.register(ChangeEvent)
+admin.site.register(ChangeConsumer)
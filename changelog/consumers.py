@@ -0,0 +1,87 @@
+"""
+Consumidores del registro de cambios.
+
+Un consumidor procesa los eventos en orden de id y en lotes, desde la
+posición que guarda en `ChangeConsumer`. Procesar el lote y avanzar la
+posición se confirman en la misma transacción de base de datos: si el
+procesamiento falla, el lote se repite en la siguiente ejecución, y lo que el
+consumidor escribe en la base de datos se aplica exactamente una vez. La fila
+del consumidor queda bloqueada mientras procesa un lote, así dos procesos del
+mismo consumidor no procesan el mismo lote.
+
+Los ids se asignan al insertar el evento, no al confirmarlo: un evento con un
+id menor puede confirmarse después que otro con un id mayor. Un lote no pasa
+por encima de un hueco en los ids hasta que los eventos posteriores al hueco
+tienen más de `CHANGELOG_GAP_TIMEOUT` segundos; el hueco es entonces una
+transacción revertida o eventos eliminados junto con su usuario.
+
+Un evento que se confirma más de `CHANGELOG_GAP_TIMEOUT` segundos después de
+insertarse queda atrás de la posición y no se procesa nunca, por lo que el
+valor debe superar con margen la transacción de escritura más larga. Las más
+largas son `recompute_base_amounts` (un UPDATE por moneda base de todas las
+transacciones afectadas) y cada lote de `materialize_due`; si crecen, hay que
+subir el valor, a costa de que un hueco real demore a los consumidores ese
+tiempo.
+
+Los consumidores se configuran en `CHANGELOG_CONSUMERS` (nombre -> ruta de
+una función que recibe la lista de eventos del lote) y se ejecutan con
+`manage.py consume_changes`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import ChangeConsumer, ChangeEvent
+
+
+def read(after, limit):
+    """Hasta `limit` eventos posteriores al id `after`, sin saltar huecos recientes en los ids"""
+    events = list(ChangeEvent.objects.filter(id__gt=after).order_by('id')[:limit])
+    settled = timezone.now() - timedelta(seconds=settings.CHANGELOG_GAP_TIMEOUT)
+    expected = after + 1
+    for index, event in enumerate(events):
+        if event.id != expected and event.created_at > settled:
+            return events[:index]
+        expected = event.id + 1
+    return events
+
+
+class Consumer:
+    """Procesa con `handler(events)` los eventos del registro desde la posición guardada de `name`"""
+
+    def __init__(self, name, handler, batch_size=None):
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size or settings.CHANGELOG_BATCH_SIZE
+
+    def process_batch(self):
+        """Procesa el siguiente lote y devuelve cuántos eventos procesó"""
+        with db_transaction.atomic():
+            ChangeConsumer.objects.get_or_create(name=self.name)
+            state = ChangeConsumer.objects.select_for_update().get(name=self.name)
+            events = read(state.position, self.batch_size)
+            if not events:
+                return 0
+            self.handler(events)
+            state.position = events[-1].id
+            state.save(update_fields=['position', 'updated_at'])
+        return len(events)
+
+    def run(self):
+        """Procesa lotes hasta alcanzar el final del registro; devuelve cuántos eventos procesó"""
+        processed = 0
+        while True:
+            count = self.process_batch()
+            if not count:
+                return processed
+            processed += count
+
+
+def configured_consumers(batch_size=None):
+    """Consumidores de `CHANGELOG_CONSUMERS`, por nombre"""
+    return {
+        name: Consumer(name, import_string(handler), batch_size)
+        for name, handler in settings.CHANGELOG_CONSUMERS.items()
+    }
@@ -0,0 +1,159 @@
+"""
+Escritura del registro de cambios.
+
+Cada cambio de una transacción, categoría o presupuesto se registra como un
+`ChangeEvent` en la misma transacción de base de datos que el cambio: si el
+cambio se revierte, su evento también. Los guardados y las eliminaciones por
+instancia se registran con las señales de `changelog.signals`; las escrituras
+masivas (UPDATE, bulk_create, DELETE por lotes), que no envían señales por
+fila, los registran con las funciones de este módulo.
+
+Los valores registrados son los de las columnas del modelo (`category_id`, no
+`category`) salvo `sync_version`. Las líneas de las transacciones divididas no
+se registran, y tampoco mover transacciones al archivo o restaurarlas, que no
+cambia sus valores.
+"""
+from decimal import Decimal
+
+from django.db import connections, models, transaction as db_transaction
+from django.utils import timezone
+from .models import ChangeEvent
+
+# Columnas de control que no forman parte del cambio
+IGNORED_FIELDS = ('sync_version',)
+
+
+def tracked_fields(model):
+    return [field for field in model._meta.concrete_fields if field.attname not in IGNORED_FIELDS]
+
+
+def _value(field, value):
+    value = field.to_python(value)
+    if isinstance(field, models.DecimalField) and value is not None:
+        # Mismo formato que al leer la columna: Decimal('10.5') y Decimal('10.50') se registran igual
+        value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+def snapshot(instance, previous=None, update_fields=None):
+    """
+    Valores de las columnas registradas de una instancia guardada.
+
+    Con `previous` (los valores antes de guardar), las columnas que el guardado
+    no escribió (fuera de `update_fields` o diferidas) conservan esos valores.
+    """
+    values = dict(previous or {})
+    deferred = instance.get_deferred_fields() if previous is not None else ()
+    for field in tracked_fields(type(instance)):
+        if field.attname in deferred:
+            continue
+        if previous is not None and update_fields is not None and not {field.name, field.attname} & set(update_fields):
+            continue
+        values[field.attname] = _value(field, getattr(instance, field.attname))
+    return values
+
+
+def rows(queryset):
+    """Valores de las columnas registradas de cada fila del queryset, por id"""
+    names = [field.attname for field in tracked_fields(queryset.model)]
+    return {row[0]: dict(zip(names, row)) for row in queryset.order_by().values_list(*names)}
+
+
+def _batches(using, ids):
+    size = connections[using].ops.bulk_batch_size(['id'], ids) or len(ids)
+    for offset in range(0, len(ids), size):
+        yield ids[offset:offset + size]
+
+
+# Columnas que escribe `record`, en orden
+EVENT_FIELDS = ('user', 'kind', 'object_id', 'operation', 'old_values', 'new_values', 'created_at')
+
+
+def record(model, changes, using='default'):
+    """
+    Registra los cambios `(anteriores, nuevos)` de filas del modelo.
+
+    Anteriores None es una fila creada y nuevos None una eliminada. Debe
+    llamarse dentro de la transacción de base de datos del cambio.
+
+    Los eventos se insertan con un `executemany` en lugar de `bulk_create`: en
+    las escrituras masivas crear una instancia por evento y preparar cada
+    campo con el compilador de INSERT costaba más que la escritura registrada.
+    """
+    connection = connections[using]
+    fields = [ChangeEvent._meta.get_field(name) for name in EVENT_FIELDS]
+    old_field, new_field, created_field = fields[4:]
+    kind = model._meta.model_name
+    created_at = created_field.get_db_prep_save(timezone.now(), connection)
+    params = []
+    for old, new in changes:
+        values = new if new is not None else old
+        params.append((
+            values['user_id'], kind, values['id'],
+            'create' if old is None else 'delete' if new is None else 'update',
+            old_field.get_db_prep_save(old, connection), new_field.get_db_prep_save(new, connection),
+            created_at,
+        ))
+    if not params:
+        return
+    quote_name = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote_name(ChangeEvent._meta.db_table),
+        ', '.join(quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def record_created(objs, using='default'):
+    """Registra las filas creadas con `bulk_create` (las instancias deben tener su id)"""
+    objs = list(objs)
+    if objs:
+        record(type(objs[0]), [(None, snapshot(obj)) for obj in objs], using)
+
+
+def update(queryset, **values):
+    """
+    UPDATE de las filas del queryset que registra cada una con sus valores anteriores y nuevos.
+
+    Las filas se bloquean y se leen antes de escribir, y la escritura se hace
+    sobre sus ids en bloques del tamaño máximo de parámetros de la base de
+    datos. Devuelve los pares `(anteriores, nuevos)` de las filas actualizadas.
+    """
+    model = queryset.model
+    using = queryset.db
+    assigned = _assigned_values(model, values)
+    with db_transaction.atomic(using=using):
+        before = rows(queryset.select_for_update(of=('self',)))
+        ids = list(before)
+        after = {}
+        for batch in _batches(using, ids):
+            model.objects.using(using).filter(pk__in=batch).update(**values)
+            if assigned is None:
+                after.update(rows(model.objects.using(using).filter(pk__in=batch)))
+        if assigned is not None:
+            after = {pk: {**row, **assigned} for pk, row in before.items()}
+        changes = [(before[pk], after[pk]) for pk in ids]
+        record(model, changes, using)
+    return changes
+
+
+def _assigned_values(model, values):
+    """
+    Columnas registradas que asigna un UPDATE con valores literales.
+
+    None si algún valor lo calcula la base de datos (F(), Subquery...): los
+    valores nuevos se leen entonces después de escribir.
+    """
+    if any(hasattr(value, 'resolve_expression') for value in values.values()):
+        return None
+    assigned = {}
+    for name, value in values.items():
+        field = model._meta.get_field(name)
+        if field.attname in IGNORED_FIELDS:
+            continue
+        if isinstance(value, models.Model):
+            value = value.pk
+        assigned[field.attname] = _value(field, value)
+    return assigned
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from changelog.consumers import configured_consumers
+
+
+class Command(BaseCommand):
+    help = 'Procesa los eventos pendientes del registro de cambios con los consumidores configurados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', action='append',
+                            help='Nombre del consumidor (se puede repetir; por defecto, todos los de CHANGELOG_CONSUMERS)')
+        parser.add_argument('--batch-size', type=int, default=settings.CHANGELOG_BATCH_SIZE,
+                            help=f'Eventos procesados por lote (por defecto: {settings.CHANGELOG_BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        consumers = configured_consumers(options['batch_size'])
+        names = options['consumer'] or list(consumers)
+        unknown = [name for name in names if name not in consumers]
+        if unknown:
+            raise CommandError(f"Consumidores no configurados en CHANGELOG_CONSUMERS: {', '.join(unknown)}")
+
+        for name in names:
+            processed = consumers[name].run()
+            self.stdout.write(self.style.SUCCESS(f'{name}: {processed} eventos procesados'))
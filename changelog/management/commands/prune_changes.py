@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from changelog.models import ChangeConsumer, ChangeEvent
+
+
+class Command(BaseCommand):
+    help = 'Elimina los eventos del registro de cambios vencidos que ya procesaron todos los consumidores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGELOG_RETENTION_DAYS,
+            help=f'Días de retención (por defecto: {settings.CHANGELOG_RETENTION_DAYS})'
+        )
+
+    def handle(self, *args, **options):
+        expired = ChangeEvent.objects.filter(created_at__lt=timezone.now() - timedelta(days=options['days']))
+        if settings.CHANGELOG_CONSUMERS:
+            # Un consumidor configurado que todavía no se ejecutó conserva todo el registro
+            positions = dict(ChangeConsumer.objects.filter(
+                name__in=settings.CHANGELOG_CONSUMERS
+            ).values_list('name', 'position'))
+            expired = expired.filter(id__lte=min(positions.get(name, 0) for name in settings.CHANGELOG_CONSUMERS))
+        deleted, _ = expired.delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} eventos eliminados'))
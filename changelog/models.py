@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class ChangeEvent(models.Model):
+    """
+    Cambio de una transacción, categoría o presupuesto, con los valores de la fila antes y después.
+
+    Los eventos solo se agregan (nunca se modifican) y su id da el orden en que
+    se procesan. `old_values` es None al crear la fila y `new_values` al eliminarla.
+    """
+    KIND_CHOICES = (
+        ('transaction', 'Transaction'),
+        ('category', 'Category'),
+        ('budget', 'Budget'),
+    )
+    OPERATION_CHOICES = (
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='change_events')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    operation = models.CharField(max_length=6, choices=OPERATION_CHOICES)
+    old_values = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    new_values = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.id}: {self.operation} {self.kind} {self.object_id}'
+
+
+class ChangeConsumer(models.Model):
+    """Posición de un consumidor del registro de cambios: el id del último evento que procesó"""
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} - {self.position}'
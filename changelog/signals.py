@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from budgets.models import Budget
+from transactions.models import Account, Category, RecurringTransaction, Transaction
+from . import log
+
+
+def _deleting_user(origin):
+    # Al eliminar el usuario se eliminan también sus eventos
+    return isinstance(origin, User) or getattr(origin, 'model', None) is User
+
+
+@receiver(pre_save, sender=Transaction)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Budget)
+def read_previous_values(sender, instance, raw=False, **kwargs):
+    """Lee los valores anteriores de la fila; el evento se registra en post_save"""
+    if raw:
+        return
+    previous = None
+    if not instance._state.adding:
+        previous = log.rows(sender.objects.using(instance._state.db).filter(pk=instance.pk)).get(instance.pk)
+    instance._changelog_previous = previous
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Budget)
+def record_save(sender, instance, raw=False, using='default', update_fields=None, **kwargs):
+    """
+    Registra la creación o modificación de la fila.
+
+    Los modelos registrados guardan dentro de una transacción de base de datos
+    (SyncTrackedModel), así el evento se confirma o revierte con el cambio.
+    """
+    if raw:
+        return
+    previous = instance.__dict__.pop('_changelog_previous', None)
+    expressions = [
+        field.attname for field in log.tracked_fields(sender)
+        if hasattr(instance.__dict__.get(field.attname), 'resolve_expression')
+    ]
+    if expressions:
+        # Valores calculados por la base de datos (F(), funciones): se leen después de escribirlos
+        instance.refresh_from_db(using=using, fields=expressions)
+    log.record(sender, [(previous, log.snapshot(instance, previous, update_fields))], using)
+
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Budget)
+def record_delete(sender, instance, origin=None, using='default', **kwargs):
+    """Registra la eliminación (también las en cascada) con los últimos valores de la fila"""
+    if _deleting_user(origin):
+        return
+    log.record(sender, [(log.snapshot(instance), None)], using)
+
+
+def _record_set_null(queryset, attname):
+    """Registra las filas que un SET_NULL en cascada va a dejar con `attname` vacío (un UPDATE masivo sin señales)"""
+    log.record(queryset.model, [(row, {**row, attname: None}) for row in log.rows(queryset).values()], queryset.db)
+
+
+@receiver(pre_delete, sender=Category)
+def record_category_detached(sender, instance, origin=None, **kwargs):
+    if _deleting_user(origin):
+        return
+    _record_set_null(Transaction.objects.filter(category=instance), 'category_id')
+    _record_set_null(Category.objects.filter(parent=instance), 'parent_id')
+
+
+@receiver(pre_delete, sender=Account)
+def record_account_detached(sender, instance, origin=None, **kwargs):
+    if _deleting_user(origin):
+        return
+    _record_set_null(Transaction.objects.filter(account=instance), 'account_id')
+
+
+@receiver(pre_delete, sender=RecurringTransaction)
+def record_recurring_detached(sender, instance, origin=None, **kwargs):
+    if _deleting_user(origin):
+        return
+    _record_set_null(Transaction.objects.filter(recurring=instance), 'recurring_id')
@@ -0,0 +1,62 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from currencies.models import ExchangeRate, validate_currency_code
+from currencies.rates import MissingExchangeRate, rate_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga tipos de cambio desde un archivo CSV con columnas date,currency,rate '
+        '(unidades de la moneda por unidad de la moneda de referencia) y recalcula '
+        'los importes en moneda base de las transacciones'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Ruta del archivo CSV')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-recompute', action='store_true',
+                            help='No recalcular los importes en moneda base de las transacciones')
+
+    def handle(self, *args, **options):
+        rates = {}
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as rates_file:
+                for line, row in enumerate(csv.DictReader(rates_file), start=2):
+                    try:
+                        currency = row['currency'].strip().upper()
+                        validate_currency_code(currency)
+                        rate_date = date.fromisoformat(row['date'].strip())
+                        rate = Decimal(row['rate'].strip())
+                        if rate <= 0:
+                            raise ValueError
+                    except (KeyError, AttributeError, ValueError, InvalidOperation, ValidationError):
+                        raise CommandError(f'Línea {line} inválida: {row}')
+                    rates[(currency, rate_date)] = rate
+        except OSError as error:
+            raise CommandError(f'No se pudo leer el archivo: {error}')
+
+        with transaction.atomic():
+            ExchangeRate.objects.bulk_create(
+                [ExchangeRate(currency=currency, date=rate_date, rate=rate) for (currency, rate_date), rate in rates.items()],
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['currency', 'date'],
+                update_fields=['rate'],
+            )
+            transaction.on_commit(rate_cache.invalidate)
+        self.stdout.write(self.style.SUCCESS(f'{len(rates)} tipos de cambio cargados'))
+
+        if options['no_recompute']:
+            return
+
+        from transactions.currency import recompute_base_amounts
+        try:
+            updated = recompute_base_amounts()
+        except MissingExchangeRate as error:
+            raise CommandError(f'No se recalcularon los importes en moneda base: {error}')
+        self.stdout.write(self.style.SUCCESS(f'{updated} transacciones recalculadas'))
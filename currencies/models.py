@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.validators import RegexValidator
+from django.db import models
+
+validate_currency_code = RegexValidator(
+    r'^[A-Z]{3}$', 'Código de moneda inválido. Use el código ISO 4217 de tres letras (ej: USD, EUR).'
+)
+
+
+def default_currency():
+    return settings.DEFAULT_CURRENCY
+
+
+class ExchangeRate(models.Model):
+    """
+    Tipo de cambio diario de una moneda.
+
+    `rate` es la cantidad de unidades de `currency` que equivalen a una unidad
+    de la moneda de referencia (`EXCHANGE_RATES_REFERENCE_CURRENCY`).
+    """
+    currency = models.CharField(max_length=3, validators=[validate_currency_code])
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        ordering = ['currency', '-date']
+        constraints = [
+            models.UniqueConstraint(fields=['currency', 'date'], name='unique_exchange_rate'),
+        ]
+
+    def __str__(self):
+        return f'{self.currency} {self.date}: {self.rate}'
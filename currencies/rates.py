@@ -0,0 +1,164 @@
+"""
+Consulta y conversión de tipos de cambio.
+
+Los tipos de cambio de cada moneda se cargan una sola vez por proceso en
+arrays ordenados por fecha y se consultan con búsqueda binaria: el tipo de un
+día es el último publicado en o antes de esa fecha (o el primero disponible si
+la fecha es anterior a toda la serie). Una versión en el caché compartido de
+Django invalida las series en todos los procesos al cargar tipos nuevos.
+
+Para conversiones masivas, `conversion_expression` construye la misma
+conversión en SQL (subconsultas contra la tabla de tipos de cambio), de modo
+que un UPDATE o un agregado conviertan todas las filas sin pasar por Python.
+"""
+import threading
+from array import array
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Round
+from financetracker.versioning import bump_version, get_version
+from .models import ExchangeRate
+
+VERSION_KEY = 'exchange-rates-version'
+CENT = Decimal('0.01')
+ONE = Decimal(1)
+
+
+class MissingExchangeRate(ValueError):
+    """No hay tipos de cambio cargados para una moneda"""
+
+    def __init__(self, currency):
+        super().__init__(f'No hay tipos de cambio cargados para {currency}.')
+        self.currency = currency
+
+
+class RateSeries:
+    """Serie histórica de tipos de cambio de una moneda"""
+
+    def __init__(self, rows):
+        self.dates = array('i')
+        self.rates = []
+        for rate_date, rate in rows:
+            self.dates.append(rate_date.toordinal())
+            self.rates.append(rate)
+
+    def __bool__(self):
+        return bool(self.rates)
+
+    def rate_on(self, on_date):
+        if not self.rates:
+            return None
+        position = bisect_right(self.dates, on_date.toordinal()) - 1
+        return self.rates[max(position, 0)]
+
+
+class RateCache:
+    """Caché por proceso de las series de tipos de cambio, por moneda"""
+
+    def __init__(self):
+        self._series = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, currency):
+        version = get_version(VERSION_KEY)
+        with self._lock:
+            if self._version != version:
+                self._series.clear()
+                self._version = version
+            series = self._series.get(currency)
+        if series is not None:
+            return series
+
+        rows = ExchangeRate.objects.filter(currency=currency).order_by('date').values_list('date', 'rate')
+        series = RateSeries(rows)
+        with self._lock:
+            if self._version == version:
+                self._series[currency] = series
+        return series
+
+    def invalidate(self):
+        bump_version(VERSION_KEY)
+        with self._lock:
+            self._series.clear()
+
+
+rate_cache = RateCache()
+
+
+def get_rate(currency, on_date):
+    """Unidades de `currency` por unidad de la moneda de referencia, o None si no hay tipos cargados"""
+    if currency == settings.EXCHANGE_RATES_REFERENCE_CURRENCY:
+        return ONE
+    return rate_cache.get(currency).rate_on(on_date)
+
+
+def has_rates(currency):
+    return currency == settings.EXCHANGE_RATES_REFERENCE_CURRENCY or bool(rate_cache.get(currency))
+
+
+def convert(amount, from_currency, to_currency, on_date):
+    """Convierte un importe entre monedas con el tipo de cambio de la fecha, redondeado a centavos"""
+    if from_currency == to_currency:
+        return amount
+    from_rate = get_rate(from_currency, on_date)
+    if from_rate is None:
+        raise MissingExchangeRate(from_currency)
+    to_rate = get_rate(to_currency, on_date)
+    if to_rate is None:
+        raise MissingExchangeRate(to_currency)
+    return (Decimal(amount) * to_rate / from_rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _rate_subquery(currency, on_date):
+    rates = ExchangeRate.objects.filter(currency=currency)
+    return Coalesce(
+        Subquery(rates.filter(date__lte=on_date).order_by('-date').values('rate')[:1]),
+        Subquery(rates.filter(date__gt=on_date).order_by('date').values('rate')[:1]),
+    )
+
+
+def conversion_expression(to_currency, amount='amount', currency='currency', on_date='date'):
+    """
+    Expresión SQL que convierte la columna `amount` (en la moneda de la columna
+    `currency`) a `to_currency` con el tipo de cambio de la columna `on_date`.
+
+    Equivale a `convert()` fila a fila. Es NULL si falta el tipo de cambio.
+    """
+    reference = settings.EXCHANGE_RATES_REFERENCE_CURRENCY
+    from_rate = Case(
+        When(**{currency: reference}, then=Value(ONE)),
+        default=_rate_subquery(OuterRef(currency), OuterRef(on_date)),
+    )
+    to_rate = Value(ONE) if to_currency == reference else _rate_subquery(to_currency, OuterRef(on_date))
+    return Case(
+        When(**{currency: to_currency}, then=F(amount)),
+        default=Round(
+            ExpressionWrapper(F(amount) * to_rate / from_rate, output_field=DecimalField()), 2
+        ),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def get_base_currency(user):
+    """Moneda en la que se informan los totales del usuario"""
+    try:
+        return user.profile.base_currency
+    except ObjectDoesNotExist:
+        return settings.DEFAULT_CURRENCY
+
+
+def get_base_currencies(user_ids):
+    """Moneda base de varios usuarios en una sola consulta"""
+    from users.models import Profile
+
+    user_ids = set(user_ids)
+    currencies = dict.fromkeys(user_ids, settings.DEFAULT_CURRENCY)
+    currencies.update(
+        Profile.objects.filter(user_id__in=user_ids).values_list('user_id', 'base_currency')
+    )
+    return currencies
@@ -0,0 +1,40 @@
+from rest_framework import serializers
+from .models import validate_currency_code
+from .rates import get_base_currency, has_rates
+
+
+class BaseCurrencyDefault:
+    """Valor por defecto: la moneda base del usuario autenticado"""
+    requires_context = True
+
+    def __call__(self, serializer_field):
+        return get_base_currency(serializer_field.context['request'].user)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+
+class CurrencyField(serializers.CharField):
+    """
+    Código de moneda ISO 4217 (se acepta en minúsculas).
+
+    Con `convertible=True` exige además que haya tipos de cambio para convertir
+    la moneda a la moneda base del usuario.
+    """
+
+    def __init__(self, convertible=False, **kwargs):
+        self.convertible = convertible
+        kwargs.setdefault('max_length', 3)
+        kwargs.setdefault('default', BaseCurrencyDefault())
+        super().__init__(**kwargs)
+        self.validators.append(validate_currency_code)
+
+    def to_internal_value(self, data):
+        currency = super().to_internal_value(data).upper()
+        if self.convertible:
+            base_currency = get_base_currency(self.context['request'].user)
+            if currency != base_currency:
+                for code in (currency, base_currency):
+                    if not has_rates(code):
+                        raise serializers.ValidationError(f'No hay tipos de cambio cargados para {code}.')
+        return currency
@@ -0,0 +1,26 @@
+"""
+Representación compacta (columnar) de las respuestas con listas largas.
+
+Con `?compact=true`, los endpoints que la admiten devuelven cada lista de
+objetos como un objeto con un array por campo, en lugar de repetir los
+nombres de los campos en cada elemento:
+
+    [{"date": "2024-01-01", "total": "10.00"}, {"date": "2024-01-02", "total": "4.50"}]
+    {"date": ["2024-01-01", "2024-01-02"], "total": ["10.00", "4.50"]}
+
+El elemento `i` se reconstruye tomando la posición `i` de cada array.
+"""
+
+
+def requested(request):
+    return request.query_params.get('compact', '').lower() in ('1', 'true')
+
+
+def columns(rows, fields):
+    """Lista de dicts -> un array por campo de `fields`"""
+    return {field: [row[field] for row in rows] for field in fields}
+
+
+def keyed_columns(mapping, key, fields):
+    """Dict de dicts (clave -> objeto) -> la clave en el array `key` y un array por campo"""
+    return {key: list(mapping), **columns(mapping.values(), fields)}
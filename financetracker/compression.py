@@ -0,0 +1,141 @@
+"""
+Codificación de contenido negociada (gzip y, si está instalado, brotli).
+
+`CompressionMiddleware` comprime las respuestas de la API con la codificación
+que prefiere el cliente: las normales de una vez si superan
+`COMPRESSION_MIN_SIZE` bytes, y las de streaming bloque a bloque, enviando
+cada bloque comprimido en cuanto se produce. Solo se comprimen los tipos de
+`COMPRESSION_CONTENT_TYPES`; el HTML de la API navegable queda fuera porque
+incluye el token CSRF (BREACH).
+"""
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    # Sin el paquete brotli solo se ofrece gzip
+    brotli = None
+
+# En orden de preferencia cuando el cliente acepta varias con la misma calidad
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(header):
+    """Codificaciones de `Accept-Encoding` con calidad mayor que cero"""
+    accepted = {}
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return {name: quality for name, quality in accepted.items() if quality > 0}
+
+
+def choose_encoding(header, available=ENCODINGS):
+    """La codificación de `available` que el cliente prefiere, o None para enviar sin codificar"""
+    accepted = accepted_encodings(header)
+    candidates = [
+        (accepted.get(encoding, accepted.get('*', 0)), -index, encoding)
+        for index, encoding in enumerate(available)
+    ]
+    quality, _, encoding = max(candidates, default=(0, 0, None))
+    return encoding if quality > 0 else None
+
+
+def compress(content, encoding, level=None):
+    """Comprime `content` con la codificación pedida; `level` None usa la compresión máxima"""
+    if encoding == 'gzip':
+        # mtime fijo: la misma entrada produce siempre los mismos bytes
+        return gzip.compress(content, compresslevel=9 if level is None else level, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(content, quality=11 if level is None else level)
+    raise ValueError(f'Codificación no soportada: {encoding}')
+
+
+def _stream_compressor(encoding, level=None):
+    """Funciones `(procesar, vaciar, terminar)` de un compresor incremental"""
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(9 if level is None else level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=11 if level is None else level)
+        return compressor.process, compressor.flush, compressor.finish
+    raise ValueError(f'Codificación no soportada: {encoding}')
+
+
+def compress_stream(chunks, encoding, level=None):
+    """Comprime un iterable de bloques; cada bloque sale comprimido y vaciado en cuanto llega"""
+    process, flush, finish = _stream_compressor(encoding, level)
+    for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+async def compress_async_stream(chunks, encoding, level=None):
+    process, flush, finish = _stream_compressor(encoding, level)
+    async for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """Comprime las respuestas según `Accept-Encoding` (ver el docstring del módulo)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not self._compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+        level = settings.COMPRESSION_LEVELS.get(encoding)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, encoding, level)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding, level)
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Los bytes cambian: un ETag fuerte de la respuesta sin comprimir ya no los identifica
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def _compressible(self, response):
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type in settings.COMPRESSION_CONTENT_TYPES
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from financetracker.schema_artifacts import build, code_version, is_current
+
+
+class Command(BaseCommand):
+    help = 'Genera el esquema OpenAPI en JSON y YAML, con sus variantes comprimidas, para servirlo pregenerado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Ruta del esquema JSON; el resto de los artefactos se escriben junto a él '
+                 '(por defecto, API_SCHEMA_FILE)'
+        )
+        parser.add_argument('--force', action='store_true', help='Regenerar aunque los artefactos estén al día')
+
+    def handle(self, *args, **options):
+        schema_file = options['output'] or settings.API_SCHEMA_FILE
+        if not schema_file:
+            raise CommandError('Indique --output o configure API_SCHEMA_FILE')
+
+        version = code_version()
+        if not options['force'] and is_current(schema_file, version):
+            self.stdout.write(f'El esquema de la versión {version} ya está generado en {schema_file}')
+            return
+
+        sizes = build(schema_file, version)
+        for (name, encoding), size in sorted(sizes.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+            self.stdout.write(f'  {name:<5}{encoding or "-":<6}{size / 1024:>9.1f} KB')
+        self.stdout.write(self.style.SUCCESS(f'Esquema de la versión {version} generado en {schema_file}'))
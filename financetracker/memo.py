@@ -0,0 +1,50 @@
+"""
+Memoización de agregados asociada a la petición HTTP.
+
+Cada petición obtiene su propio diccionario de memoización. Las sub-peticiones
+de un batch (`/api/batch/`) comparten el diccionario de la petición padre, de
+modo que un agregado común (por ejemplo, los totales del usuario en un período)
+se calcula una sola vez por batch.
+"""
+import threading
+
+
+class RequestMemo:
+    """Diccionario de resultados protegido por un lock (las sub-peticiones pueden ejecutarse en hilos)"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+        value = compute()
+        with self._lock:
+            return self._values.setdefault(key, value)
+
+
+def _http_request(request):
+    # Los Request de DRF envuelven el HttpRequest original
+    return getattr(request, '_request', request)
+
+
+def get_request_memo(request):
+    """Obtiene (o crea) la memoización asociada a la petición"""
+    http_request = _http_request(request)
+    memo = getattr(http_request, 'request_memo', None)
+    if memo is None:
+        memo = RequestMemo()
+        http_request.request_memo = memo
+    return memo
+
+
+def set_request_memo(request, memo):
+    """Asocia una memoización existente a la petición (usado por las sub-peticiones de un batch)"""
+    _http_request(request).request_memo = memo
+
+
+def memoize(request, key, compute):
+    """Devuelve el valor memoizado para `key` o lo calcula con `compute()`"""
+    return get_request_memo(request).get_or_compute(key, compute)
@@ -0,0 +1,40 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa el renderer estándar
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON que usa orjson cuando está instalado.
+
+    Produce los mismos bytes que `JSONRenderer` con la configuración por defecto
+    de DRF (JSON compacto y UTF-8). Los tipos que orjson no serializa de forma
+    idéntica (Decimal, fechas, querysets, etc.) se delegan al encoder de DRF.
+    Si se pide indentación, o orjson no está disponible, se usa el renderer
+    estándar.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (orjson is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context)):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except (TypeError, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que JSONRenderer: escapar los separadores de línea de JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
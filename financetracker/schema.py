@@ -0,0 +1,164 @@
+"""
+Esquema OpenAPI con carga diferida.
+
+Aplicar `@extend_schema` importa toda la maquinaria de generación de
+drf-spectacular (`AutoSchema`, plumbing, extensiones) y crea una clase de
+esquema por vista anotada, aunque el proceso nunca genere el esquema. Las
+vistas importan `extend_schema` y `extend_schema_view` de este módulo:
+
+- Sin `API_SCHEMA_FILE` (desarrollo) las anotaciones se aplican al importar,
+  igual que las de drf-spectacular.
+- Con `API_SCHEMA_FILE` (producción) las anotaciones quedan pendientes y la
+  clase de esquema por defecto de DRF es `DeferredSchema`, que no importa
+  nada (los routers de DRF instancian el esquema de cada vista al construir
+  las URLs). `load_annotations()`, que llama el generador del esquema
+  (`financetracker.schema_generator`) antes de generar, pone en su lugar el
+  `AutoSchema` de drf-spectacular y aplica las anotaciones en orden.
+  `/api/schema/` sirve los artefactos pregenerados (`schema_artifacts`).
+
+Las vistas de la documentación se enrutan con `LazyView`, que las importa con
+la primera petición.
+"""
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from drf_spectacular import utils
+from rest_framework.schemas.inspectors import ViewInspector
+from rest_framework.settings import api_settings
+from .compression import choose_encoding
+from .schema_artifacts import artifacts
+
+SCHEMA_CLASS = 'drf_spectacular.openapi.AutoSchema'
+
+_pending = []
+_loaded = False
+_lock = threading.Lock()
+
+
+class DeferredSchema(ViewInspector):
+    """Clase de esquema por defecto de DRF mientras las anotaciones están pendientes"""
+
+
+def _deferrable(decorator):
+    """Decorador que se aplica al cargar las anotaciones si el esquema es pregenerado"""
+    if not settings.API_SCHEMA_FILE:
+        return decorator
+
+    def deferred(target):
+        with _lock:
+            if not _loaded:
+                _pending.append((decorator, target))
+                return target
+        return decorator(target)
+
+    return deferred
+
+
+def extend_schema(*args, **kwargs):
+    return _deferrable(utils.extend_schema(*args, **kwargs))
+
+
+def extend_schema_view(**kwargs):
+    return _deferrable(utils.extend_schema_view(**kwargs))
+
+
+def load_annotations():
+    """Aplica las anotaciones pendientes, en el orden en que se declararon"""
+    global _loaded
+    if api_settings.DEFAULT_SCHEMA_CLASS is DeferredSchema:
+        # Base de las clases que crea @extend_schema y de los esquemas de las vistas sin anotar
+        api_settings.DEFAULT_SCHEMA_CLASS = import_string(SCHEMA_CLASS)
+    with _lock:
+        if _loaded:
+            return
+        _loaded = True
+        pending = list(_pending)
+        _pending.clear()
+    for decorator, target in pending:
+        decorator(target)
+
+
+class LazyView:
+    """
+    Vista basada en clase que se importa la primera vez que se usa.
+
+    Expone `cls` e `initkwargs` como la función de `as_view()`, así el
+    generador del esquema la recorre igual que a las demás vistas de DRF.
+    """
+    csrf_exempt = True
+
+    def __init__(self, view_path, **initkwargs):
+        self.view_path = view_path
+        self.initkwargs = initkwargs
+        self.__module__, self.__qualname__ = view_path.rsplit('.', 1)
+        self.__name__ = self.__qualname__
+        self._view = None
+
+    @cached_property
+    def cls(self):
+        return import_string(self.view_path)
+
+    def __call__(self, request, *args, **kwargs):
+        if self._view is None:
+            self._view = import_string(self.view_path).as_view(**self.initkwargs)
+        return self._view(request, *args, **kwargs)
+
+
+# Con `?v=<versión>` la URL identifica una versión concreta del esquema y se puede cachear para siempre
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+
+def _schema_format(request):
+    """Formato pedido con `?format=` o con `Accept`; YAML por defecto, como `SpectacularAPIView`"""
+    requested = request.GET.get('format')
+    if requested in ('json', 'openapi-json'):
+        return 'json'
+    if requested in ('yaml', 'openapi'):
+        return 'yaml'
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+def _matches(if_none_match, etag):
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    # If-None-Match usa la comparación débil: W/"x" coincide con "x"
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+def schema_file_view(request):
+    """
+    Sirve el esquema pregenerado de `API_SCHEMA_FILE` (ver `schema_artifacts`).
+
+    Negocia el formato (JSON o YAML) y la codificación (brotli, gzip o
+    ninguna) entre las variantes ya comprimidas, con un ETag fuerte por
+    variante. Sin `?v=` la respuesta se revalida con el ETag en cada uso; con
+    la versión actual (`X-Schema-Version`) se cachea sin límite.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    version, representations = artifacts.get(str(settings.API_SCHEMA_FILE))
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    representation = representations[_schema_format(request), encoding]
+
+    if _matches(request.headers.get('If-None-Match', ''), representation.etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(representation.content, content_type=representation.media_type)
+        if representation.encoding:
+            response['Content-Encoding'] = representation.encoding
+    response['ETag'] = representation.etag
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if request.GET.get('v') == version else REVALIDATE_CACHE_CONTROL
+    )
+    response['Vary'] = 'Accept, Accept-Encoding'
+    response['X-Schema-Version'] = version
+    return response
+
+
+def schema_view():
+    if settings.API_SCHEMA_FILE:
+        return schema_file_view
+    return LazyView('drf_spectacular.views.SpectacularAPIView')
@@ -0,0 +1,156 @@
+"""
+Artefactos del esquema OpenAPI pregenerado.
+
+`build()` genera el esquema una vez y lo escribe junto a `API_SCHEMA_FILE`
+en JSON y YAML, cada formato también comprimido con gzip y brotli (si está
+instalado), más un archivo con la versión del código con la que se generó:
+
+    openapi.json  openapi.json.gz  openapi.json.br
+    openapi.yaml  openapi.yaml.gz  openapi.yaml.br
+    openapi.version
+
+La versión del código es `CODE_VERSION` (por ejemplo, el commit desplegado)
+o, sin ella, un hash de los fuentes del proyecto y de las versiones de
+Django, DRF y drf-spectacular. Los artefactos se regeneran solo cuando esa
+versión cambia: `manage.py build_schema` no hace nada si están al día, y el
+primer proceso que sirve el esquema con artefactos de otra versión los
+vuelve a generar.
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+
+from .compression import ENCODINGS, compress
+
+FORMATS = {
+    'json': 'application/vnd.oai.openapi+json',
+    'yaml': 'application/vnd.oai.openapi',
+}
+
+
+class Representation:
+    """Bytes de un formato y codificación del esquema, con su ETag fuerte"""
+
+    def __init__(self, content, media_type, encoding, digest):
+        self.content = content
+        self.media_type = media_type
+        self.encoding = encoding
+        # Cada codificación es una representación distinta y lleva su propio ETag
+        self.etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+
+def code_version():
+    """Versión del código que determina el esquema"""
+    if settings.CODE_VERSION:
+        return settings.CODE_VERSION
+    import django
+    import drf_spectacular
+    import rest_framework
+
+    digest = hashlib.sha256()
+    for package in (django, rest_framework, drf_spectacular):
+        digest.update(f'{package.__name__}=={package.__version__}\n'.encode('utf-8'))
+    base_dir = Path(settings.BASE_DIR).resolve()
+    roots = sorted({
+        Path(app_config.path).resolve() for app_config in apps.get_app_configs()
+        if Path(app_config.path).resolve().is_relative_to(base_dir)
+    })
+    for root in roots:
+        for source in sorted(root.rglob('*.py')):
+            digest.update(str(source.relative_to(base_dir)).encode('utf-8'))
+            digest.update(source.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def paths(schema_file):
+    """Ruta de cada artefacto: `(formato, codificación)` -> ruta, más la del archivo de versión"""
+    json_path = Path(schema_file)
+    base = {'json': json_path, 'yaml': json_path.with_suffix('.yaml')}
+    files = {}
+    for name, path in base.items():
+        files[name, None] = path
+        for encoding in ENCODINGS:
+            files[name, encoding] = path.with_name(f'{path.name}.{"gz" if encoding == "gzip" else encoding}')
+    return files, json_path.with_suffix('.version')
+
+
+def _write(path, content):
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def render():
+    """Genera el esquema y devuelve sus bytes por formato, igual que `SpectacularAPIView`"""
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    schema = spectacular_settings.DEFAULT_GENERATOR_CLASS().get_schema(request=None, public=True)
+    return {
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+    }
+
+
+def is_current(schema_file, version):
+    files, version_file = paths(schema_file)
+    try:
+        return version_file.read_text().strip() == version and all(path.exists() for path in files.values())
+    except OSError:
+        return False
+
+
+def build(schema_file, version=None):
+    """Genera y escribe todos los artefactos; devuelve `{(formato, codificación): tamaño}`"""
+    version = version or code_version()
+    files, version_file = paths(schema_file)
+    Path(schema_file).parent.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for name, content in render().items():
+        for encoding in (None,) + ENCODINGS:
+            data = compress(content, encoding) if encoding else content
+            _write(files[name, encoding], data)
+            sizes[name, encoding] = len(data)
+    # La versión se escribe al final: si la generación falla, los artefactos siguen marcados como viejos
+    _write(version_file, version.encode('utf-8'))
+    return sizes
+
+
+class SchemaArtifacts:
+    """Artefactos cargados en memoria una vez por proceso, regenerados si son de otra versión"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    def get(self, schema_file):
+        """Devuelve `(versión, {(formato, codificación): Representation})`"""
+        with self._lock:
+            if self._loaded is None or self._loaded[0] != schema_file:
+                self._loaded = (schema_file,) + self._load(schema_file)
+            return self._loaded[1:]
+
+    def _load(self, schema_file):
+        version = code_version()
+        if not is_current(schema_file, version):
+            build(schema_file, version)
+        files, _ = paths(schema_file)
+        representations = {}
+        for name, media_type in FORMATS.items():
+            digest = hashlib.sha256(files[name, None].read_bytes()).hexdigest()[:32]
+            for encoding in (None,) + ENCODINGS:
+                representations[name, encoding] = Representation(
+                    files[name, encoding].read_bytes(), media_type, encoding, digest
+                )
+        return version, representations
+
+    def clear(self):
+        with self._lock:
+            self._loaded = None
+
+
+artifacts = SchemaArtifacts()
@@ -0,0 +1,16 @@
+"""
+Generador del esquema OpenAPI (`SPECTACULAR_SETTINGS['DEFAULT_GENERATOR_CLASS']`).
+
+Aplica las anotaciones diferidas de `financetracker.schema` antes de generar,
+así el esquema es el mismo con o sin `API_SCHEMA_FILE`. Lo usan
+`SpectacularAPIView`, `manage.py spectacular` y el check de despliegue.
+"""
+from drf_spectacular.generators import SchemaGenerator as SpectacularSchemaGenerator
+
+from .schema import load_annotations
+
+
+class SchemaGenerator(SpectacularSchemaGenerator):
+    def get_schema(self, request=None, public=False):
+        load_annotations()
+        return super().get_schema(request=request, public=public)
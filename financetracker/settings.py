@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,22 +44,119 @@ INSTALLED_APPS = [
     "drf_spectacular",
     "corsheaders",
     # Local apps
+    "financetracker",
     "users",
+    "currencies",
     "transactions",
     "budgets",
     "reports",
+    "batch",
+    "sync",
+    "changelog",
+    "households",
 ]
 
+# Esquema OpenAPI pregenerado
+# Ruta del esquema JSON generado al desplegar con `python manage.py build_schema` (junto a él quedan el YAML
+# y las variantes comprimidas). Con un archivo configurado /api/schema/ lo sirve sin generar el esquema y los
+# workers no cargan la maquinaria de drf-spectacular al arrancar (ver financetracker/schema.py).
+API_SCHEMA_FILE = os.environ.get('API_SCHEMA_FILE') or None
+# Versión del código desplegado (por ejemplo, el commit); los artefactos del esquema se regeneran cuando
+# cambia. Sin ella se usa un hash de los fuentes del proyecto.
+CODE_VERSION = os.environ.get('CODE_VERSION') or None
+
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_SCHEMA_CLASS': (
+        'financetracker.schema.DeferredSchema' if API_SCHEMA_FILE else 'drf_spectacular.openapi.AutoSchema'
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'financetracker.throttling.CostThrottle',
+    ],
 }
 
+# Request cost throttling
+# Presupuesto por usuario en unidades: capacidad del token bucket y unidades recargadas por segundo
+THROTTLE_BUDGETS = {
+    'crud': {'capacity': 600, 'refill_rate': 10},
+    'analytics': {'capacity': 120, 'refill_rate': 1},
+}
+# Los endpoints analíticos cuestan una unidad por cada tantos buckets (días, semanas, períodos) que calculan
+THROTTLE_BUCKETS_PER_UNIT = 31
+# Costo medido: una unidad cada tantas consultas a la base de datos
+THROTTLE_QUERIES_PER_UNIT = 10
+THROTTLE_MAX_ENTRIES = 10000
+
+# Compresión de respuestas (gzip y, con el paquete brotli instalado, brotli)
+# Tamaño mínimo en bytes para comprimir una respuesta que no es de streaming
+COMPRESSION_MIN_SIZE = 1024
+# Niveles por codificación: más bajos que el máximo para no pagar CPU por cada respuesta
+COMPRESSION_LEVELS = {'gzip': 6, 'br': 5}
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'application/vnd.oai.openapi',
+    'application/vnd.oai.openapi+json',
+    'application/yaml',
+    'text/csv',
+    'text/plain',
+)
+
+# Single-flight
+# Las peticiones analíticas idénticas concurrentes comparten una ejecución
+SINGLE_FLIGHT_ENABLED = True
+# Segundos que una petición espera a la ejecución en curso antes de ejecutar la vista por su cuenta
+SINGLE_FLIGHT_TIMEOUT = 30
+# Directorio de locks para coalescer también entre procesos (None = solo dentro de cada proceso).
+# Las respuestas se guardan ahí con pickle: debe ser privado del servidor (sin escritura para otros usuarios)
+SINGLE_FLIGHT_LOCK_DIR = None
+
+# Token authentication cache
+# El LRU local vive en cada proceso (TTL corto); el caché compartido usa CACHES['default']
+TOKEN_CACHE_MAX_ENTRIES = 10000
+TOKEN_CACHE_LOCAL_TTL = 30
+TOKEN_CACHE_SHARED_TTL = 300
+# Vigencia de los tokens en segundos (None = sin expiración)
+TOKEN_EXPIRATION = None
+
+# Columnar ledger cache
+# Historial de transacciones por usuario en memoria para las consultas analíticas
+LEDGER_CACHE_ENABLED = True
+LEDGER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Transaction archive
+# Años que se mantienen en la tabla de transacciones (el actual incluido); los anteriores se archivan
+TRANSACTION_ARCHIVE_KEEP_YEARS = 3
+
+# Currencies
+# Moneda por defecto de transacciones y usuarios, y moneda de referencia de la tabla de tipos de cambio
+DEFAULT_CURRENCY = 'USD'
+EXCHANGE_RATES_REFERENCE_CURRENCY = 'USD'
+
+# Batch API
+# Número máximo de sub-peticiones por batch y de hilos para ejecutar lecturas en paralelo
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# Sync
+# Días que se conservan las lápidas de los objetos eliminados (comando compact_tombstones)
+SYNC_TOMBSTONE_RETENTION_DAYS = 90
+
+# Change log
+# Consumidores del registro de cambios: nombre -> ruta de la función que procesa cada lote de eventos
+CHANGELOG_CONSUMERS = {}
+CHANGELOG_BATCH_SIZE = 500
+# Segundos tras los que un hueco en los ids de los eventos se da por una transacción revertida.
+# Debe superar con margen la transacción de escritura más larga (recompute_base_amounts sobre todos los
+# usuarios, lotes de materialize_due): un evento confirmado más tarde que esto no llega a los consumidores
+CHANGELOG_GAP_TIMEOUT = 900
+# Días que se conservan los eventos ya procesados por todos los consumidores (comando prune_changes)
+CHANGELOG_RETENTION_DAYS = 30
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
@@ -66,6 +164,7 @@ CORS_ALLOWED_ORIGINS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'financetracker.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,6 +172,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'financetracker.throttling.RequestCostMiddleware',
 ]
 
 ROOT_URLCONF = 'financetracker.urls'
@@ -107,6 +207,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# En producción con varios procesos conviene un backend compartido (Redis/Memcached)
+
+# Guarda los tokens validados, sus contadores de versión y los de los historiales y reglas de cada usuario:
+# el límite debe alcanzar para todos los tokens cacheados más sus contadores
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 4 * TOKEN_CACHE_MAX_ENTRIES,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -163,6 +279,7 @@ SPECTACULAR_SETTINGS = {
     Todos los endpoints requieren autenticación por token excepto el endpoint de autenticación.
     ''',
     'VERSION': '1.0.0',
+    'DEFAULT_GENERATOR_CLASS': 'financetracker.schema_generator.SchemaGenerator',
     'SERVE_INCLUDE_SCHEMA': False,
     'COMPONENT_SPLIT_REQUEST': True,
     'SCHEMA_PATH_PREFIX': '/api/',
@@ -180,6 +297,10 @@ SPECTACULAR_SETTINGS = {
         {'name': 'budgets', 'description': 'Gestión de presupuestos'},
         {'name': 'reports', 'description': 'Generación de reportes financieros'},
         {'name': 'categories', 'description': 'Categorización de transacciones'},
+        {'name': 'batch', 'description': 'Ejecución de varias peticiones en una sola llamada'},
+        {'name': 'accounts', 'description': 'Cuentas y saldos'},
+        {'name': 'sync', 'description': 'Sincronización incremental para clientes offline'},
+        {'name': 'households', 'description': 'Hogares con libros compartidos entre sus miembros'},
     ],
     'SECURITY': [
         {
@@ -0,0 +1,213 @@
+"""
+Coalescencia de peticiones analíticas idénticas concurrentes (single-flight).
+
+Cuando llegan a la vez varias peticiones idénticas (mismo usuario, ruta,
+parámetros y versión de los datos), solo la primera ejecuta la vista y las
+demás reutilizan su respuesta. La versión de los datos (la que declara la
+vista con `get_data_version(request)`) cambia con cada escritura, así una
+petición posterior a una escritura nunca se une a una ejecución anterior:
+
+- Dentro del proceso, las que llegan mientras hay una ejecución en curso
+  esperan a que termine.
+- Entre procesos (opcional, con `SINGLE_FLIGHT_LOCK_DIR`), la ejecución se
+  protege con un lock de archivo (`flock`) por clave y la respuesta se publica
+  en un archivo junto al lock; quien obtiene el lock después la reutiliza si se
+  escribió mientras esperaba. Las respuestas se deserializan con pickle, por lo
+  que el directorio no debe ser escribible por otros usuarios del sistema. Los
+  locks y respuestas de más de dos `SINGLE_FLIGHT_TIMEOUT` ya no le sirven a
+  nadie y se borran periódicamente; borrar un lock en uso solo hace que dos
+  peticiones ejecuten la vista en lugar de coalescerse.
+
+Si la ejecución en curso no termina en `SINGLE_FLIGHT_TIMEOUT` segundos, o
+falla con una excepción, la petición que esperaba ejecuta la vista por su
+cuenta. Los contadores de `flights.stats()` indican cuántas peticiones se
+ejecutaron, cuántas se coalescieron y cuántas agotaron la espera.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.response import Response
+
+try:
+    import fcntl
+except ImportError:
+    # Sin flock (Windows) solo se coalescen las peticiones del mismo proceso
+    fcntl = None
+
+LOCK_POLL_INTERVAL = 0.01
+# Archivos del directorio de locks: hash de la clave, con sufijo de lock o temporal
+FLIGHT_FILE = re.compile(r'^[0-9a-f]{64}(\.lock|\.\d+\.\d+\.tmp)?$')
+
+
+class Flight:
+    """Ejecución en curso de una clave; `result` queda en None si falló"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {'executed': 0, 'coalesced': 0, 'timeouts': 0}
+        self._swept_at = 0
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def do(self, key, compute, timeout):
+        """Devuelve `(resultado, compartido)`; `compute()` se ejecuta una vez por grupo de peticiones concurrentes"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        if not leader:
+            if flight.done.wait(timeout) and flight.result is not None:
+                self._count('coalesced')
+                return flight.result, True
+            if not flight.done.is_set():
+                self._count('timeouts')
+            return self._execute(compute), False
+
+        try:
+            result, shared = self._across_processes(key, compute, timeout)
+            flight.result = result
+            return result, shared
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _execute(self, compute):
+        self._count('executed')
+        return compute()
+
+    def _across_processes(self, key, compute, timeout):
+        directory = settings.SINGLE_FLIGHT_LOCK_DIR
+        if not directory or fcntl is None:
+            return self._execute(compute), False
+
+        self._sweep(directory, 2 * timeout)
+        path = os.path.join(directory, hashlib.sha256(repr(key).encode('utf-8')).hexdigest())
+        started = time.time()
+        with open(path + '.lock', 'a') as lock_file:
+            if not _acquire(lock_file, timeout):
+                self._count('timeouts')
+                return self._execute(compute), False
+            try:
+                # La fecha del lock indica su último uso para el barrido
+                os.utime(lock_file.fileno())
+                result = _read_result(path, started)
+                if result is not None:
+                    self._count('coalesced')
+                    return result, True
+                result = self._execute(compute)
+                _write_result(path, result)
+                return result, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sweep(self, directory, max_age):
+        """Borra los locks y respuestas sin usar hace más de `max_age` segundos, a lo sumo una vez por `max_age`"""
+        now = time.time()
+        with self._lock:
+            if now - self._swept_at < max_age:
+                return
+            self._swept_at = now
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if not FLIGHT_FILE.match(entry.name):
+                continue
+            try:
+                if entry.stat().st_mtime < now - max_age:
+                    os.remove(entry.path)
+            except OSError:
+                # Otro proceso lo borró o lo está usando
+                pass
+
+
+def _acquire(lock_file, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_POLL_INTERVAL)
+
+
+def _read_result(path, since):
+    """Resultado publicado por otro proceso después de `since`, o None"""
+    try:
+        if os.path.getmtime(path) < since:
+            return None
+        with open(path, 'rb') as result_file:
+            return pickle.load(result_file)
+    except (OSError, EOFError, pickle.PickleError):
+        return None
+
+
+def _write_result(path, result):
+    temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(temporary, 'wb') as result_file:
+            pickle.dump(result, result_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except (OSError, TypeError, pickle.PickleError):
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+flights = SingleFlight()
+
+
+def single_flight(view_method):
+    """
+    Decorador de acciones de un ViewSet: las peticiones idénticas concurrentes comparten una ejecución.
+
+    La clave es el usuario, la ruta, los parámetros de la petición y, si el
+    ViewSet define `get_data_version(request)`, la versión de los datos que
+    consulta. Las respuestas llevan `X-Single-Flight: executed` o `coalesced`.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return view_method(self, request, *args, **kwargs)
+
+        def compute():
+            response = view_method(self, request, *args, **kwargs)
+            return response.status_code, response.data
+
+        get_data_version = getattr(self, 'get_data_version', None)
+        key = (
+            request.user.pk,
+            get_data_version(request) if get_data_version else None,
+            request.path,
+            tuple(sorted((name, tuple(values)) for name, values in request.query_params.lists())),
+        )
+        (status_code, data), shared = flights.do(key, compute, settings.SINGLE_FLIGHT_TIMEOUT)
+        response = Response(data, status=status_code)
+        response['X-Single-Flight'] = 'coalesced' if shared else 'executed'
+        return response
+
+    return wrapper
@@ -0,0 +1,230 @@
+"""
+Límite de peticiones por usuario según su costo.
+
+Cada usuario tiene un token bucket por presupuesto (`crud` para las
+operaciones habituales, `analytics` para los endpoints analíticos), guardado
+en memoria del proceso. Cada petición descuenta su costo en unidades:
+
+- El costo declarado se cobra antes de ejecutar la vista. Los endpoints
+  analíticos cuestan según los buckets que calculan (días, semanas o
+  períodos de la serie; una unidad por `THROTTLE_BUCKETS_PER_UNIT` buckets),
+  no según el largo del rango: un agregado de diez años es un solo bucket y
+  una serie de diez años en meses son 120. El resto cuesta una unidad, salvo
+  que la vista declare otro costo con `get_request_cost(request)`.
+- El costo medido se cobra al terminar (`RequestCostMiddleware`): si la
+  petición ejecutó más consultas de las que cubría su costo declarado (una
+  unidad cada `THROTTLE_QUERIES_PER_UNIT` consultas), la diferencia se
+  descuenta del bucket, que puede quedar en negativo hasta recargarse.
+
+Las respuestas llevan las cabeceras `X-RateLimit-*` con el presupuesto, el
+costo cobrado y lo que queda; al agotarse se responde 429 con `Retry-After`.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_SCOPE = 'crud'
+ANALYTICS_SCOPE = 'analytics'
+
+
+class TokenBuckets:
+    """
+    Token buckets por clave con recarga continua, en un LRU en memoria del proceso.
+
+    Un bucket nuevo (o desalojado) empieza lleno.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _level(self, key, capacity, refill_rate, now):
+        level, updated_at = self._entries.get(key, (capacity, now))
+        return min(capacity, level + (now - updated_at) * refill_rate)
+
+    def _store(self, key, level, now):
+        self._entries[key] = (level, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def consume(self, key, cost, capacity, refill_rate):
+        """
+        Descuenta `cost` si el bucket lo cubre.
+
+        Devuelve `(permitido, nivel restante, segundos hasta poder cobrarlo)`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            level = self._level(key, capacity, refill_rate, now)
+            if cost > level:
+                self._store(key, level, now)
+                return False, level, (cost - level) / refill_rate
+            self._store(key, level - cost, now)
+            return True, level - cost, 0
+
+    def charge(self, key, cost, capacity, refill_rate):
+        """Descuenta `cost` aunque el bucket quede en negativo y devuelve el nivel restante"""
+        with self._lock:
+            now = time.monotonic()
+            level = self._level(key, capacity, refill_rate, now) - cost
+            self._store(key, level, now)
+            return level
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+buckets = TokenBuckets(max_entries=settings.THROTTLE_MAX_ENTRIES)
+
+
+class ThrottleState:
+    """Presupuesto cobrado a una petición, para el cobro medido y las cabeceras de la respuesta"""
+
+    def __init__(self, key, scope, cost, remaining):
+        self.key = key
+        self.scope = scope
+        self.cost = cost
+        self.remaining = remaining
+
+    @property
+    def budget(self):
+        return settings.THROTTLE_BUDGETS[self.scope]
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def request_dates(request):
+    """`start_date` y `end_date` de la petición, o None si faltan o son inválidas"""
+    params = request.query_params
+    return _parse_date(params.get('start_date')), _parse_date(params.get('end_date'))
+
+
+def span_days(request):
+    """Días del rango `start_date`/`end_date` de la petición (1 si falta alguna fecha)"""
+    start_date, end_date = request_dates(request)
+    if start_date is None or end_date is None:
+        return 1
+    return max((end_date - start_date).days + 1, 1)
+
+
+def period_buckets(request):
+    """Buckets de una petición analítica: los `periods` de las comparaciones o un único agregado"""
+    params = request.query_params
+    if 'periods' in params or 'period' in params:
+        try:
+            return max(int(params.get('periods', 12)), 1)
+        except ValueError:
+            return 1
+    return 1
+
+
+def bucket_cost(buckets):
+    """Costo de una petición analítica según los buckets que calcula"""
+    return math.ceil(buckets / settings.THROTTLE_BUCKETS_PER_UNIT)
+
+
+def measured_cost(queries):
+    return math.ceil(queries / settings.THROTTLE_QUERIES_PER_UNIT)
+
+
+class CostAwareMixin:
+    """
+    Declara el presupuesto y el costo de las acciones de un ViewSet.
+
+    Las acciones de `analytics_actions` usan el presupuesto analítico y cuestan
+    según los buckets de `get_cost_buckets(request)`; el resto cuesta una
+    unidad del presupuesto CRUD.
+    """
+    analytics_actions = ()
+
+    def get_throttle_scope(self):
+        return ANALYTICS_SCOPE if self.action in self.analytics_actions else DEFAULT_SCOPE
+
+    def get_cost_buckets(self, request):
+        return period_buckets(request)
+
+    def get_request_cost(self, request):
+        if self.action in self.analytics_actions:
+            return bucket_cost(self.get_cost_buckets(request))
+        return 1
+
+
+class CostThrottle(BaseThrottle):
+    """Throttle de DRF que cobra el costo de cada petición del bucket del usuario"""
+
+    def allow_request(self, request, view):
+        self._wait = None
+        if not request.user or not request.user.is_authenticated:
+            return True
+        get_scope = getattr(view, 'get_throttle_scope', None)
+        scope = get_scope() if get_scope else DEFAULT_SCOPE
+        get_cost = getattr(view, 'get_request_cost', None)
+        budget = settings.THROTTLE_BUDGETS[scope]
+        # Una petición nunca cuesta más que el presupuesto completo
+        cost = min(max(get_cost(request) if get_cost else 1, 1), budget['capacity'])
+
+        key = (request.user.pk, scope)
+        allowed, remaining, wait = buckets.consume(key, cost, budget['capacity'], budget['refill_rate'])
+        request._request.throttle_state = ThrottleState(key, scope, cost if allowed else 0, remaining)
+        self._wait = wait
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class QueryCounter:
+    """`execute_wrapper` que cuenta las consultas ejecutadas en la conexión"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class RequestCostMiddleware:
+    """
+    Cobra el costo medido de cada petición y agrega las cabeceras del presupuesto.
+
+    Cuenta las consultas de la conexión por defecto durante la petición; las
+    que superan el costo ya cobrado por `CostThrottle` se descuentan al terminar.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        state = getattr(request, 'throttle_state', None)
+        if state is None:
+            return response
+        budget = state.budget
+        if response.status_code != 429:
+            extra = measured_cost(counter.count) - state.cost
+            if extra > 0:
+                state.remaining = buckets.charge(state.key, extra, budget['capacity'], budget['refill_rate'])
+                state.cost += extra
+        response['X-RateLimit-Scope'] = state.scope
+        response['X-RateLimit-Limit'] = str(budget['capacity'])
+        response['X-RateLimit-Remaining'] = str(math.floor(state.remaining))
+        response['X-RateLimit-Cost'] = str(state.cost)
+        return response
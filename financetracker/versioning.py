@@ -0,0 +1,49 @@
+"""
+Contadores de versión en el caché compartido de Django.
+
+Los cachés locales de cada proceso (historial columnar, reglas compiladas,
+tokens validados) guardan la versión con la que se construyeron; cualquier
+proceso que modifica los datos incrementa el contador y los demás detectan el
+cambio.
+
+El caché compartido puede desalojar un contador en cualquier momento. Por eso
+un contador nuevo (o desalojado) no empieza en 0 sino en `time.time_ns()`: la
+versión que se lee después de un desalojo no coincide con ninguna anterior y
+todo lo cacheado con ella queda vencido, en lugar de volver a valer cuando el
+contador reiniciado alcanza el mismo número.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _initial():
+    # Mayor que cualquier contador anterior de la clave: crece con el reloj, no con las escrituras
+    return time.time_ns()
+
+
+def get_version(key):
+    """Versión actual; si el contador no existe (o fue desalojado) se crea con un valor nunca usado"""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial(), timeout=None)
+        version = cache.get(key)
+    return version if version is not None else _initial()
+
+
+def get_versions(keys):
+    """Versiones de varias claves con una sola lectura del caché (si existen todas), en el mismo orden"""
+    values = cache.get_many(keys)
+    return tuple(values[key] if key in values else get_version(key) for key in keys)
+
+
+def bump_version(key):
+    """Incrementa atómicamente el contador y devuelve el nuevo valor"""
+    cache.add(key, _initial(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # La clave expiró o fue desalojada entre add e incr
+        version = _initial()
+        cache.set(key, version, timeout=None)
+        return version
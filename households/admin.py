@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import Household, HouseholdMembership
+
+# Register your models here.
+admin.site.register(Household)
+admin.site.register(HouseholdMembership)
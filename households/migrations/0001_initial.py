@@ -0,0 +1,46 @@
+# Generated by Django 4.2.23 on 2026-10-19 01:20
+
+import currencies.models
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Household',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('currency', models.CharField(default=currencies.models.default_currency, help_text='Moneda base de todos los miembros', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}$', 'Código de moneda inválido. Use el código ISO 4217 de tres letras (ej: USD, EUR).')])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HouseholdMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('editor', 'Editor'), ('viewer', 'Viewer')], default='viewer', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('household', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='households.household')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='household_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['household', 'id'],
+                'indexes': [models.Index(fields=['user', 'household'], name='household_member_user_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='householdmembership',
+            constraint=models.UniqueConstraint(fields=('household', 'user'), name='unique_household_member'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-19 01:32
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def accept_creators(apps, schema_editor):
+    # Solo quien creó cada hogar (su primera membresía) aceptó; los demás miembros quedan invitados
+    HouseholdMembership = apps.get_model('households', 'HouseholdMembership')
+    first_ids = HouseholdMembership.objects.values('household').annotate(first=Min('id')).values('first')
+    for membership in HouseholdMembership.objects.filter(id__in=first_ids):
+        membership.accepted_at = membership.created_at
+        membership.save(update_fields=['accepted_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='householdmembership',
+            name='accepted_at',
+            field=models.DateTimeField(blank=True, help_text='Vacío mientras la invitación está pendiente', null=True),
+        ),
+        migrations.RunPython(accept_creators, migrations.RunPython.noop),
+    ]
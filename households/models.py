@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.db import models
+from currencies.models import default_currency, validate_currency_code
+
+
+class Household(models.Model):
+    """
+    Hogar con un libro compartido entre sus miembros.
+
+    Los datos siguen perteneciendo a cada usuario: el hogar agrupa a sus
+    miembros, que ven los datos de todos y, según su rol, los editan. Los
+    totales del hogar se suman en su moneda, que es la moneda base de todos
+    los miembros.
+    """
+    name = models.CharField(max_length=100)
+    currency = models.CharField(max_length=3, default=default_currency, validators=[validate_currency_code], help_text='Moneda base de todos los miembros')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.currency})'
+
+
+class HouseholdMembership(models.Model):
+    """
+    Miembro de un hogar y su rol.
+
+    owner administra el hogar y sus miembros, editor además edita los datos de
+    los demás miembros y viewer solo los consulta. Todos editan los suyos.
+
+    Agregar a un usuario crea una invitación pendiente: la membresía no cuenta
+    (ni expone sus datos) hasta que el usuario la acepta. El rol aceptado vale
+    en ambos sentidos: los datos de un miembro solo los editan otros si él
+    aceptó un rol de escritura, y subir el rol vuelve a dejar la membresía pendiente.
+    """
+    ROLE_CHOICES = (
+        ('owner', 'Owner'),
+        ('editor', 'Editor'),
+        ('viewer', 'Viewer'),
+    )
+
+    household = models.ForeignKey(Household, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='household_memberships')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='viewer')
+    accepted_at = models.DateTimeField(null=True, blank=True, help_text='Vacío mientras la invitación está pendiente')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['household', 'id']
+        constraints = [
+            # También es el índice de la subconsulta de autorización (hogar, usuario)
+            models.UniqueConstraint(fields=['household', 'user'], name='unique_household_member'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'household'], name='household_member_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} @ {self.household_id}: {self.role}'
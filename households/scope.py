@@ -0,0 +1,127 @@
+"""
+Alcance de los datos de una petición: los del usuario o los de un hogar.
+
+Con el parámetro `household=<id>` las vistas trabajan sobre los datos de
+todos los miembros del hogar. La autorización es un filtro del queryset, no
+una comprobación por objeto: `visible()` agrega `user_id IN (subconsulta de
+miembros)`, y la subconsulta solo devuelve filas si quien pide es miembro
+(con el índice único (hogar, usuario)). Para quien no es miembro el queryset
+queda vacío y el detalle responde 404. Solo cuentan las membresías aceptadas:
+una invitación pendiente no da acceso ni expone los datos del invitado. En las
+escrituras la subconsulta exige el rol owner o editor a quien pide y también
+al dueño de cada fila (el rol que él aceptó); los datos propios se escriben
+siempre.
+
+Las analíticas necesitan los ids de los miembros antes de consultar (para
+armar el historial columnar combinado). Los miembros y la moneda de cada
+hogar se guardan en el caché compartido de Django, que se invalida al cambiar
+el hogar o sus membresías, así una petición de hogar hace las mismas
+consultas que una individual.
+"""
+from django.core.cache import cache
+from django.db.models import Exists, Q
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import permissions
+from rest_framework.exceptions import NotFound, ValidationError
+from currencies.rates import get_base_currency
+from financetracker.memo import memoize
+from .models import HouseholdMembership
+
+PARAM = 'household'
+WRITE_ROLES = ('owner', 'editor')
+
+# Parámetro de las vistas con alcance de hogar (se documenta una vez por vista)
+PARAMETER = OpenApiParameter(
+    name=PARAM,
+    type=OpenApiTypes.INT,
+    location=OpenApiParameter.QUERY,
+    description='ID de un hogar del que el usuario es miembro: la operación abarca los datos de todos sus miembros'
+)
+
+
+def household_id(request):
+    """Id del hogar pedido con `?household=`, o None para los datos del usuario"""
+    value = request.query_params.get(PARAM)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({PARAM: 'Debe ser el id de un hogar.'})
+
+
+def member_ids(household_id, user, roles=None):
+    """
+    Subconsulta con los ids de los miembros que aceptaron; vacía si `user` no es miembro aceptado.
+
+    Con `roles`, tanto quien pide como los miembros devueltos deben tener uno de ellos.
+    """
+    accepted = HouseholdMembership.objects.filter(household_id=household_id, accepted_at__isnull=False)
+    requester = accepted.filter(user=user)
+    members = accepted
+    if roles:
+        requester = requester.filter(role__in=roles)
+        members = members.filter(role__in=roles)
+    return members.filter(Exists(requester)).values('user_id')
+
+
+def visible(request, queryset):
+    """Filtra un queryset de un modelo con `user` a las filas que la petición puede leer o, si escribe, modificar"""
+    household = household_id(request)
+    if household is None:
+        return queryset.filter(user=request.user)
+    if request.method in permissions.SAFE_METHODS:
+        return queryset.filter(user_id__in=member_ids(household, request.user))
+    return queryset.filter(Q(user=request.user) | Q(user_id__in=member_ids(household, request.user, WRITE_ROLES)))
+
+
+def _cache_key(household_id):
+    return f'household:{household_id}'
+
+
+def cached_household(household_id):
+    """Moneda y miembros aceptados (id -> rol) del hogar desde el caché compartido; None si no tiene"""
+    key = _cache_key(household_id)
+    household = cache.get(key)
+    if household is None:
+        rows = list(HouseholdMembership.objects.filter(household_id=household_id, accepted_at__isnull=False).values_list(
+            'user_id', 'role', 'household__currency'
+        ))
+        household = {
+            'currency': rows[0][2] if rows else None,
+            'members': {user_id: role for user_id, role, currency in rows},
+        }
+        cache.set(key, household, timeout=None)
+    return household if household['members'] else None
+
+
+def invalidate(household_id):
+    cache.delete(_cache_key(household_id))
+
+
+def _membership(request):
+    """Hogar pedido (del caché) si quien pide es miembro; NotFound si no lo es"""
+    household = household_id(request)
+
+    def compute():
+        cached = cached_household(household)
+        if cached is None or request.user.pk not in cached['members']:
+            raise NotFound('Hogar no encontrado.')
+        return cached
+
+    return memoize(request, ('household', household, request.user.pk), compute)
+
+
+def user_ids(request):
+    """Ids ordenados de los usuarios cuyos datos abarca la petición: el usuario o los miembros del hogar"""
+    if household_id(request) is None:
+        return [request.user.pk]
+    return sorted(_membership(request)['members'])
+
+
+def currency(request):
+    """Moneda en la que se informan los totales de la petición"""
+    if household_id(request) is None:
+        return get_base_currency(request.user)
+    return _membership(request)['currency']
@@ -0,0 +1,119 @@
+from django.contrib.auth.models import User
+from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
+from currencies.rates import get_base_currency
+from .models import Household, HouseholdMembership
+
+
+@extend_schema_serializer(
+    examples=[
+        OpenApiExample(
+            'Hogar de ejemplo',
+            value={
+                'id': 1,
+                'name': 'Casa',
+                'currency': 'USD',
+                'role': 'owner',
+                'created_at': '2024-01-01T00:00:00Z'
+            }
+        )
+    ]
+)
+class HouseholdSerializer(serializers.ModelSerializer):
+    """
+    Serializer para el modelo Household.
+
+    La moneda es la moneda base de quien crea el hogar y `role` el rol del
+    usuario autenticado en él.
+    """
+    role = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Household
+        fields = ['id', 'name', 'currency', 'role', 'created_at']
+        read_only_fields = ['id', 'currency', 'created_at']
+
+
+@extend_schema_serializer(
+    examples=[
+        OpenApiExample(
+            'Miembro de ejemplo',
+            value={
+                'id': 1,
+                'household': 1,
+                'user': 2,
+                'username': 'pareja',
+                'role': 'editor',
+                'accepted_at': None,
+                'created_at': '2024-01-01T00:00:00Z'
+            }
+        )
+    ]
+)
+class HouseholdMembershipSerializer(serializers.ModelSerializer):
+    """
+    Serializer para el modelo HouseholdMembership.
+
+    Un miembro se agrega por su nombre de usuario y queda invitado hasta que
+    acepta; después solo se cambia su rol. Subir el rol vuelve a dejar la
+    invitación pendiente, porque el miembro no aceptó el nuevo.
+    """
+    username = serializers.SlugRelatedField(
+        source='user', slug_field='username', queryset=User.objects.all(),
+        help_text='Nombre del usuario a agregar'
+    )
+
+    class Meta:
+        model = HouseholdMembership
+        fields = ['id', 'household', 'user', 'username', 'role', 'accepted_at', 'created_at']
+        read_only_fields = ['id', 'user', 'accepted_at', 'created_at']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            # El hogar y el usuario de una membresía no cambian
+            fields['household'].read_only = True
+            fields['username'].read_only = True
+        return fields
+
+    def validate_household(self, value):
+        user = self.context['request'].user
+        if not value.memberships.filter(user=user, role='owner', accepted_at__isnull=False).exists():
+            raise serializers.ValidationError('Solo los administradores del hogar pueden agregar miembros.')
+        return value
+
+    def validate_role(self, value):
+        if self.instance is not None and self.instance.role == 'owner' and value != 'owner' \
+                and not has_other_owner(self.instance):
+            raise serializers.ValidationError('El hogar debe conservar al menos un administrador.')
+        return value
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            return attrs
+        household, user = attrs['household'], attrs['user']
+        check_currency(user, household)
+        return attrs
+
+    def update(self, instance, validated_data):
+        role = validated_data.get('role', instance.role)
+        if ROLE_RANK[role] > ROLE_RANK[instance.role]:
+            validated_data['accepted_at'] = None
+        return super().update(instance, validated_data)
+
+
+# Orden de los roles: subir de rango requiere que el miembro vuelva a aceptar
+ROLE_RANK = {'viewer': 0, 'editor': 1, 'owner': 2}
+
+
+def check_currency(user, household):
+    # Los totales del hogar suman importes en la moneda base de cada miembro
+    if get_base_currency(user) != household.currency:
+        raise serializers.ValidationError(
+            {'username': f'La moneda base del usuario debe ser la del hogar ({household.currency}).'})
+
+
+def has_other_owner(membership):
+    return HouseholdMembership.objects.filter(
+        household_id=membership.household_id, role='owner', accepted_at__isnull=False
+    ).exclude(pk=membership.pk).exists()
@@ -0,0 +1,22 @@
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import scope
+from .models import Household, HouseholdMembership
+
+
+def _invalidate_on_commit(household_id):
+    # Al confirmar: antes otra petición podría volver a guardar los valores anteriores en el caché
+    db_transaction.on_commit(lambda: scope.invalidate(household_id))
+
+
+@receiver(post_save, sender=Household)
+@receiver(post_delete, sender=Household)
+def household_changed(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=HouseholdMembership)
+@receiver(post_delete, sender=HouseholdMembership)
+def membership_changed(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.household_id)
@@ -0,0 +1,132 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+from transactions.models import Transaction
+
+BUDGETS = {
+    'crud': {'capacity': 10 ** 6, 'refill_rate': 10 ** 3},
+    'analytics': {'capacity': 10 ** 6, 'refill_rate': 10 ** 3},
+}
+
+
+@override_settings(THROTTLE_BUDGETS=BUDGETS)
+class HouseholdAccessTests(APITestCase):
+    """Acceso a los datos de los demás miembros según la invitación y el rol aceptados"""
+
+    def setUp(self):
+        cache.clear()
+        self.clients = {}
+        for username in ('owner', 'member', 'outsider'):
+            user = User.objects.create_user(username, password='x')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+            self.clients[username] = client
+            self.call(username, 'post', '/api/transactions/', {
+                'transaction_type': 'expense', 'amount': '10.00', 'date': '2024-01-15', 'description': username
+            })
+        self.household = self.call('owner', 'post', '/api/households/', {'name': 'Casa'}).data['id']
+        self.query = f'?household={self.household}'
+        self.member_tx = Transaction.objects.get(user__username='member').pk
+
+    def call(self, username, method, url, data=None):
+        # Las invalidaciones de caché corren al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.clients[username], method)(url, data, format='json')
+
+    def invite(self, role):
+        response = self.call('owner', 'post', '/api/household-memberships/', {
+            'household': self.household, 'username': 'member', 'role': role
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIsNone(response.data['accepted_at'])
+        return response.data['id']
+
+    def accept(self, membership):
+        response = self.call('member', 'post', f'/api/household-memberships/{membership}/accept/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIsNotNone(response.data['accepted_at'])
+
+    def descriptions(self, username):
+        response = self.call(username, 'get', '/api/transactions/' + self.query)
+        if response.status_code != 200:
+            return response.status_code
+        return sorted(row['description'] for row in response.json())
+
+    def patch_member_tx(self, username):
+        return self.call(username, 'patch', f'/api/transactions/{self.member_tx}/' + self.query,
+                         {'description': 'cambiada'}).status_code
+
+    def test_non_member_sees_nothing(self):
+        self.accept(self.invite('editor'))
+        self.assertEqual(self.descriptions('outsider'), [])
+        self.assertEqual(self.call('outsider', 'get', '/api/transactions/statistics/' + self.query).status_code, 404)
+        self.assertEqual(self.patch_member_tx('outsider'), 404)
+
+    def test_outsider_cannot_invite(self):
+        response = self.call('outsider', 'post', '/api/household-memberships/', {
+            'household': self.household, 'username': 'outsider', 'role': 'owner'
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_pending_invitation_grants_nothing(self):
+        membership = self.invite('editor')
+        self.assertEqual(self.descriptions('owner'), ['owner'])
+        self.assertEqual(self.descriptions('member'), [])
+        statistics = self.call('owner', 'get', '/api/transactions/statistics/' + self.query).json()
+        self.assertEqual(statistics['summary']['total_transactions'], 1)
+        self.assertEqual(self.patch_member_tx('owner'), 404)
+        # El invitado ve su invitación, pero no el hogar ni los demás miembros
+        listed = self.call('member', 'get', '/api/household-memberships/').json()
+        self.assertEqual([row['id'] for row in listed], [membership])
+        self.assertEqual(self.call('member', 'get', '/api/households/').json(), [])
+
+    def test_only_invitee_accepts(self):
+        membership = self.invite('viewer')
+        response = self.call('owner', 'post', f'/api/household-memberships/{membership}/accept/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.descriptions('owner'), ['owner'])
+
+    def test_declined_invitation(self):
+        membership = self.invite('viewer')
+        self.assertEqual(self.call('member', 'delete', f'/api/household-memberships/{membership}/').status_code, 204)
+        self.assertEqual(self.descriptions('owner'), ['owner'])
+
+    def test_viewer_reads_but_nobody_writes_their_data(self):
+        self.accept(self.invite('viewer'))
+        self.assertEqual(self.descriptions('owner'), ['member', 'owner'])
+        self.assertEqual(self.descriptions('member'), ['member', 'owner'])
+        # El administrador no escribe los datos de quien solo aceptó ver
+        self.assertEqual(self.patch_member_tx('owner'), 404)
+        owner_tx = Transaction.objects.get(user__username='owner').pk
+        response = self.call('member', 'patch', f'/api/transactions/{owner_tx}/' + self.query, {'description': 'no'})
+        self.assertEqual(response.status_code, 404)
+        # Sus propios datos los sigue escribiendo
+        self.assertEqual(self.patch_member_tx('member'), 200)
+
+    def test_editor_writes_after_accepting(self):
+        self.accept(self.invite('editor'))
+        self.assertEqual(self.patch_member_tx('owner'), 200)
+        owner_tx = Transaction.objects.get(user__username='owner').pk
+        response = self.call('member', 'patch', f'/api/transactions/{owner_tx}/' + self.query, {'description': 'ok'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_upgrade_needs_new_acceptance(self):
+        membership = self.invite('viewer')
+        self.accept(membership)
+        response = self.call('owner', 'patch', f'/api/household-memberships/{membership}/', {'role': 'editor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['accepted_at'])
+        self.assertEqual(self.descriptions('owner'), ['owner'])
+        self.assertEqual(self.patch_member_tx('owner'), 404)
+        self.accept(membership)
+        self.assertEqual(self.patch_member_tx('owner'), 200)
+
+    def test_role_downgrade_applies_immediately(self):
+        membership = self.invite('editor')
+        self.accept(membership)
+        response = self.call('owner', 'patch', f'/api/household-memberships/{membership}/', {'role': 'viewer'})
+        self.assertIsNotNone(response.data['accepted_at'])
+        self.assertEqual(self.patch_member_tx('owner'), 404)
+        self.assertEqual(self.descriptions('owner'), ['member', 'owner'])
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import HouseholdViewSet, HouseholdMembershipViewSet
+
+router = DefaultRouter()
+router.register(r'households', HouseholdViewSet)
+router.register(r'household-memberships', HouseholdMembershipViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
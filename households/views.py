@@ -0,0 +1,189 @@
+from django.db import transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from drf_spectacular.utils import OpenApiParameter, OpenApiExample
+from drf_spectacular.types import OpenApiTypes
+from currencies.rates import get_base_currency
+from financetracker.schema import extend_schema, extend_schema_view
+from .models import Household, HouseholdMembership
+from .serializers import HouseholdSerializer, HouseholdMembershipSerializer, check_currency, has_other_owner
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar hogares",
+        description="Obtiene los hogares de los que el usuario autenticado es miembro (con la invitación "
+                    "aceptada), con su rol en cada uno",
+        tags=['households']
+    ),
+    create=extend_schema(
+        summary="Crear hogar",
+        description="Crea un hogar con un libro compartido; el usuario autenticado queda como administrador "
+                    "(owner) y la moneda del hogar es su moneda base",
+        examples=[
+            OpenApiExample(
+                'Hogar',
+                value={'name': 'Casa'}
+            ),
+        ],
+        tags=['households']
+    ),
+    retrieve=extend_schema(
+        summary="Obtener hogar",
+        description="Obtiene los detalles de un hogar del usuario",
+        tags=['households']
+    ),
+    update=extend_schema(
+        summary="Actualizar hogar",
+        description="Actualiza completamente un hogar (solo administradores)",
+        tags=['households']
+    ),
+    partial_update=extend_schema(
+        summary="Actualizar parcialmente hogar",
+        description="Actualiza parcialmente un hogar (solo administradores)",
+        tags=['households']
+    ),
+    destroy=extend_schema(
+        summary="Eliminar hogar",
+        description="Elimina un hogar y sus membresías (solo administradores); los datos de los miembros no "
+                    "se modifican",
+        tags=['households']
+    ),
+)
+class HouseholdViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar hogares con libros compartidos.
+
+    El acceso se resuelve con un join con las membresías aceptadas del
+    usuario: un hogar del que no es miembro (o, para modificarlo, del que no
+    es administrador) no existe para él.
+    """
+    queryset = Household.objects.all()
+    serializer_class = HouseholdSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        memberships = {'memberships__user': self.request.user, 'memberships__accepted_at__isnull': False}
+        if self.request.method not in permissions.SAFE_METHODS:
+            memberships['memberships__role'] = 'owner'
+        return Household.objects.filter(**memberships).annotate(role=F('memberships__role')).order_by('name')
+
+    def perform_create(self, serializer):
+        with db_transaction.atomic():
+            household = serializer.save(currency=get_base_currency(self.request.user))
+            HouseholdMembership.objects.create(
+                household=household, user=self.request.user, role='owner', accepted_at=timezone.now()
+            )
+        household.role = 'owner'
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar miembros de hogares",
+        description="Obtiene los miembros de los hogares del usuario autenticado y sus propias invitaciones "
+                    "pendientes (con `accepted_at` vacío)",
+        parameters=[
+            OpenApiParameter(
+                name='household',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Filtrar por ID de hogar'
+            ),
+        ],
+        tags=['households']
+    ),
+    create=extend_schema(
+        summary="Agregar miembro",
+        description="Invita a un usuario a un hogar con un rol: owner (administra el hogar), editor (edita "
+                    "los datos de los miembros owner y editor) o viewer (solo los consulta). La invitación no da "
+                    "acceso ni expone los datos del usuario hasta que él la acepta. Solo los "
+                    "administradores invitan, y la moneda base del usuario debe ser la del hogar",
+        examples=[
+            OpenApiExample(
+                'Miembro editor',
+                value={'household': 1, 'username': 'pareja', 'role': 'editor'}
+            ),
+        ],
+        tags=['households']
+    ),
+    retrieve=extend_schema(
+        summary="Obtener miembro",
+        description="Obtiene una membresía de un hogar del usuario",
+        tags=['households']
+    ),
+    update=extend_schema(
+        summary="Cambiar rol",
+        description="Cambia el rol de un miembro (solo administradores); subirlo deja la invitación "
+                    "pendiente hasta que el miembro acepta el nuevo rol",
+        tags=['households']
+    ),
+    partial_update=extend_schema(
+        summary="Cambiar rol parcialmente",
+        description="Cambia el rol de un miembro (solo administradores); subirlo deja la invitación "
+                    "pendiente hasta que el miembro acepta el nuevo rol",
+        tags=['households']
+    ),
+    destroy=extend_schema(
+        summary="Quitar miembro",
+        description="Quita un miembro del hogar. Los administradores quitan a cualquiera y cada miembro puede "
+                    "quitarse a sí mismo (o rechazar una invitación); el hogar debe conservar al menos un "
+                    "administrador",
+        tags=['households']
+    ),
+)
+class HouseholdMembershipViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar los miembros de los hogares.
+
+    Como en los hogares, el acceso es un filtro del queryset: las membresías
+    de los hogares en los que el usuario aceptó, y para modificarlas las de
+    los hogares que administra. Las propias se ven siempre (las invitaciones
+    pendientes) y se aceptan o se borran para dejar el hogar.
+    """
+    queryset = HouseholdMembership.objects.all()
+    serializer_class = HouseholdMembershipSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        households = HouseholdMembership.objects.filter(user=user, accepted_at__isnull=False)
+        if self.request.method not in permissions.SAFE_METHODS:
+            households = households.filter(role='owner')
+        visible = Q(household_id__in=households.values('household_id'))
+        if self.action == 'accept':
+            visible = Q(user=user)
+        elif self.action == 'destroy' or self.request.method in permissions.SAFE_METHODS:
+            visible |= Q(user=user)
+        queryset = HouseholdMembership.objects.filter(visible).select_related('user')
+
+        household = self.request.query_params.get('household')
+        if household:
+            queryset = queryset.filter(household_id=household)
+        return queryset
+
+    def perform_destroy(self, instance):
+        if instance.role == 'owner' and not has_other_owner(instance):
+            raise ValidationError({'role': 'El hogar debe conservar al menos un administrador.'})
+        instance.delete()
+
+    @extend_schema(
+        summary="Aceptar invitación",
+        description="Acepta una invitación propia a un hogar con el rol indicado en ella: desde entonces el "
+                    "usuario ve los datos del hogar y los miembros los suyos según su rol. La moneda base "
+                    "del usuario debe ser la del hogar",
+        request=None,
+        responses={200: HouseholdMembershipSerializer},
+        tags=['households']
+    )
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        membership = self.get_object()
+        check_currency(request.user, membership.household)
+        if membership.accepted_at is None:
+            membership.accepted_at = timezone.now()
+            membership.save(update_fields=['accepted_at'])
+        return Response(self.get_serializer(membership).data)
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:09
+
+import currencies.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='currency',
+            field=models.CharField(default=currencies.models.default_currency, help_text='Moneda de los importes del reporte', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}$', 'Código de moneda inválido. Use el código ISO 4217 de tres letras (ej: USD, EUR).')]),
+        ),
+    ]
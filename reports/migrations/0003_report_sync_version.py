@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_report_currency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='sync_version',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Versión de sincronización del último cambio'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['user', 'sync_version'], name='report_sync_idx'),
+        ),
+    ]
@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from currencies.models import default_currency, validate_currency_code
+from sync.models import SyncTrackedModel
 
 # Create your models here.
 
-class Report(models.Model):
+class Report(SyncTrackedModel):
     REPORT_TYPE_CHOICES = (
         ('monthly_summary', 'Monthly Summary'),
         ('spending_by_category', 'Spending by Category'),
@@ -14,8 +16,14 @@ class Report(models.Model):
     report_type = models.CharField(max_length=50, choices=REPORT_TYPE_CHOICES)
     start_date = models.DateField()
     end_date = models.DateField()
+    currency = models.CharField(max_length=3, default=default_currency, validators=[validate_currency_code], help_text='Moneda de los importes del reporte')
     generated_at = models.DateTimeField(auto_now_add=True)
     data = models.JSONField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'sync_version'], name='report_sync_idx'),
+        ]
+
     def __str__(self):
         return self.name
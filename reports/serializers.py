@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
+from currencies.serializers import CurrencyField
 from .models import Report
 
 @extend_schema_serializer(
@@ -13,6 +14,7 @@ from .models import Report
                 'report_type': 'monthly_summary',
                 'start_date': '2024-01-01',
                 'end_date': '2024-01-31',
+                'currency': 'USD',
                 'generated_at': '2024-01-31T23:59:59Z',
                 'data': {
                     'total_income': 2500.00,
@@ -34,6 +36,7 @@ from .models import Report
                 'report_type': 'spending_by_category',
                 'start_date': '2024-01-01',
                 'end_date': '2024-03-31',
+                'currency': 'USD',
                 'generated_at': '2024-04-01T00:00:00Z',
                 'data': {
                     'categories': [
@@ -53,7 +56,9 @@ class ReportSerializer(serializers.ModelSerializer):
     
     Permite serializar y deserializar reportes financieros con datos JSON.
     """
+    currency = CurrencyField()
+
     class Meta:
         model = Report
-        fields = ['id', 'user', 'name', 'report_type', 'start_date', 'end_date', 'generated_at', 'data']
+        fields = ['id', 'user', 'name', 'report_type', 'start_date', 'end_date', 'currency', 'generated_at', 'data']
         read_only_fields = ['id', 'user', 'generated_at'] 
\ No newline at end of file
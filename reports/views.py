@@ -1,13 +1,15 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions
-from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
+from drf_spectacular.utils import OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
+from financetracker.schema import extend_schema, extend_schema_view
 from .models import Report
 from .serializers import ReportSerializer
-from transactions.views import IsOwner
+from households import scope
 
 # Create your views here.
 
+@extend_schema(parameters=[scope.PARAMETER])
 @extend_schema_view(
     list=extend_schema(
         summary="Listar reportes",
@@ -95,10 +97,10 @@ class ReportViewSet(viewsets.ModelViewSet):
     """
     queryset = Report.objects.all()
     serializer_class = ReportSerializer
-    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = self.request.user.reports.all()
+        queryset = scope.visible(self.request, Report.objects.all())
         
         # Filtros opcionales
         report_type = self.request.query_params.get('report_type', None)
@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import SyncCounter, Tombstone
+
+# Register your models here.
+admin.site.register(SyncCounter)
+admin.site.register(Tombstone)
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.db.models import Max
+from django.utils import timezone
+from sync.models import SyncCounter, Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Elimina las lápidas de sincronización más antiguas que el período de retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help=f'Días de retención (por defecto: {settings.SYNC_TOMBSTONE_RETENTION_DAYS})'
+        )
+
+    def handle(self, *args, **options):
+        expired = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=options['days']))
+        with db_transaction.atomic():
+            # Los tokens anteriores a la última lápida compactada de cada usuario requieren una sincronización completa
+            for user_id, version in expired.values('user_id').annotate(version=Max('sync_version')).values_list(
+                'user_id', 'version'
+            ):
+                SyncCounter.objects.filter(user_id=user_id, compacted_version__lt=version).update(
+                    compacted_version=version
+                )
+            deleted, _ = expired.delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} lápidas eliminadas'))
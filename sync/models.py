@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.db import models, transaction as db_transaction
+from django.utils import timezone
+
+
+class SyncTrackedModel(models.Model):
+    """
+    Modelo cuyos cambios se sincronizan con los clientes.
+
+    Cada escritura asigna a la fila la siguiente versión del contador de su
+    usuario (`sync_version`) en la misma transacción de base de datos. Las
+    escrituras masivas (UPDATE, bulk_create) asignan la versión con `sync.versions`.
+    """
+    sync_version = models.BigIntegerField(default=0, editable=False, help_text='Versión de sincronización del último cambio')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from .versions import bump_versions
+
+        with db_transaction.atomic(using=kwargs.get('using')):
+            self.sync_version = bump_versions([self.user_id])[self.user_id]
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'sync_version'}
+            super().save(*args, **kwargs)
+
+
+class SyncCounter(models.Model):
+    """Última versión de sincronización asignada a los cambios de un usuario"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='sync_counter')
+    version = models.BigIntegerField(default=0)
+    compacted_version = models.BigIntegerField(default=0, help_text='Versión de la última lápida compactada: los tokens anteriores requieren una sincronización completa')
+
+    def __str__(self):
+        return f'{self.user.username} - {self.version}'
+
+
+class Tombstone(models.Model):
+    """Lápida de un objeto eliminado, para que los clientes sincronizados también lo eliminen"""
+    KIND_CHOICES = (
+        ('transaction', 'Transaction'),
+        ('category', 'Category'),
+        ('budget', 'Budget'),
+        ('report', 'Report'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    sync_version = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'sync_version'], name='tombstone_user_version_idx'),
+            # Compactación de las lápidas vencidas
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} - {self.sync_version}'
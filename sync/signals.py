@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from budgets.models import Budget
+from reports.models import Report
+from transactions.models import Account, Category, RecurringTransaction, Transaction
+from .models import Tombstone
+from .versions import bump_versions, stamp
+
+
+def _deleting_user(origin):
+    # Al eliminar el usuario se eliminan también su contador y sus lápidas
+    return isinstance(origin, User) or getattr(origin, 'model', None) is User
+
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=Report)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """Registra la eliminación (también las en cascada) para los clientes sincronizados"""
+    if _deleting_user(origin):
+        return
+    Tombstone.objects.create(
+        user_id=instance.user_id,
+        kind=sender._meta.model_name,
+        object_id=instance.pk,
+        sync_version=bump_versions([instance.user_id])[instance.user_id],
+    )
+
+
+@receiver(pre_delete, sender=Category)
+def stamp_category_dependents(sender, instance, origin=None, **kwargs):
+    """Las transacciones y subcategorías quedan sin la categoría con un UPDATE masivo (SET_NULL)"""
+    if _deleting_user(origin):
+        return
+    stamp(Transaction.objects.filter(Q(category=instance) | Q(splits__category=instance)), [instance.user_id])
+    stamp(Category.objects.filter(parent=instance), [instance.user_id])
+
+
+@receiver(pre_delete, sender=Account)
+def stamp_account_transactions(sender, instance, origin=None, **kwargs):
+    if _deleting_user(origin):
+        return
+    stamp(Transaction.objects.filter(account=instance), [instance.user_id])
+
+
+@receiver(pre_delete, sender=RecurringTransaction)
+def stamp_recurring_occurrences(sender, instance, origin=None, **kwargs):
+    if _deleting_user(origin):
+        return
+    stamp(Transaction.objects.filter(recurring=instance), [instance.user_id])
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+from .models import Tombstone
+
+BUDGETS = {
+    'crud': {'capacity': 10 ** 6, 'refill_rate': 10 ** 3},
+    'analytics': {'capacity': 10 ** 6, 'refill_rate': 10 ** 3},
+}
+
+
+@override_settings(THROTTLE_BUDGETS=BUDGETS)
+class SyncTests(APITestCase):
+    """Deltas y eliminaciones de la sincronización incremental"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana', password='x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        self.category = self.call('post', '/api/categories/', {'name': 'Comida'}).data['id']
+        self.transactions = [self.create(index) for index in range(3)]
+
+    def call(self, method, url, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300, getattr(response, 'data', response.content))
+        return response
+
+    def create(self, index):
+        return self.call('post', '/api/transactions/', {
+            'transaction_type': 'expense', 'amount': f'{index + 1}.00', 'date': '2024-01-15',
+            'description': f'compra {index}', 'category': self.category,
+        }).data['id']
+
+    def sync(self, token=None, **params):
+        if token:
+            params['token'] = token
+        return self.call('get', '/api/sync/', params).json()
+
+    def ids(self, page, key='transactions'):
+        return sorted(row['id'] for row in page['changed'][key])
+
+    def test_full_sync_then_deltas(self):
+        full = self.sync()
+        self.assertTrue(full['reset'])
+        self.assertEqual(self.ids(full), sorted(self.transactions))
+        self.assertEqual(self.ids(full, 'categories'), [self.category])
+
+        # Sin cambios, el delta está vacío y el token no avanza
+        empty = self.sync(full['token'])
+        self.assertFalse(empty['reset'])
+        self.assertEqual(self.ids(empty), [])
+        self.assertEqual(empty['token'], full['token'])
+
+        changed, deleted = self.transactions[0], self.transactions[1]
+        self.call('patch', f'/api/transactions/{changed}/', {'description': 'cambiada'})
+        self.call('delete', f'/api/transactions/{deleted}/')
+        created = self.create(9)
+        delta = self.sync(full['token'])
+        self.assertEqual(self.ids(delta), sorted([changed, created]))
+        self.assertEqual(delta['deleted']['transactions'], [deleted])
+        self.assertEqual(self.ids(delta, 'categories'), [])
+        self.assertEqual(self.sync(delta['token'])['changed']['transactions'], [])
+
+    def test_bulk_delete_records_tombstones(self):
+        token = self.sync()['token']
+        self.call('post', '/api/transactions/bulk-delete/', {'ids': self.transactions[:2]})
+        self.call('post', '/api/transactions/bulk-update/', {
+            'ids': self.transactions[2:], 'changes': {'description': 'masiva'},
+        })
+        delta = self.sync(token)
+        self.assertEqual(sorted(delta['deleted']['transactions']), sorted(self.transactions[:2]))
+        self.assertEqual(self.ids(delta), self.transactions[2:])
+
+    def test_pages_never_split_a_bulk_write(self):
+        token = self.sync()['token']
+        self.call('post', '/api/transactions/bulk-update/', {
+            'ids': self.transactions, 'changes': {'description': 'masiva'},
+        })
+        created = self.create(9)
+        first = self.sync(token, limit=1)
+        # Las filas de la escritura masiva comparten versión y salen juntas
+        self.assertTrue(first['has_more'])
+        self.assertEqual(self.ids(first), sorted(self.transactions))
+        second = self.sync(first['token'], limit=1)
+        self.assertFalse(second['has_more'])
+        self.assertEqual(self.ids(second), [created])
+
+    def test_compacted_tombstones_force_reset(self):
+        token = self.sync()['token']
+        self.call('delete', f'/api/transactions/{self.transactions[0]}/')
+        call_command('compact_tombstones', days=-1, stdout=StringIO())
+        self.assertFalse(Tombstone.objects.exists())
+        page = self.sync(token)
+        self.assertTrue(page['reset'])
+        self.assertEqual(self.ids(page), sorted(self.transactions[1:]))
+        self.assertFalse(self.sync(page['token'])['reset'])
@@ -0,0 +1,54 @@
+"""
+Versiones de sincronización por usuario.
+
+Cada usuario tiene un contador (`SyncCounter`) que se incrementa con un UPDATE
+en la misma transacción de base de datos que el cambio. El UPDATE bloquea el
+contador hasta que la transacción termina, así las escrituras de un usuario
+confirman sus versiones en orden y un token emitido con la versión confirmada
+nunca deja atrás un cambio con una versión menor todavía sin confirmar.
+"""
+from django.db import transaction as db_transaction
+from django.db.models import F, OuterRef, Subquery
+from .models import SyncCounter, Tombstone
+
+
+def bump_versions(user_ids):
+    """
+    Incrementa el contador de cada usuario y devuelve `{user_id: versión nueva}`.
+
+    Debe llamarse dentro de la transacción de base de datos del cambio.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    counters = SyncCounter.objects.filter(user_id__in=user_ids)
+    if counters.update(version=F('version') + 1) < len(user_ids):
+        # Contadores nuevos; volver a incrementar todos solo deja un hueco en las versiones
+        SyncCounter.objects.bulk_create([SyncCounter(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+        counters.update(version=F('version') + 1)
+    return dict(counters.values_list('user_id', 'version'))
+
+
+def current_version():
+    """Expresión con la versión actual del contador del usuario de cada fila, para UPDATE masivos"""
+    return Subquery(SyncCounter.objects.filter(user_id=OuterRef('user_id')).values('version')[:1])
+
+
+def stamp(queryset, user_ids):
+    """Marca como cambiadas las filas del queryset (de los usuarios `user_ids`) con una versión nueva"""
+    with db_transaction.atomic():
+        bump_versions(user_ids)
+        return queryset.update(sync_version=current_version())
+
+
+def record_tombstones(model, user_id, object_ids):
+    """Registra con una sola versión nueva las lápidas de objetos eliminados en bloque (sin señales por instancia)"""
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    version = bump_versions([user_id])[user_id]
+    Tombstone.objects.bulk_create(
+        [Tombstone(user_id=user_id, kind=model._meta.model_name, object_id=object_id, sync_version=version)
+         for object_id in object_ids],
+        batch_size=1000,
+    )
@@ -0,0 +1,132 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from financetracker.schema import extend_schema
+from budgets.models import Budget
+from budgets.serializers import BudgetSerializer
+from reports.models import Report
+from reports.serializers import ReportSerializer
+from transactions.models import Category, Transaction
+from transactions.serializers import CategorySerializer, TransactionSerializer
+from .models import SyncCounter, Tombstone
+
+# Clave en la respuesta, modelo, tipo de lápida y serializer de cada colección sincronizada
+SYNCED = (
+    ('transactions', Transaction, 'transaction', TransactionSerializer),
+    ('categories', Category, 'category', CategorySerializer),
+    ('budgets', Budget, 'budget', BudgetSerializer),
+    ('reports', Report, 'report', ReportSerializer),
+)
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 5000
+
+
+class SyncView(APIView):
+    """
+    Vista de sincronización incremental para clientes offline.
+
+    Devuelve los objetos creados o modificados y los ids de los eliminados
+    desde un token emitido por el servidor (la versión de sincronización del
+    usuario), leyendo solo las filas con versión posterior por el índice
+    (user, sync_version) de cada tabla.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="Sincronización incremental",
+        description="Devuelve las transacciones, categorías, presupuestos y reportes creados o modificados, y los "
+                    "ids de los eliminados, desde el token de una sincronización anterior. Sin token (o con uno "
+                    "anterior a la retención de las eliminaciones, `reset: true`) devuelve todos los objetos y el "
+                    "cliente debe reemplazar su copia local. Si `has_more` es true, repetir con el token devuelto",
+        parameters=[
+            OpenApiParameter(
+                name='token',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Token devuelto por la sincronización anterior (vacío = sincronización completa)'
+            ),
+            OpenApiParameter(
+                name='limit',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f'Cantidad aproximada de cambios por página, hasta {MAX_LIMIT} (por defecto: {DEFAULT_LIMIT})'
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['sync']
+    )
+    def get(self, request):
+        current, compacted = SyncCounter.objects.filter(user=request.user).values_list(
+            'version', 'compacted_version'
+        ).first() or (0, 0)
+
+        # El token es "versión.horizonte": la versión sincronizada y la última lápida
+        # compactada cuando se emitió. Si desde entonces se compactaron lápidas
+        # posteriores a esa versión, el cliente pudo perder eliminaciones.
+        token = request.query_params.get('token')
+        try:
+            since, horizon = map(int, token.split('.')) if token else (-1, compacted)
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            since, horizon, limit = -2, 0, 0
+        if not -1 <= since <= current or horizon > compacted:
+            return Response({'error': 'Token de sincronización inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= MAX_LIMIT:
+            return Response({'error': f'limit debe estar entre 1 y {MAX_LIMIT}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        reset = since == -1 or compacted > max(since, horizon)
+        if reset:
+            since = -1
+        until, has_more = self._page_end(request.user, since, current, limit, reset)
+
+        changed = {}
+        deleted = {key: [] for key, _, _, _ in SYNCED}
+        for key, model, _, serializer_class in SYNCED:
+            queryset = model.objects.filter(
+                user=request.user, sync_version__gt=since, sync_version__lte=until
+            ).order_by('sync_version')
+            if model is Transaction:
+                queryset = queryset.prefetch_related('splits')
+            changed[key] = serializer_class(queryset, many=True, context={'request': request}).data
+        if not reset:
+            keys = {kind: key for key, _, kind, _ in SYNCED}
+            for kind, object_id in Tombstone.objects.filter(
+                user=request.user, sync_version__gt=since, sync_version__lte=until
+            ).order_by('sync_version').values_list('kind', 'object_id'):
+                deleted[keys[kind]].append(object_id)
+
+        return Response({
+            'token': f'{until}.{compacted}',
+            'reset': reset,
+            'has_more': has_more,
+            'changed': changed,
+            'deleted': deleted,
+        })
+
+    def _page_end(self, user, since, current, limit, reset):
+        """
+        Versión hasta la que llega la página y si quedan cambios posteriores.
+
+        Lee como mucho `limit` versiones de cada tabla por su índice; una página
+        nunca corta entre filas con la misma versión (una escritura masiva).
+        """
+        querysets = [model.objects.filter(user=user) for _, model, _, _ in SYNCED]
+        if not reset:
+            querysets.append(Tombstone.objects.filter(user=user))
+
+        versions = []
+        truncated = False
+        for queryset in querysets:
+            page = list(queryset.filter(sync_version__gt=since, sync_version__lte=current).order_by(
+                'sync_version'
+            ).values_list('sync_version', flat=True)[:limit])
+            truncated = truncated or len(page) == limit
+            versions.extend(page)
+
+        if not truncated and len(versions) <= limit:
+            return current, False
+        versions.sort()
+        until = versions[limit - 1]
+        return until, until < current
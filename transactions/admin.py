@@ -1,6 +1,17 @@
 from django.contrib import admin
-from .models import Category, Transaction
+from .models import (
+    Account, AccountCheckpoint, ArchivedTransaction, Category, Transaction, TransactionArchive, TransactionRollup,
+    TransactionSplit, RecurringTransaction, CategorizationRule
+)
 
 # Register your models here.
 admin.site.register(Category)
 admin.site.register(Transaction)
+admin.site.register(TransactionSplit)
+admin.site.register(RecurringTransaction)
+admin.site.register(CategorizationRule)
+admin.site.register(Account)
+admin.site.register(AccountCheckpoint)
+admin.site.register(ArchivedTransaction)
+admin.site.register(TransactionRollup)
+admin.site.register(TransactionArchive)
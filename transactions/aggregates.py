@@ -0,0 +1,82 @@
+from django.db.models import Sum, Q
+from financetracker.memo import memoize
+from households import scope
+from . import archive
+from .ledger_cache import ledger_cache, from_cents
+from .models import ArchivedTransaction, Transaction
+
+
+def archive_horizon(request, start_date=None):
+    """
+    Horizonte del archivo de los datos de la petición, o None si no hay archivo.
+
+    Con `start_date`, None también si el rango empieza después del horizonte.
+    """
+    user_ids = scope.user_ids(request)
+    until = memoize(request, ('archive_horizon', tuple(user_ids)), lambda: archive.horizon(user_ids))
+    if until is None or (start_date and archive.as_date(start_date) > until):
+        return None
+    return until
+
+
+def archived_transactions(request, start_date=None, end_date=None, transaction_type=None):
+    """Transacciones archivadas de los datos de la petición en un período"""
+    queryset = ArchivedTransaction.objects.filter(user_id__in=scope.user_ids(request))
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    if transaction_type:
+        queryset = queryset.filter(transaction_type=transaction_type)
+    return queryset
+
+
+def user_totals(request, start_date=None, end_date=None, transaction_type=None):
+    """
+    Obtiene los totales de ingresos y gastos del usuario (o de su hogar) en un período.
+
+    Ambos totales se calculan en una sola consulta (o desde el historial
+    columnar en memoria) y quedan memoizados en la petición, por lo que las
+    sub-peticiones de un batch los comparten. Si el período llega al archivo
+    se suman las transacciones archivadas.
+    """
+    user_ids = scope.user_ids(request)
+    key = ('user_totals', tuple(user_ids), str(start_date), str(end_date), transaction_type)
+
+    def compute():
+        totals = online_totals()
+        if archive_horizon(request, start_date) is not None:
+            archived = archive.archived_totals(archived_transactions(request, start_date, end_date, transaction_type))
+            totals = {
+                'total_income': totals['total_income'] + from_cents(archived['income']),
+                'total_expenses': totals['total_expenses'] + from_cents(archived['expense']),
+            }
+        return totals
+
+    def online_totals():
+        ledger = ledger_cache.get_combined(user_ids)
+        if ledger is not None:
+            totals = ledger.totals(start_date, end_date, transaction_type)
+            return {
+                'total_income': from_cents(totals['income']),
+                'total_expenses': from_cents(totals['expense']),
+            }
+
+        queryset = Transaction.objects.filter(user_id__in=user_ids)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        if transaction_type:
+            queryset = queryset.filter(transaction_type=transaction_type)
+
+        totals = queryset.aggregate(
+            total_income=Sum('base_amount', filter=Q(transaction_type='income')),
+            total_expenses=Sum('base_amount', filter=Q(transaction_type='expense')),
+        )
+        return {
+            'total_income': totals['total_income'] or 0,
+            'total_expenses': totals['total_expenses'] or 0,
+        }
+
+    return memoize(request, key, compute)
@@ -0,0 +1,318 @@
+"""
+Archivo de las transacciones de años cerrados.
+
+`archive_user` mueve las transacciones anteriores a una fecha de corte (el 1
+de enero de un año) a `ArchivedTransaction`, una tabla compacta indexada por
+(usuario, fecha) con las líneas de división embebidas, y deja en línea sus
+totales mensuales por categoría y tipo (`TransactionRollup`). La tabla de
+transacciones conserva solo los años abiertos, así las consultas habituales no
+crecen con el historial.
+
+Cada usuario guarda su horizonte de archivo (`TransactionArchive`). El
+listado de transacciones consulta el archivo solo cuando el rango de fechas
+pedido llega al horizonte, y los saldos de las cuentas suman las transacciones
+archivadas solo para fechas dentro de él. Los puntos de control de saldo no
+cambian al archivar: ya incluyen las transacciones archivadas.
+
+Las analíticas también suman el archivo cuando su rango llega al horizonte:
+los totales por tipo y por fecha salen de una consulta agregada sobre
+`ArchivedTransaction` (por el índice (usuario, fecha)), y los totales por
+categoría de los totales mensuales, más las filas archivadas de los meses que
+el rango cubre solo en parte. Todos se devuelven en centavos, con la misma
+forma que los del historial columnar.
+
+En Postgres y en SQLite se usa la misma tabla de archivo; la poda por año la
+hacen los índices (usuario, fecha) de ambas tablas.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, DateField, Max, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from sync.versions import bump_versions
+from .bulk import delete_rows
+from .models import (
+    ArchivedTransaction, Category, RecurringTransaction, Transaction, TransactionArchive,
+    TransactionRollup, TransactionSplit
+)
+from .ledger_cache import NO_CATEGORY, to_cents
+from .search import search_terms
+from .splits import allocate_cents, allocations
+from .timeseries import bucket_start, shift_bucket
+
+CENT = Decimal('0.01')
+
+
+def default_cutoff(today=None):
+    """Primer día del año más antiguo que se mantiene en línea (`TRANSACTION_ARCHIVE_KEEP_YEARS`)"""
+    today = today or timezone.localdate()
+    return date(today.year - settings.TRANSACTION_ARCHIVE_KEEP_YEARS + 1, 1, 1)
+
+
+def archived_until(user_id):
+    """Última fecha que puede tener transacciones archivadas del usuario, o None"""
+    return TransactionArchive.objects.filter(user_id=user_id).values_list('archived_until', flat=True).first()
+
+
+def reaches_archive(horizon, date_from=None, date_to=None):
+    """Si un rango de fechas pedido explícitamente llega hasta el archivo"""
+    if horizon is None:
+        return False
+    return (date_from is not None and date_from <= horizon) or (date_to is not None and date_to <= horizon)
+
+
+def horizon(user_ids):
+    """Última fecha que puede tener transacciones archivadas de alguno de los usuarios, o None"""
+    archives = TransactionArchive.objects.filter(user_id__in=user_ids)
+    return archives.aggregate(until=Max('archived_until'))['until']
+
+
+def as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _cents(value):
+    # SQLite suma los decimales como float: se redondea al centavo
+    return to_cents(Decimal(value or 0).quantize(CENT))
+
+
+def archived_totals(transactions):
+    """Ingresos, gastos (en centavos) y cantidad de un queryset de transacciones archivadas"""
+    totals = transactions.aggregate(
+        income=Sum('base_amount', filter=Q(transaction_type='income')),
+        expense=Sum('base_amount', filter=Q(transaction_type='expense')),
+        count=Count('id'),
+    )
+    return {'income': _cents(totals['income']), 'expense': _cents(totals['expense']), 'count': totals['count']}
+
+
+def archived_allocations(transactions, allocated_to=None):
+    """
+    Tuplas (fecha, categoría, tipo, centavos) de cada asignación de las transacciones archivadas.
+
+    Reparte las divididas entre sus líneas igual que el historial columnar.
+    """
+    wanted = None if allocated_to is None else int(allocated_to) or NO_CATEGORY
+    rows = transactions.values_list('date', 'category_id', 'transaction_type', 'base_amount', 'amount', 'splits')
+    for day, category_id, transaction_type, base_amount, amount, lines in rows.iterator():
+        cents = to_cents(base_amount)
+        if not lines:
+            entries = [(category_id or NO_CATEGORY, cents)]
+        else:
+            entries = [
+                (line['category'] or NO_CATEGORY, allocate_cents(cents, Decimal(line['amount']), amount))
+                for line in lines
+            ]
+        for category, share in entries:
+            if wanted is None or category == wanted:
+                yield day, category, transaction_type, share
+
+
+def _add(groups, category, transaction_type, cents, count, last_date):
+    group = groups.setdefault(category, {'income': 0, 'expense': 0, 'count': 0, 'last_date': None})
+    group['income' if transaction_type == 'income' else 'expense'] += cents
+    group['count'] += count
+    if group['last_date'] is None or last_date > group['last_date']:
+        group['last_date'] = last_date
+
+
+def group_allocations(transactions, allocated_to=None, groups=None):
+    """Acumulados en centavos por categoría de las asignaciones de un queryset de transacciones archivadas"""
+    groups = {} if groups is None else groups
+    for day, category, transaction_type, cents in archived_allocations(transactions, allocated_to):
+        _add(groups, category, transaction_type, cents, 1, day)
+    return groups
+
+
+def archived_groups(user_ids, until, start_date=None, end_date=None, transaction_type=None, allocated_to=None):
+    """
+    Ingresos, gastos (en centavos), cantidad y última fecha de las asignaciones archivadas por categoría.
+
+    `until` es el horizonte de los usuarios. Los meses que el rango cubre
+    completos salen de los totales mensuales; los de los extremos que cubre
+    en parte, de las filas archivadas.
+    """
+    start_date = as_date(start_date)
+    end_date = min(as_date(end_date) or until, until)
+    groups = {}
+    if start_date is not None and start_date > end_date:
+        return groups
+
+    # Meses completos: [first, last)
+    first = start_date if start_date is None or start_date.day == 1 \
+        else shift_bucket(bucket_start(start_date, 'month'), 'month')
+    last = shift_bucket(bucket_start(end_date, 'month'), 'month')
+    if end_date != last - timedelta(days=1):
+        last = bucket_start(end_date, 'month')
+    partial = []
+    if first is None or first < last:
+        rollups = TransactionRollup.objects.filter(user_id__in=user_ids, month__lt=last)
+        if first is not None:
+            rollups = rollups.filter(month__gte=first)
+            if start_date < first:
+                partial.append((start_date, first - timedelta(days=1)))
+        if last <= end_date:
+            partial.append((last, end_date))
+        if transaction_type:
+            rollups = rollups.filter(transaction_type=transaction_type)
+        if allocated_to is not None:
+            rollups = rollups.filter(category_id=int(allocated_to) or None)
+        for rollup in rollups:
+            _add(groups, rollup.category_id or NO_CATEGORY, rollup.transaction_type, to_cents(rollup.total),
+                 rollup.count, rollup.last_date or rollup.month)
+    else:
+        partial.append((start_date, end_date))
+
+    for low, high in partial:
+        transactions = ArchivedTransaction.objects.filter(user_id__in=user_ids, date__range=(low, high))
+        if transaction_type:
+            transactions = transactions.filter(transaction_type=transaction_type)
+        group_allocations(transactions, allocated_to, groups)
+    return groups
+
+
+def merge_groups(groups, archived):
+    """Suma a `groups` (acumulados en centavos por categoría) los del archivo"""
+    for category, extra in archived.items():
+        group = groups.setdefault(category, {'income': 0, 'expense': 0, 'count': 0, 'last_date': None})
+        group['income'] += extra['income']
+        group['expense'] += extra['expense']
+        group['count'] += extra['count']
+        if group['last_date'] is None or extra['last_date'] > group['last_date']:
+            group['last_date'] = extra['last_date']
+    return groups
+
+
+def search_archived(queryset, text):
+    """Búsqueda en la descripción de las transacciones archivadas (sin índice de texto completo)"""
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    for term in terms:
+        queryset = queryset.filter(description__icontains=term)
+    return queryset
+
+
+def _archived_copy(transaction):
+    return ArchivedTransaction(
+        id=transaction.id,
+        user_id=transaction.user_id,
+        category_id=transaction.category_id,
+        account_id=transaction.account_id,
+        recurring_id=transaction.recurring_id,
+        transaction_type=transaction.transaction_type,
+        amount=transaction.amount,
+        currency=transaction.currency,
+        base_amount=transaction.base_amount,
+        date=transaction.date,
+        description=transaction.description,
+        splits=[
+            {'id': split.id, 'category': split.category_id, 'amount': split.amount, 'description': split.description}
+            for split in transaction.splits.all()
+        ],
+        created_at=transaction.created_at,
+        updated_at=transaction.updated_at,
+    )
+
+
+def _merge_rollups(user_id, rows):
+    """Suma los totales (mes, categoría, tipo) a los ya archivados de esos meses"""
+    totals = {}
+
+    def add(key, total, count, last_date):
+        previous_total, previous_count, previous_date = totals.get(key, (0, 0, None))
+        if previous_date is not None and (last_date is None or previous_date > last_date):
+            last_date = previous_date
+        totals[key] = (previous_total + total, previous_count + count, last_date)
+
+    for row in rows:
+        add((row['month'], row['allocation_category'], row['transaction_type']),
+            row['total'], row['count'], row['last_date'])
+    if not totals:
+        return
+    months = {month for month, _, _ in totals}
+    existing = TransactionRollup.objects.filter(user_id=user_id, month__in=months)
+    for rollup in existing:
+        add((rollup.month, rollup.category_id, rollup.transaction_type), rollup.total, rollup.count, rollup.last_date)
+    existing.delete()
+    TransactionRollup.objects.bulk_create([
+        TransactionRollup(
+            user_id=user_id, month=month, category_id=category_id, transaction_type=transaction_type,
+            total=Decimal(total).quantize(CENT), count=count, last_date=last_date,
+        )
+        for (month, category_id, transaction_type), (total, count, last_date) in totals.items()
+    ], batch_size=1000)
+
+
+def archive_user(user_id, cutoff, batch_size=1000):
+    """Archiva las transacciones del usuario anteriores a `cutoff` y devuelve cuántas se movieron"""
+    from .signals import transactions_bulk_changed
+
+    with db_transaction.atomic():
+        queryset = Transaction.objects.filter(user_id=user_id, date__lt=cutoff)
+        ids = list(queryset.order_by('id').values_list('id', flat=True))
+        if ids:
+            _merge_rollups(user_id, allocations(queryset).values(
+                'allocation_category', 'transaction_type',
+                month=Trunc('date', 'month', output_field=DateField()),
+            ).annotate(total=Sum('allocation_amount'), count=Count('id'), last_date=Max('date')).order_by())
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                rows = Transaction.objects.filter(id__in=batch).prefetch_related('splits')
+                ArchivedTransaction.objects.bulk_create([_archived_copy(row) for row in rows])
+                delete_rows(user_id, batch)
+            transactions_bulk_changed.send(sender=Transaction, user_ids=[user_id])
+
+        horizon = cutoff - timedelta(days=1)
+        current = archived_until(user_id)
+        if current is None or current < horizon:
+            TransactionArchive.objects.update_or_create(user_id=user_id, defaults={'archived_until': horizon})
+    return len(ids)
+
+
+def restore_user(user_id, batch_size=1000):
+    """
+    Devuelve a la tabla de transacciones todas las transacciones archivadas del usuario.
+
+    Las categorías y recurrentes eliminadas mientras tanto quedan vacías.
+    Devuelve cuántas transacciones se restauraron.
+    """
+    from .signals import transactions_bulk_changed
+
+    with db_transaction.atomic():
+        archived = ArchivedTransaction.objects.filter(user_id=user_id).order_by('id')
+        restored = archived.count()
+        if restored:
+            categories = set(Category.objects.filter(user_id=user_id).values_list('id', flat=True))
+            schedules = set(RecurringTransaction.objects.filter(user_id=user_id).values_list('id', flat=True))
+            sync_version = bump_versions([user_id])[user_id]
+            rows = list(archived)
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                Transaction.objects.bulk_create([
+                    Transaction(
+                        id=row.id, user_id=user_id, category_id=row.category_id, account_id=row.account_id,
+                        recurring_id=row.recurring_id if row.recurring_id in schedules else None,
+                        transaction_type=row.transaction_type, amount=row.amount, currency=row.currency,
+                        base_amount=row.base_amount, date=row.date, description=row.description,
+                        created_at=row.created_at, updated_at=row.updated_at, sync_version=sync_version,
+                    )
+                    for row in batch
+                ])
+                TransactionSplit.objects.bulk_create([
+                    TransactionSplit(
+                        id=split['id'], transaction_id=row.id, amount=split['amount'],
+                        category_id=split['category'] if split['category'] in categories else None,
+                        description=split['description'],
+                    )
+                    for row in batch for split in row.splits
+                ])
+            archived.delete()
+            transactions_bulk_changed.send(sender=Transaction, user_ids=[user_id])
+
+        TransactionRollup.objects.filter(user_id=user_id).delete()
+        TransactionArchive.objects.filter(user_id=user_id).delete()
+    return restored
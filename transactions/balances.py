@@ -0,0 +1,197 @@
+"""
+Saldos de las cuentas con puntos de control mensuales.
+
+Cada cuenta guarda su saldo acumulado al cierre de cada mes con transacciones
+(`AccountCheckpoint`). El saldo a una fecha es el último punto de control
+anterior (una búsqueda por el índice único (cuenta, fecha)) más las
+transacciones posteriores a él, que por construcción son solo las del mes de
+esa fecha (índice (cuenta, fecha) de Transaction). El costo no depende del
+largo del historial.
+
+Cada escritura suma su diferencia a los puntos de control de su mes y de los
+siguientes con un solo UPDATE, por lo que las transacciones cargadas fuera de
+orden (con fechas pasadas) mantienen los saldos correctos.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, F, Sum, When
+from django.db.models.functions import TruncMonth
+from .models import Account, AccountCheckpoint, ArchivedTransaction
+
+# Campos de una transacción que afectan el saldo de su cuenta, en el orden de `balance_changes`
+BALANCE_FIELDS = ('account', 'date', 'amount', 'transaction_type')
+INTERVALS = ('day', 'week', 'month')
+CENT = Decimal('0.01')
+
+
+def month_end(value):
+    return date(value.year, value.month, monthrange(value.year, value.month)[1])
+
+
+def signed_amount(amount, transaction_type):
+    return amount if transaction_type == 'income' else -amount
+
+
+def signed_total():
+    """Suma de los importes con signo (ingresos positivos, gastos negativos) en la moneda de la cuenta"""
+    return Sum(Case(When(transaction_type='income', then=F('amount')), default=-F('amount')))
+
+
+def _cents(total):
+    # SQLite suma los decimales como float: se redondea el agregado a centavos
+    return Decimal(total or 0).quantize(CENT)
+
+
+def balance_changes(previous, transaction):
+    """
+    Diferencias (cuenta, fecha, importe) que produce guardar una transacción.
+
+    `previous` son los valores de BALANCE_FIELDS antes de guardar, o None si es nueva.
+    """
+    changes = []
+    if previous is not None:
+        account_id, transaction_date, amount, transaction_type = previous
+        changes.append((account_id, transaction_date, -signed_amount(amount, transaction_type)))
+    changes.append((
+        transaction.account_id, transaction.date,
+        signed_amount(Decimal(transaction.amount), transaction.transaction_type),
+    ))
+    return changes
+
+
+def transaction_changes(transactions, sign=1):
+    """Diferencias de crear (o, con `sign=-1`, eliminar) varias transacciones"""
+    return [
+        (transaction.account_id, transaction.date,
+         sign * signed_amount(Decimal(transaction.amount), transaction.transaction_type))
+        for transaction in transactions
+    ]
+
+
+def apply_balance_changes(changes):
+    """
+    Aplica diferencias (cuenta, fecha, importe) a los puntos de control.
+
+    Las diferencias se agrupan por cuenta y mes; por cada grupo se crea el
+    punto de control del mes si falta y se actualizan él y los posteriores con
+    un UPDATE. Las cuentas involucradas se bloquean durante la operación.
+    """
+    deltas = {}
+    for account_id, transaction_date, amount in changes:
+        if account_id is None or not amount:
+            continue
+        key = (account_id, month_end(transaction_date))
+        deltas[key] = deltas.get(key, 0) + amount
+    if not deltas:
+        return
+
+    with db_transaction.atomic():
+        # Las cuentas eliminadas en la misma operación se ignoran
+        accounts = set(
+            Account.objects.select_for_update().filter(id__in={account_id for account_id, _ in deltas})
+            .order_by('id').values_list('id', flat=True)
+        )
+        for (account_id, period_end), amount in sorted(deltas.items()):
+            if account_id not in accounts or not amount:
+                continue
+            _ensure_checkpoint(account_id, period_end)
+            AccountCheckpoint.objects.filter(account_id=account_id, date__gte=period_end).update(
+                balance=F('balance') + amount
+            )
+
+
+def _ensure_checkpoint(account_id, period_end):
+    checkpoints = AccountCheckpoint.objects.filter(account_id=account_id)
+    if checkpoints.filter(date=period_end).exists():
+        return
+    # Un mes sin punto de control no tenía transacciones: arranca con el saldo del anterior
+    previous = checkpoints.filter(date__lt=period_end).order_by('-date').values_list('balance', flat=True).first()
+    AccountCheckpoint.objects.create(account_id=account_id, date=period_end, balance=previous or 0)
+
+
+def _archived(account):
+    return ArchivedTransaction.objects.filter(account=account)
+
+
+def rebuild_checkpoints(account):
+    """Recalcula desde cero los puntos de control de una cuenta (una consulta agrupada por mes por tabla)"""
+    totals = {}
+    for transactions in (account.transactions.all(), _archived(account)):
+        months = transactions.annotate(month=TruncMonth('date')).values('month').annotate(total=signed_total()).order_by()
+        for row in months:
+            totals[row['month']] = totals.get(row['month'], 0) + _cents(row['total'])
+    running = Decimal(0)
+    checkpoints = []
+    for month in sorted(totals):
+        running += totals[month]
+        checkpoints.append(AccountCheckpoint(account=account, date=month_end(month), balance=running))
+    with db_transaction.atomic():
+        Account.objects.select_for_update().filter(pk=account.pk).exists()
+        account.checkpoints.all().delete()
+        AccountCheckpoint.objects.bulk_create(checkpoints)
+    return len(checkpoints)
+
+
+def _sources(account, since, horizon):
+    """Tablas con transacciones de la cuenta posteriores a `since`: el archivo solo si el horizonte es posterior"""
+    if horizon is not None and (since is None or since < horizon):
+        return [account.transactions.all(), _archived(account)]
+    return [account.transactions.all()]
+
+
+def balance_at(account, on_date, horizon=None):
+    """
+    Saldo de la cuenta al cierre del día `on_date`.
+
+    `horizon` es el horizonte del archivo del usuario (`TransactionArchive`):
+    las transacciones archivadas solo se leen si el tramo desde el último
+    punto de control llega hasta él.
+    """
+    checkpoint = account.checkpoints.filter(date__lte=on_date).order_by('-date').values_list('date', 'balance').first()
+    sources = _sources(account, checkpoint and checkpoint[0], horizon)
+    balance = account.opening_balance
+    if checkpoint is not None:
+        balance += checkpoint[1]
+    for transactions in sources:
+        transactions = transactions.filter(date__lte=on_date)
+        if checkpoint is not None:
+            transactions = transactions.filter(date__gt=checkpoint[0])
+        balance += _cents(transactions.order_by().aggregate(total=signed_total())['total'])
+    return balance
+
+
+def _is_period_end(value, interval):
+    if interval == 'week':
+        return value.weekday() == 6
+    if interval == 'month':
+        return value == month_end(value)
+    return True
+
+
+def balance_history(account, start_date, end_date, interval='day', horizon=None):
+    """
+    Saldo de la cuenta al cierre de cada día, semana (domingo) o mes del rango.
+
+    Parte del saldo anterior al rango y recorre solo las transacciones del
+    rango, agrupadas por día. El último punto es siempre `end_date`.
+    """
+    balance = balance_at(account, start_date - timedelta(days=1), horizon)
+    daily = {}
+    for transactions in _sources(account, start_date - timedelta(days=1), horizon):
+        rows = transactions.filter(date__range=[start_date, end_date]).values('date').annotate(
+            total=signed_total()
+        ).order_by().values_list('date', 'total')
+        for day, total in rows:
+            daily[day] = _cents(daily.get(day)) + _cents(total)
+
+    points = []
+    current = start_date
+    while current <= end_date:
+        balance += _cents(daily.get(current))
+        if current == end_date or _is_period_end(current, interval):
+            points.append({'date': current, 'balance': balance})
+        current += timedelta(days=1)
+    return points
@@ -0,0 +1,95 @@
+"""
+Actualización y eliminación masiva de transacciones.
+
+Las transacciones se seleccionan con un queryset ya restringido al usuario (la
+comprobación de propiedad es la cláusula `WHERE user_id = ...`, no una lectura
+por fila) y se modifican con un UPDATE o DELETE por lote. Lo que las señales
+por instancia harían fila a fila se hace una vez por lote: una versión de
+sincronización, una aplicación de diferencias de saldo, un `bulk_create` de
+lápidas, una inserción de los eventos del registro de cambios y una
+invalidación del historial en memoria (`transactions_bulk_changed`).
+
+Las filas se bloquean y se leen antes de escribir (el registro de cambios
+guarda sus valores anteriores, de los que salen también las diferencias de
+saldo y las lápidas), y la escritura se hace sobre los ids leídos, en bloques
+del tamaño máximo de parámetros de la base de datos.
+"""
+from django.db import connections, transaction as db_transaction
+from django.utils import timezone
+from changelog import log as changelog
+from sync.versions import bump_versions, record_tombstones
+from .balances import apply_balance_changes, signed_amount
+from .models import Transaction, TransactionSplit
+
+# Cambios que mueven importes entre cuentas o cambian su signo
+BALANCE_CHANGES = ('account', 'transaction_type')
+
+
+def _batches(queryset, ids):
+    size = connections[queryset.db].ops.bulk_batch_size(['id'], ids) or len(ids)
+    for offset in range(0, len(ids), size):
+        yield ids[offset:offset + size]
+
+
+def delete_rows(user_id, ids, using='default'):
+    """
+    Elimina las transacciones `ids` del usuario y sus líneas sin enviar señales por fila.
+
+    Quien llama se encarga de los saldos, la sincronización, el registro de cambios y
+    el historial en memoria.
+    """
+    queryset = Transaction.objects.using(using).filter(user_id=user_id)
+    for batch in _batches(queryset, ids):
+        TransactionSplit.objects.using(using).filter(transaction_id__in=batch).delete()
+        queryset.filter(id__in=batch)._raw_delete(using)
+
+
+def update_transactions(queryset, user_id, changes):
+    """
+    Aplica `changes` (campo -> valor) a las transacciones del queryset del usuario.
+
+    Las transacciones divididas no se recategorizan: su categoría la indican sus
+    líneas. Devuelve el número de transacciones actualizadas.
+    """
+    from .signals import transactions_bulk_changed
+
+    if 'category' in changes:
+        queryset = queryset.filter(splits__isnull=True)
+
+    with db_transaction.atomic():
+        version = bump_versions([user_id])[user_id]
+        values = dict(changes, sync_version=version, updated_at=timezone.now())
+        rows = changelog.update(queryset, **values)
+        updated = len(rows)
+        if set(BALANCE_CHANGES) & changes.keys():
+            diffs = []
+            for old, new in rows:
+                diffs.append((old['account_id'], old['date'], -signed_amount(old['amount'], old['transaction_type'])))
+                diffs.append((new['account_id'], new['date'], signed_amount(new['amount'], new['transaction_type'])))
+            apply_balance_changes(diffs)
+
+        if updated:
+            transactions_bulk_changed.send(sender=Transaction, user_ids=[user_id])
+    return updated
+
+
+def delete_transactions(queryset, user_id):
+    """Elimina las transacciones del queryset del usuario y devuelve cuántas se eliminaron"""
+    from .signals import transactions_bulk_changed
+
+    with db_transaction.atomic():
+        rows = changelog.rows(queryset.select_for_update(of=('self',)))
+        if not rows:
+            return 0
+        ids = list(rows)
+        # Sin las señales post_delete por fila: sus efectos se aplican abajo una vez por lote
+        delete_rows(user_id, ids, queryset.db)
+
+        apply_balance_changes([
+            (row['account_id'], row['date'], -signed_amount(row['amount'], row['transaction_type']))
+            for row in rows.values()
+        ])
+        record_tombstones(Transaction, user_id, ids)
+        changelog.record(Transaction, [(row, None) for row in rows.values()], queryset.db)
+        transactions_bulk_changed.send(sender=Transaction, user_ids=[user_id])
+    return len(rows)
@@ -0,0 +1,211 @@
+"""
+Motor de categorización automática basado en reglas.
+
+Las reglas activas de cada usuario se compilan en un autómata Aho-Corasick
+sobre sus palabras clave, de modo que cada descripción se recorre una sola
+vez sin importar cuántas reglas haya. Las coincidencias se filtran luego por
+tipo e importe y gana la regla de mayor prioridad.
+"""
+import threading
+import unicodedata
+from collections import OrderedDict, deque
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from changelog import log as changelog
+from financetracker.versioning import bump_version, get_version
+from sync.versions import bump_versions
+from .models import CategorizationRule, Transaction
+
+
+def normalize(text):
+    """Minúsculas y sin acentos, para comparar descripciones con palabras clave"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class AhoCorasick:
+    """Autómata Aho-Corasick para buscar muchas palabras clave en una sola pasada"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+    def add(self, pattern, value):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(value)
+
+    def build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        return self
+
+    def find(self, text):
+        """Devuelve el conjunto de valores cuyas palabras clave aparecen en `text`"""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found.update(self._output[state])
+        return found
+
+
+class CompiledRules:
+    """Reglas de un usuario compiladas para clasificar transacciones"""
+
+    def __init__(self, rules, version=None):
+        self.version = version
+        # Índice de cada regla en orden de precedencia (mayor prioridad primero)
+        self.rules = sorted(rules, key=lambda rule: (-rule.priority, rule.id))
+        self.automaton = AhoCorasick()
+        self.unconditional = []
+        for index, rule in enumerate(self.rules):
+            keyword = normalize(rule.keyword.strip())
+            if keyword:
+                self.automaton.add(keyword, index)
+            else:
+                self.unconditional.append(index)
+        self.automaton.build()
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def classify(self, description, amount, transaction_type):
+        """Devuelve el id de categoría de la regla ganadora, o None"""
+        if not self.rules:
+            return None
+        candidates = self.automaton.find(normalize(description or ''))
+        candidates.update(self.unconditional)
+        for index in sorted(candidates):
+            rule = self.rules[index]
+            if rule.transaction_type and rule.transaction_type != transaction_type:
+                continue
+            if rule.min_amount is not None and amount < rule.min_amount:
+                continue
+            if rule.max_amount is not None and amount > rule.max_amount:
+                continue
+            return rule.category_id
+        return None
+
+
+def _version_key(user_id):
+    return f'categorization-rules-version:{user_id}'
+
+
+class RuleCache:
+    """Caché LRU por proceso de las reglas compiladas de cada usuario"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        version = get_version(_version_key(user_id))
+        with self._lock:
+            compiled = self._compiled.get(user_id)
+            if compiled is not None and compiled.version == version:
+                self._compiled.move_to_end(user_id)
+                return compiled
+
+        rules = CategorizationRule.objects.filter(user_id=user_id, is_active=True)
+        compiled = CompiledRules(list(rules), version)
+        with self._lock:
+            self._compiled[user_id] = compiled
+            self._compiled.move_to_end(user_id)
+            while len(self._compiled) > self.max_entries:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def invalidate(self, user_id):
+        bump_version(_version_key(user_id))
+        with self._lock:
+            self._compiled.pop(user_id, None)
+
+
+rule_cache = RuleCache()
+
+
+def categorize(transactions, user_id):
+    """Asigna categoría a las transacciones (instancias sin guardar) que no la tienen"""
+    pending = [transaction for transaction in transactions if transaction.category_id is None]
+    if not pending:
+        return
+    rules = rule_cache.get(user_id)
+    if not rules:
+        return
+    for transaction in pending:
+        transaction.category_id = rules.classify(
+            transaction.description, transaction.amount, transaction.transaction_type)
+
+
+def apply_rules_to_history(user_id, overwrite=False, chunk_size=1000):
+    """
+    Vuelve a aplicar las reglas del usuario a su historial de transacciones.
+
+    Recorre el historial por bloques de ids y, por cada bloque, hace un UPDATE
+    por categoría resultante. Si `overwrite` es False solo se categorizan las
+    transacciones sin categoría. Las divididas no se tocan: su categoría es la
+    de sus líneas. Devuelve el número de transacciones modificadas.
+    """
+    from .signals import transactions_bulk_changed
+
+    rules = rule_cache.get(user_id)
+    if not rules:
+        return 0
+
+    queryset = Transaction.objects.filter(user_id=user_id, splits__isnull=True)
+    if not overwrite:
+        queryset = queryset.filter(category__isnull=True)
+
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list(
+            'id', 'description', 'amount', 'transaction_type', 'category_id'
+        )[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        changes = {}
+        for transaction_id, description, amount, transaction_type, current in rows:
+            category_id = rules.classify(description, amount, transaction_type)
+            if category_id is not None and category_id != current:
+                changes.setdefault(category_id, []).append(transaction_id)
+
+        if not changes:
+            continue
+        with db_transaction.atomic():
+            now = timezone.now()
+            sync_version = bump_versions([user_id])[user_id]
+            for category_id, ids in changes.items():
+                updated += len(changelog.update(
+                    Transaction.objects.filter(id__in=ids),
+                    category_id=category_id, updated_at=now, sync_version=sync_version
+                ))
+
+    if updated:
+        transactions_bulk_changed.send(sender=Transaction, user_ids=[user_id])
+    return updated
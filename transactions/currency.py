@@ -0,0 +1,77 @@
+"""
+Importes de las transacciones en la moneda base de cada usuario.
+
+Cada transacción guarda, además de su importe original, `base_amount`: el
+importe convertido a la moneda base del usuario con el tipo de cambio de su
+fecha. Los agregados suman esa columna directamente, sin convertir fila a fila.
+Cuando cambian los tipos de cambio o la moneda base de un usuario, la columna
+se recalcula con un UPDATE por moneda base que hace la conversión en SQL.
+"""
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F, Q
+from changelog import log as changelog
+from currencies.rates import MissingExchangeRate, conversion_expression, convert, get_base_currencies, has_rates
+from sync.versions import bump_versions, current_version
+from users.models import Profile
+from .models import Transaction
+
+
+def fill_base_amounts(transactions, base_currencies=None):
+    """
+    Calcula `base_amount` de varias instancias (sin guardar) con una sola consulta de monedas base.
+
+    `base_currencies` (usuario -> moneda) evita esa consulta si ya se tienen.
+    """
+    if base_currencies is None:
+        base_currencies = get_base_currencies(transaction.user_id for transaction in transactions)
+    for transaction in transactions:
+        transaction.base_amount = convert(
+            transaction.amount, transaction.currency, base_currencies[transaction.user_id], transaction.date
+        )
+
+
+def recompute_base_amounts(user_ids=None):
+    """
+    Recalcula `base_amount` de las transacciones de los usuarios indicados (o de todos).
+
+    Lanza MissingExchangeRate, sin modificar nada, si alguna moneda involucrada
+    no tiene tipos de cambio cargados. Devuelve el número de filas actualizadas.
+    """
+    from .signals import transactions_bulk_changed
+
+    transactions = Transaction.objects.all()
+    profiles = Profile.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    base_currencies = set(profiles.values_list('base_currency', flat=True)) | {settings.DEFAULT_CURRENCY}
+    currencies = set(transactions.order_by().values_list('currency', flat=True).distinct())
+    for currency in sorted(currencies | base_currencies):
+        if not has_rates(currency):
+            raise MissingExchangeRate(currency)
+
+    updated = 0
+    with db_transaction.atomic():
+        changed_users = user_ids if user_ids is not None else transactions.order_by().values_list('user_id', flat=True).distinct()
+        changed_users = list(changed_users)
+        # Las filas convertidas toman la versión de sincronización nueva de su usuario
+        bump_versions(changed_users)
+        for base_currency in base_currencies:
+            users = Q(user__profile__base_currency=base_currency)
+            if base_currency == settings.DEFAULT_CURRENCY:
+                users |= Q(user__profile__isnull=True)
+            group = transactions.filter(users)
+            updated += len(changelog.update(
+                group.exclude(currency=base_currency),
+                base_amount=conversion_expression(base_currency), sync_version=current_version()
+            ))
+            updated += len(changelog.update(
+                group.filter(currency=base_currency).exclude(base_amount=F('amount')),
+                base_amount=F('amount'), sync_version=current_version()
+            ))
+
+        if updated:
+            transactions_bulk_changed.send(sender=Transaction, user_ids=changed_users)
+    return updated
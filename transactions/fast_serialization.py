@@ -0,0 +1,149 @@
+"""
+Ruta rápida de lectura para listados grandes de transacciones.
+
+En lugar de construir instancias del modelo y despachar `to_representation`
+campo por campo, se leen tuplas con `values_list()` y se convierten con una
+función generada una sola vez a partir de los campos del serializer. Los
+serializers anidados de relaciones inversas (las líneas de división) se leen
+con una consulta más para todas las filas. El resultado es idéntico al de
+`TransactionSerializer(many=True).data`.
+"""
+import decimal
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+def _decimal_converter(field):
+    """Replica `DecimalField.to_representation` con el cuantizador precalculado"""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.localize or not coerce_to_string:
+        return field.to_representation
+
+    exponent = Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+    return convert
+
+
+def _datetime_converter(field):
+    """Replica `DateTimeField.to_representation` para el formato ISO 8601"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != 'iso-8601':
+        return field.to_representation
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_aware(value):
+            value = value.astimezone(field_timezone)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != 'iso-8601':
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def _field_converter(field):
+    """Devuelve el conversor de un campo, o None si el valor de la base ya es su representación"""
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    if isinstance(field, (serializers.IntegerField, serializers.BooleanField)):
+        return None
+    if isinstance(field, serializers.ChoiceField):
+        return None if all(str(key) == key for key in field.choices) else field.to_representation
+    if isinstance(field, serializers.CharField):
+        return None
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.DateField):
+        return _date_converter(field)
+    return field.to_representation
+
+
+def _nested_fields(serializer):
+    return [
+        field for field in serializer.fields.values()
+        if isinstance(field, serializers.ListSerializer) and not field.write_only
+    ]
+
+
+def build_row_converter(serializer):
+    """
+    Genera la conversión fila -> dict para los campos legibles de un serializer.
+
+    Devuelve `(columns, convert_rows)`: las columnas a pedir con `values_list()`
+    y una función que transforma la lista de tuplas en la lista de dicts. Los
+    campos anidados quedan como listas vacías para completarlos aparte.
+    """
+    nested = _nested_fields(serializer)
+    fields = [field for field in serializer.fields.values() if not field.write_only and field not in nested]
+    columns = [field.source.replace('.', '__') for field in fields]
+
+    namespace = {}
+    items = []
+    index = 0
+    for field in serializer.fields.values():
+        if field in nested:
+            items.append(f'{field.field_name!r}: []')
+            continue
+        if field.write_only:
+            continue
+        converter = _field_converter(field)
+        value = f'v{index}'
+        if converter is not None:
+            namespace[f'c{index}'] = converter
+            value = f'(None if v{index} is None else c{index}(v{index}))'
+        items.append(f'{field.field_name!r}: {value}')
+        index += 1
+
+    variables = ', '.join(f'v{index}' for index in range(len(fields)))
+    source = (
+        'def convert_rows(rows):\n'
+        f'    return [{{{", ".join(items)}}} for ({variables},) in rows]\n'
+    )
+    exec(compile(source, '<row_converter>', 'exec'), namespace)
+    return columns, namespace['convert_rows']
+
+
+def _fill_nested(data, queryset, field):
+    """Completa un campo anidado de relación inversa con una sola consulta para todas las filas"""
+    relation = queryset.model._meta.get_field(field.source)
+    columns, convert_rows = build_row_converter(field.child)
+    rows = relation.related_model._default_manager.filter(
+        **{f'{relation.field.name}__in': queryset.values('pk')}
+    ).values_list(relation.field.attname, *columns)
+
+    by_parent = {}
+    items = convert_rows(row[1:] for row in rows)
+    for (parent, *_), item in zip(rows, items):
+        by_parent.setdefault(parent, []).append(item)
+    pk_name = queryset.model._meta.pk.name
+    for row in data:
+        row[field.field_name] = by_parent.get(row[pk_name], [])
+
+
+def serialize_rows(queryset, serializer):
+    """Serializa un queryset con la ruta rápida"""
+    columns, convert_rows = build_row_converter(serializer)
+    data = convert_rows(queryset.values_list(*columns))
+    if data:
+        for field in _nested_fields(serializer):
+            _fill_nested(data, queryset, field)
+    return data
@@ -0,0 +1,85 @@
+"""
+Jerarquía de categorías mantenida con una tabla de clausura.
+
+CategoryClosure guarda todos los pares (ancestro, descendiente) del árbol. Los
+totales de un subárbol (o de todos los niveles a la vez) se obtienen agrupando
+las transacciones por ancestro con un único join contra esa tabla, en lugar de
+recorrer el árbol con una consulta por nodo.
+"""
+from .models import CategoryClosure
+
+
+def insert_node(category):
+    """Agrega una categoría nueva (sin descendientes) bajo su padre"""
+    links = [CategoryClosure(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+    if category.parent_id:
+        links.extend(
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1)
+            for ancestor_id, depth in CategoryClosure.objects.filter(
+                descendant_id=category.parent_id
+            ).values_list('ancestor_id', 'depth')
+        )
+    CategoryClosure.objects.bulk_create(links)
+
+
+def move_node(category):
+    """Mueve el subárbol de una categoría bajo su (nuevo) padre"""
+    subtree = dict(
+        CategoryClosure.objects.filter(ancestor_id=category.pk).values_list('descendant_id', 'depth')
+    )
+    if category.parent_id in subtree:
+        raise ValueError('Una categoría no puede moverse dentro de su propio subárbol.')
+
+    # Desconectar el subárbol de sus ancestros anteriores
+    CategoryClosure.objects.filter(descendant_id__in=subtree).exclude(ancestor_id__in=subtree).delete()
+
+    if category.parent_id:
+        ancestors = CategoryClosure.objects.filter(
+            descendant_id=category.parent_id
+        ).values_list('ancestor_id', 'depth')
+        CategoryClosure.objects.bulk_create([
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + depth + 1)
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, depth in subtree.items()
+        ])
+
+
+def detach_children(category):
+    """
+    Convierte los hijos de una categoría que se va a eliminar en raíces.
+
+    Sus subárboles dejan de colgar de los ancestros de la categoría eliminada.
+    """
+    descendants = set(
+        CategoryClosure.objects.filter(ancestor_id=category.pk, depth__gt=0).values_list('descendant_id', flat=True)
+    )
+    if descendants:
+        CategoryClosure.objects.filter(descendant_id__in=descendants).exclude(ancestor_id__in=descendants).delete()
+
+
+def ancestor_pairs(user_ids):
+    """Pares (ancestro, descendiente) de las categorías de los usuarios"""
+    return list(
+        CategoryClosure.objects.filter(descendant__user_id__in=user_ids).values_list('ancestor_id', 'descendant_id')
+    )
+
+
+def rollup(groups, pairs):
+    """
+    Acumula métricas por categoría en cada uno de sus ancestros.
+
+    `groups` son los acumulados en centavos del historial columnar
+    (income, expense, count, last_date) indexados por categoría.
+    """
+    totals = {}
+    for ancestor_id, descendant_id in pairs:
+        group = groups.get(descendant_id)
+        if group is None:
+            continue
+        total = totals.setdefault(ancestor_id, {'income': 0, 'expense': 0, 'count': 0, 'last_date': None})
+        total['income'] += group['income']
+        total['expense'] += group['expense']
+        total['count'] += group['count']
+        if total['last_date'] is None or group['last_date'] > total['last_date']:
+            total['last_date'] = group['last_date']
+    return totals
@@ -0,0 +1,415 @@
+"""
+Caché columnar en memoria del historial de transacciones de cada usuario.
+
+El historial se guarda como arrays paralelos compactos ordenados por
+(fecha, id): fechas como ordinales int32, importes en moneda base en centavos
+int64, id de categoría y un bit de tipo. Las consultas analíticas acotan el
+rango de fechas con búsqueda binaria y recorren solo ese tramo de los arrays.
+Las transacciones divididas guardan aparte sus líneas (categoría e importe
+sobre el total), y los agregados por categoría reparten su importe entre ellas.
+
+Los historiales se cargan bajo demanda, se actualizan incrementalmente con
+las señales de escritura de Transaction y se desalojan por LRU cuando se
+supera el límite de memoria. Una versión por usuario en el caché compartido
+de Django permite detectar escrituras hechas por otros procesos; si el caché
+desaloja el contador, el nuevo no repite ninguna versión anterior
+(`financetracker.versioning`) y los historiales cargados se descartan.
+
+El historial de un hogar es la mezcla de los historiales de sus miembros:
+se arma sin consultas si están cargados y se guarda con la tupla de sus
+versiones, así la escritura de cualquier miembro lo invalida.
+"""
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import ExitStack
+from datetime import date
+from decimal import Decimal
+from itertools import chain, compress
+from operator import itemgetter
+
+from django.conf import settings
+from financetracker.versioning import bump_version, get_version, get_versions
+from .splits import allocate_cents
+
+INCOME = 1
+EXPENSE = 0
+NO_CATEGORY = 0
+
+
+def to_cents(amount):
+    return int(Decimal(amount).scaleb(2))
+
+
+def from_cents(cents):
+    """Convierte centavos a Decimal; 0 se devuelve como entero, igual que `Sum(...) or 0`"""
+    return Decimal(cents).scaleb(-2) if cents else 0
+
+
+def average_from_cents(cents, count):
+    return Decimal(cents) / count / 100 if count else 0
+
+
+def to_ordinal(value):
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal()
+
+
+class ColumnarLedger:
+    """Historial de transacciones de un usuario en arrays paralelos"""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.ids = array('q')
+        self.dates = array('i')
+        self.cents = array('q')
+        self.categories = array('q')
+        self.types = array('b')
+        # id de transacción -> tupla de líneas (categoría, importe, importe total)
+        self.splits = {}
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_rows(cls, rows, version=None, split_rows=()):
+        """
+        Construye el historial a partir de tuplas (id, date, amount, category_id, transaction_type) ordenadas.
+
+        `split_rows` son tuplas (transaction_id, category_id, amount, transaction_amount)
+        con las líneas de las transacciones divididas.
+        """
+        ledger = cls(version)
+        for transaction_id, transaction_date, amount, category_id, transaction_type in rows:
+            ledger.ids.append(transaction_id)
+            ledger.dates.append(transaction_date.toordinal())
+            ledger.cents.append(to_cents(amount))
+            ledger.categories.append(category_id or NO_CATEGORY)
+            ledger.types.append(INCOME if transaction_type == 'income' else EXPENSE)
+        lines = {}
+        for transaction_id, category_id, amount, total in split_rows:
+            lines.setdefault(transaction_id, []).append((category_id or NO_CATEGORY, amount, total))
+        ledger.splits = {transaction_id: tuple(split) for transaction_id, split in lines.items()}
+        return ledger
+
+    @classmethod
+    def merge(cls, ledgers, version=None):
+        """Mezcla historiales de varios usuarios manteniendo el orden por (fecha, id)"""
+        ledger = cls(version)
+        columns = ('dates', 'ids', 'cents', 'categories', 'types')
+        with ExitStack() as stack:
+            for member in ledgers:
+                stack.enter_context(member.lock)
+            # Cada historial ya está ordenado: el sort solo intercala esos tramos
+            rows = sorted(chain.from_iterable(
+                zip(*(getattr(member, name) for name in columns)) for member in ledgers
+            ))
+            for index, name in enumerate(columns):
+                getattr(ledger, name).extend(map(itemgetter(index), rows))
+            for member in ledgers:
+                ledger.splits.update(member.splits)
+        return ledger
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        # Estimación gruesa para las líneas de división, que son pocas
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.ids, self.dates, self.cents, self.categories, self.types)
+        ) + 256 * len(self.splits)
+
+    # Escrituras incrementales
+
+    def upsert(self, transaction_id, transaction_date, amount, category_id, transaction_type):
+        with self.lock:
+            self._remove(transaction_id)
+            ordinal = transaction_date.toordinal()
+            # Mantener el orden por (fecha, id)
+            position = bisect_right(self.dates, ordinal)
+            while position > 0 and self.dates[position - 1] == ordinal and self.ids[position - 1] > transaction_id:
+                position -= 1
+            self.ids.insert(position, transaction_id)
+            self.dates.insert(position, ordinal)
+            self.cents.insert(position, to_cents(amount))
+            self.categories.insert(position, category_id or NO_CATEGORY)
+            self.types.insert(position, INCOME if transaction_type == 'income' else EXPENSE)
+
+    def remove(self, transaction_id):
+        with self.lock:
+            self._remove(transaction_id)
+            self.splits.pop(transaction_id, None)
+
+    def _remove(self, transaction_id):
+        try:
+            position = self.ids.index(transaction_id)
+        except ValueError:
+            return
+        for column in (self.ids, self.dates, self.cents, self.categories, self.types):
+            del column[position]
+
+    # Consultas
+
+    def _bounds(self, start_date=None, end_date=None):
+        low = bisect_left(self.dates, to_ordinal(start_date)) if start_date else 0
+        high = bisect_right(self.dates, to_ordinal(end_date)) if end_date else len(self.dates)
+        return low, max(low, high)
+
+    def _positions(self, start_date=None, end_date=None, transaction_type=None, category_id=None):
+        """Posiciones que cumplen los filtros, dentro del tramo de fechas"""
+        low, high = self._bounds(start_date, end_date)
+        if not transaction_type and category_id is None:
+            return range(low, high)
+
+        wanted_type = None
+        if transaction_type:
+            wanted_type = INCOME if transaction_type == 'income' else EXPENSE
+        wanted_category = None
+        if category_id is not None:
+            wanted_category = int(category_id) or NO_CATEGORY
+
+        mask = [
+            (wanted_type is None or kind == wanted_type) and (wanted_category is None or category == wanted_category)
+            for kind, category in zip(self.types[low:high], self.categories[low:high])
+        ]
+        return compress(range(low, high), mask)
+
+    def _allocations(self, start_date=None, end_date=None, transaction_type=None, category_id=None,
+                     allocated_to=None):
+        """
+        Tuplas (posición, categoría, centavos) de cada asignación dentro de los filtros.
+
+        Una transacción dividida aporta una asignación por línea con la parte
+        proporcional de su importe; las demás, una con su importe completo.
+        `category_id` filtra por la categoría de la transacción y `allocated_to`
+        por la de la asignación.
+        """
+        if not self.splits and category_id is None and allocated_to is not None:
+            # Sin divisiones ambos filtros coinciden y el de posiciones es más rápido
+            category_id, allocated_to = allocated_to, None
+        wanted = None if allocated_to is None else int(allocated_to) or NO_CATEGORY
+
+        for position in self._positions(start_date, end_date, transaction_type, category_id):
+            lines = self.splits.get(self.ids[position]) if self.splits else None
+            if lines is None:
+                if wanted is None or self.categories[position] == wanted:
+                    yield position, self.categories[position], self.cents[position]
+                continue
+            for category, share, total in lines:
+                if wanted is None or category == wanted:
+                    yield position, category, allocate_cents(self.cents[position], share, total)
+
+    def totals(self, start_date=None, end_date=None, transaction_type=None, category_id=None, allocated_to=None):
+        """Ingresos, gastos (en centavos) y cantidad de transacciones (o de asignaciones, con `allocated_to`)"""
+        with self.lock:
+            if not transaction_type and category_id is None and allocated_to is None:
+                low, high = self._bounds(start_date, end_date)
+                cents = self.cents[low:high]
+                income = sum(compress(cents, self.types[low:high]))
+                return {'income': income, 'expense': sum(cents) - income, 'count': high - low}
+
+            income = expense = count = 0
+            if allocated_to is None:
+                entries = (
+                    (position, None, self.cents[position])
+                    for position in self._positions(start_date, end_date, transaction_type, category_id)
+                )
+            else:
+                entries = self._allocations(start_date, end_date, transaction_type, category_id, allocated_to)
+            for position, category, cents in entries:
+                if self.types[position] == INCOME:
+                    income += cents
+                else:
+                    expense += cents
+                count += 1
+            return {'income': income, 'expense': expense, 'count': count}
+
+    def by_category(self, start_date=None, end_date=None, transaction_type=None, category_id=None,
+                    allocated_to=None):
+        """Ingresos, gastos, cantidad y última fecha de las asignaciones por categoría"""
+        groups = {}
+        with self.lock:
+            for position, category, cents in self._allocations(
+                start_date, end_date, transaction_type, category_id, allocated_to
+            ):
+                group = groups.get(category)
+                if group is None:
+                    group = groups[category] = {
+                        'income': 0, 'expense': 0, 'count': 0, 'last_date': 0,
+                    }
+                if self.types[position] == INCOME:
+                    group['income'] += cents
+                else:
+                    group['expense'] += cents
+                group['count'] += 1
+                # Las posiciones están ordenadas por fecha
+                group['last_date'] = self.dates[position]
+        for group in groups.values():
+            group['last_date'] = date.fromordinal(group['last_date'])
+        return groups
+
+    def daily(self, start_date=None, end_date=None, transaction_type=None, category_id=None, allocated_to=None):
+        """Ingresos y gastos (en centavos) por día, indexados por fecha"""
+        days = {}
+        with self.lock:
+            for position, category, cents in self._allocations(
+                start_date, end_date, transaction_type, category_id, allocated_to
+            ):
+                day = days.setdefault(self.dates[position], [0, 0])
+                day[0 if self.types[position] == INCOME else 1] += cents
+        return {date.fromordinal(ordinal): values for ordinal, values in days.items()}
+
+    def largest(self, limit, start_date=None, end_date=None, transaction_type=None, category_id=None,
+                allocated_to=None):
+        """Ids de las transacciones de mayor importe (o de mayor importe asignado, con `allocated_to`)"""
+        with self.lock:
+            if allocated_to is None:
+                positions = self._positions(start_date, end_date, transaction_type, category_id)
+                top = heapq.nlargest(limit, positions, key=self.cents.__getitem__)
+                return [self.ids[position] for position in top]
+            entries = self._allocations(start_date, end_date, transaction_type, category_id, allocated_to)
+            top = heapq.nlargest(limit, entries, key=lambda entry: entry[2])
+            return [self.ids[position] for position, category, cents in top]
+
+    def latest(self, limit, start_date=None, end_date=None, transaction_type=None, category_id=None):
+        """Ids de las transacciones más recientes"""
+        with self.lock:
+            positions = list(self._positions(start_date, end_date, transaction_type, category_id))
+            return [self.ids[position] for position in reversed(positions[-limit:])] if limit else []
+
+
+def _version_key(user_id):
+    return f'ledger-version:{user_id}'
+
+
+def versions(user_ids):
+    """Versiones de los historiales de los usuarios, que cambian con cada escritura de sus transacciones"""
+    return get_versions([_version_key(user_id) for user_id in sorted(user_ids)])
+
+
+class LedgerCache:
+    """Caché LRU de historiales columnar con límite de memoria"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._ledgers = OrderedDict()
+        self._oversized = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        Devuelve el historial del usuario, cargándolo si hace falta.
+
+        Devuelve None si la caché está deshabilitada o el historial no entra
+        en el límite de memoria; en ese caso se debe consultar con SQL.
+        """
+        if not settings.LEDGER_CACHE_ENABLED:
+            return None
+
+        version = get_version(_version_key(user_id))
+        ledger, oversized = self._cached(user_id, version)
+        if ledger is not None or oversized:
+            return ledger
+        return self._store(user_id, self._load(user_id, version))
+
+    def get_combined(self, user_ids):
+        """
+        Historial combinado de varios usuarios (los miembros de un hogar).
+
+        Se mezclan los historiales de cada usuario, que solo se consultan si no
+        están cargados. Devuelve None si alguno no está disponible.
+        """
+        if len(user_ids) == 1:
+            return self.get(user_ids[0])
+        if not settings.LEDGER_CACHE_ENABLED:
+            return None
+
+        key = tuple(sorted(user_ids))
+        version = get_versions([_version_key(user_id) for user_id in key])
+        ledger, oversized = self._cached(key, version)
+        if ledger is not None or oversized:
+            return ledger
+        members = [self.get(user_id) for user_id in key]
+        if any(member is None for member in members):
+            return None
+        # La versión de cada miembro es con la que se cargó, por si escribió después de leer `version`
+        return self._store(key, ColumnarLedger.merge(members, tuple(member.version for member in members)))
+
+    def _cached(self, key, version):
+        """Historial guardado con esa versión y si en esa versión no entraba en el límite"""
+        with self._lock:
+            ledger = self._ledgers.get(key)
+            if ledger is not None and ledger.version == version:
+                self._ledgers.move_to_end(key)
+                return ledger, False
+            return None, self._oversized.get(key) == version
+
+    def _store(self, key, ledger):
+        if ledger.nbytes > self.max_bytes // 4:
+            # Historial demasiado grande: no se reintenta hasta la próxima escritura
+            with self._lock:
+                self._discard(key)
+                self._oversized[key] = ledger.version
+            return None
+
+        with self._lock:
+            self._discard(key)
+            self._ledgers[key] = ledger
+            self._bytes += ledger.nbytes
+            while self._bytes > self.max_bytes and len(self._ledgers) > 1:
+                self._discard(next(iter(self._ledgers)))
+        return ledger
+
+    def _load(self, user_id, version):
+        from .models import Transaction, TransactionSplit
+        rows = Transaction.objects.filter(user_id=user_id).order_by('date', 'id').values_list(
+            'id', 'date', 'base_amount', 'category_id', 'transaction_type'
+        )
+        split_rows = TransactionSplit.objects.filter(transaction__user_id=user_id).order_by('id').values_list(
+            'transaction_id', 'category_id', 'amount', 'transaction__amount'
+        )
+        return ColumnarLedger.from_rows(rows.iterator(chunk_size=5000), version, split_rows)
+
+    def _discard(self, key):
+        ledger = self._ledgers.pop(key, None)
+        if ledger is not None:
+            self._bytes -= ledger.nbytes
+
+    def apply(self, user_id, update):
+        """
+        Aplica una escritura al historial cacheado, si lo hay.
+
+        Si otro proceso escribió desde la última carga, la versión no coincide
+        y el historial se descarta para recargarlo en la próxima lectura.
+        """
+        version = bump_version(_version_key(user_id))
+        with self._lock:
+            ledger = self._ledgers.get(user_id)
+            if ledger is None:
+                return
+            if ledger.version != version - 1:
+                self._discard(user_id)
+                return
+            self._bytes -= ledger.nbytes
+            update(ledger)
+            ledger.version = version
+            self._bytes += ledger.nbytes
+
+    def invalidate(self, user_id):
+        """Descarta el historial del usuario en todos los procesos"""
+        bump_version(_version_key(user_id))
+        with self._lock:
+            self._discard(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._ledgers.clear()
+            self._oversized.clear()
+            self._bytes = 0
+
+
+ledger_cache = LedgerCache(max_bytes=settings.LEDGER_CACHE_MAX_BYTES)
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from transactions.categorization import apply_rules_to_history
+from transactions.models import CategorizationRule
+
+
+class Command(BaseCommand):
+    help = 'Vuelve a aplicar las reglas de categorización al historial de transacciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Nombre de usuario (por defecto, todos los usuarios con reglas activas)')
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Recategorizar también las transacciones que ya tienen categoría')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Transacciones procesadas por bloque')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                user_ids = [User.objects.get(username=options['user']).pk]
+            except User.DoesNotExist:
+                raise CommandError(f"El usuario '{options['user']}' no existe")
+        else:
+            user_ids = CategorizationRule.objects.filter(is_active=True).values_list('user_id', flat=True).distinct()
+
+        total = 0
+        for user_id in user_ids:
+            total += apply_rules_to_history(user_id, overwrite=options['overwrite'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} transacciones categorizadas'))
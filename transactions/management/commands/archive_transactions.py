@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from transactions.archive import archive_user, default_cutoff, restore_user
+from transactions.models import ArchivedTransaction, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Mueve al archivo las transacciones de los años cerrados, dejando en línea sus totales mensuales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before', type=int,
+            help=f'Archivar los años anteriores a este (por defecto se mantienen en línea '
+                 f'los últimos {settings.TRANSACTION_ARCHIVE_KEEP_YEARS} años)'
+        )
+        parser.add_argument('--user', help='Nombre de usuario (por defecto, todos)')
+        parser.add_argument('--restore', action='store_true', help='Devolver todas las transacciones archivadas')
+
+    def handle(self, *args, **options):
+        cutoff = date(options['before'], 1, 1) if options['before'] else default_cutoff()
+        if options['user']:
+            try:
+                user_ids = [User.objects.get(username=options['user']).pk]
+            except User.DoesNotExist:
+                raise CommandError(f"El usuario '{options['user']}' no existe")
+        elif options['restore']:
+            user_ids = ArchivedTransaction.objects.order_by().values_list('user_id', flat=True).distinct()
+        else:
+            user_ids = Transaction.objects.filter(date__lt=cutoff).order_by().values_list('user_id', flat=True).distinct()
+
+        total = 0
+        for user_id in list(user_ids):
+            total += restore_user(user_id) if options['restore'] else archive_user(user_id, cutoff)
+        if options['restore']:
+            self.stdout.write(self.style.SUCCESS(f'{total} transacciones restauradas'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{total} transacciones anteriores a {cutoff} archivadas'))
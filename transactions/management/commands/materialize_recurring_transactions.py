@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from transactions.recurrence import materialize_due
+
+
+class Command(BaseCommand):
+    help = 'Genera las transacciones de todas las ocurrencias recurrentes vencidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', help='Materializar ocurrencias hasta esta fecha (YYYY-MM-DD, por defecto hoy)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Transacciones recurrentes procesadas por bloque')
+
+    def handle(self, *args, **options):
+        until = None
+        if options['until']:
+            try:
+                until = date.fromisoformat(options['until'])
+            except ValueError:
+                raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        processed, materialized = materialize_due(until, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{materialized} ocurrencias materializadas de {processed} transacciones recurrentes'
+        ))
@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from transactions.balances import rebuild_checkpoints
+from transactions.models import Account
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero los puntos de control de saldo de las cuentas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Nombre de usuario (por defecto, todas las cuentas)')
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options['user']:
+            try:
+                accounts = accounts.filter(user=User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"El usuario '{options['user']}' no existe")
+
+        total = 0
+        for account in accounts.iterator():
+            total += rebuild_checkpoints(account)
+        self.stdout.write(self.style.SUCCESS(f'{total} puntos de control recalculados'))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from transactions.search import create_search_index
+    create_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from transactions.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_alter_transaction_options_category_color_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
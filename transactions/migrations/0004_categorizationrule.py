@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0003_transaction_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorizationRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keyword', models.CharField(blank=True, help_text='Texto a buscar en la descripción (sin distinguir mayúsculas ni acentos)', max_length=100)),
+                ('transaction_type', models.CharField(blank=True, choices=[('income', 'Income'), ('expense', 'Expense')], help_text='Tipo de transacción al que aplica (vacío = ambos)', max_length=7)),
+                ('min_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('priority', models.IntegerField(default=0, help_text='Ante varias reglas coincidentes gana la de mayor prioridad')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rules', to='transactions.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categorization_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-priority', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.23 on 2026-10-18 23:59
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0004_categorizationrule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=7)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('description', models.TextField()),
+                ('frequency', models.CharField(choices=[('daily', 'Diaria'), ('weekly', 'Semanal'), ('monthly', 'Mensual'), ('yearly', 'Anual')], default='monthly', max_length=7)),
+                ('interval', models.PositiveIntegerField(default=1, help_text='Cada cuántos períodos se repite (ej: 2 = cada dos meses)', validators=[django.core.validators.MinValueValidator(1)])),
+                ('start_date', models.DateField(help_text='Primera ocurrencia; las mensuales y anuales se repiten en este mismo día')),
+                ('end_date', models.DateField(blank=True, help_text='Última fecha posible (vacío = sin fin)', null=True)),
+                ('next_run_date', models.DateField(blank=True, editable=False, help_text='Próxima ocurrencia pendiente (vacío = finalizada)', null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['next_run_date', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_transactions', to='transactions.category'),
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurring',
+            field=models.ForeignKey(blank=True, help_text='Transacción recurrente que generó esta ocurrencia', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='transactions.recurringtransaction'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('recurring', 'date'), name='unique_recurring_occurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringtransaction',
+            index=models.Index(fields=['is_active', 'next_run_date'], name='recurring_due_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:09
+
+import currencies.models
+import django.core.validators
+from django.db import migrations, models
+
+
+def fill_base_amount(apps, schema_editor):
+    # Las transacciones existentes están en la moneda por defecto, que es la moneda base de todos los usuarios
+    Transaction = apps.get_model('transactions', 'Transaction')
+    Transaction.objects.update(base_amount=models.F('amount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_recurringtransaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='currency',
+            field=models.CharField(default=currencies.models.default_currency, max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}$', 'Código de moneda inválido. Use el código ISO 4217 de tres letras (ej: USD, EUR).')]),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='base_amount',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='Importe convertido a la moneda base del usuario', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default=currencies.models.default_currency, max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}$', 'Código de moneda inválido. Use el código ISO 4217 de tres letras (ej: USD, EUR).')]),
+        ),
+        migrations.RunPython(fill_base_amount, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='transaction',
+            name='base_amount',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='Importe convertido a la moneda base del usuario', max_digits=12),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_closure_rows(apps, schema_editor):
+    # Las categorías existentes son raíces: solo el camino de cada una consigo misma
+    Category = apps.get_model('transactions', 'Category')
+    CategoryClosure = apps.get_model('transactions', 'CategoryClosure')
+    CategoryClosure.objects.bulk_create(
+        CategoryClosure(ancestor_id=category_id, descendant_id=category_id, depth=0)
+        for category_id in Category.objects.values_list('id', flat=True).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_transaction_currency_base_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Categoría padre (vacío = categoría raíz)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='transactions.category'),
+        ),
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='transactions.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='transactions.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='category_closure_desc_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categoryclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_category_closure'),
+        ),
+        migrations.RunPython(create_closure_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-19 02:04
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_category_hierarchy'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='categoryanalysis',
+            name='top_transactions',
+            field=models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+    ]
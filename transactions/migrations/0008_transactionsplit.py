@@ -0,0 +1,32 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_alter_categoryanalysis_top_transactions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSplit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Importe en la moneda de la transacción', max_digits=10)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='splits', to='transactions.category')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='splits', to='transactions.transaction')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['category', 'transaction'], name='transaction_split_category_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transactionsplit',
+            constraint=models.UniqueConstraint(fields=('transaction', 'category'), name='unique_transaction_split_category'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:25
+
+import currencies.models
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0008_transactionsplit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Account',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('currency', models.CharField(default=currencies.models.default_currency, help_text='Moneda de la cuenta; sus transacciones deben estar en esta moneda', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}$', 'Código de moneda inválido. Use el código ISO 4217 de tres letras (ej: USD, EUR).')])),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=0, help_text='Saldo anterior a la primera transacción', max_digits=14)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Último día del mes')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['account', 'date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='accountcheckpoint',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='transactions.account'),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accounts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_transactions', to='transactions.account'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='transactions.account'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'date'], name='transaction_account_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountcheckpoint',
+            constraint=models.UniqueConstraint(fields=('account', 'date'), name='unique_account_checkpoint'),
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_account_name'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-19 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_transaction_amount_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='sync_version',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Versión de sincronización del último cambio'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='sync_version',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Versión de sincronización del último cambio'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['user', 'sync_version'], name='category_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'sync_version'], name='transaction_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-19 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0012_transaction_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionrollup',
+            name='last_date',
+            field=models.DateField(blank=True, help_text='Fecha de la última transacción del mes', null=True),
+        ),
+    ]
@@ -1,64 +1,226 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MinValueValidator
+from django.db import models, transaction as db_transaction
+from currencies.models import default_currency, validate_currency_code
+from sync.models import SyncTrackedModel
 from django.contrib.auth.models import User
-from django.db.models import Sum, Count, Avg
+from django.db.models import Sum, Count, Avg, DecimalField, ExpressionWrapper, Func, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from financetracker.memo import memoize
 
+CENT = Decimal('0.01')
 
-class Category(models.Model):
+
+class CategoryQuerySet(models.QuerySet):
+    def with_metrics(self, transaction_type=None, start_date=None, end_date=None):
+        """
+        Anota cada categoría con el total y la cantidad de sus asignaciones en el período.
+
+        Toda la lista se resuelve en una consulta, con subconsultas correlacionadas
+        que recorren por índice las transacciones no divididas de cada categoría
+        y las líneas de división asignadas a ella (las líneas sin categoría, a la
+        de su transacción, igual que `allocation_category()`). `get_metrics()` con
+        el mismo período usa estas anotaciones.
+        """
+        from .splits import split_amount
+
+        direct = Transaction.objects.filter(
+            category=OuterRef('pk'), splits__isnull=True, **_period_filters(transaction_type, start_date, end_date)
+        ).order_by().values('category')
+        lines = TransactionSplit.objects.filter(
+            Q(category=OuterRef('pk')) | Q(category__isnull=True, transaction__category=OuterRef('pk')),
+            **_period_filters(transaction_type, start_date, end_date, 'transaction__')
+        ).order_by()
+        amount = DecimalField(max_digits=14, decimal_places=2)
+        # Las líneas de una categoría pueden tener categoría propia o vacía: se suman sin GROUP BY
+        lines_total = Func(split_amount(), function='SUM', output_field=amount)
+        lines_count = Func('id', function='COUNT', output_field=IntegerField())
+        return self.annotate(
+            metrics_total=ExpressionWrapper(
+                Coalesce(Subquery(direct.annotate(total=Sum('base_amount')).values('total')), Value(0), output_field=amount)
+                + Coalesce(Subquery(lines.annotate(total=lines_total).values('total')), Value(0), output_field=amount),
+                output_field=amount,
+            ),
+            metrics_count=ExpressionWrapper(
+                Coalesce(Subquery(direct.annotate(count=Count('id')).values('count')), Value(0))
+                + Coalesce(Subquery(lines.annotate(count=lines_count).values('count')), Value(0)),
+                output_field=IntegerField(),
+            ),
+            metrics_key=Value(_metrics_key(transaction_type, start_date, end_date)),
+        )
+
+
+class Category(SyncTrackedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories')
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children', help_text='Categoría padre (vacío = categoría raíz)')
     name = models.CharField(max_length=100, unique=True)
     color = models.CharField(max_length=7, default='#3B82F6', help_text='Color hexadecimal para la categoría')
     icon = models.CharField(max_length=50, blank=True, help_text='Nombre del icono (ej: shopping-cart, food, etc.)')
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Categories'
         unique_together = ['user', 'name']
+        indexes = [
+            models.Index(fields=['user', 'sync_version'], name='category_sync_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        from .hierarchy import insert_node, move_node
+
+        creating = self._state.adding
+        previous_parent_id = None
+        if not creating:
+            previous_parent_id = Category.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                insert_node(self)
+            elif previous_parent_id != self.parent_id:
+                move_node(self)
+
+    def allocated_transactions(self):
+        """
+        Transacciones con importe asignado a esta categoría, anotadas con `allocation_amount`.
+
+        Incluye las líneas de las transacciones divididas (una fila por línea
+        asignada a la categoría, con su parte del importe).
+        """
+        from .splits import allocated_to
+        return allocated_to(Transaction.objects.filter(user_id=self.user_id), self.id)
+
+    def get_metrics(self, transaction_type=None, start_date=None, end_date=None, request=None):
+        """
+        Total, cantidad y promedio de las asignaciones de la categoría en un período, en una sola consulta.
+
+        El resultado se memoiza en la instancia y, si se indica `request`, en la
+        petición por (categoría, tipo, inicio, fin). Las categorías obtenidas con
+        `with_metrics()` para el mismo período no consultan la base de datos.
+        """
+        key = _metrics_key(transaction_type, start_date, end_date)
+        if getattr(self, 'metrics_key', None) == key:
+            return _metrics(self.metrics_total, self.metrics_count)
+
+        def compute():
+            queryset = self.allocated_transactions().filter(**_period_filters(transaction_type, start_date, end_date))
+            totals = queryset.aggregate(total=Sum('allocation_amount'), count=Count('id'))
+            return _metrics(totals['total'], totals['count'])
+
+        if request is not None:
+            return memoize(request, ('category_metrics', self.pk, key), compute)
+        cache = self.__dict__.setdefault('_metrics_cache', {})
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
     def get_total_amount(self, transaction_type=None, start_date=None, end_date=None):
         """Obtiene el total de transacciones para esta categoría en un período específico"""
-        queryset = self.transactions.all()
-        
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-            
-        return queryset.aggregate(total=Sum('amount'))['total'] or 0
+        return self.get_metrics(transaction_type, start_date, end_date)['total']
 
     def get_transaction_count(self, transaction_type=None, start_date=None, end_date=None):
         """Obtiene el número de transacciones para esta categoría en un período específico"""
-        queryset = self.transactions.all()
-        
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-            
-        return queryset.count()
+        return self.get_metrics(transaction_type, start_date, end_date)['count']
 
     def get_average_amount(self, transaction_type=None, start_date=None, end_date=None):
         """Obtiene el promedio de transacciones para esta categoría en un período específico"""
-        queryset = self.transactions.all()
-        
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-            
-        return queryset.aggregate(average=Avg('amount'))['average'] or 0
+        return self.get_metrics(transaction_type, start_date, end_date)['average']
+
+
+def _period_filters(transaction_type=None, start_date=None, end_date=None, prefix=''):
+    filters = {}
+    if transaction_type:
+        filters[f'{prefix}transaction_type'] = transaction_type
+    if start_date:
+        filters[f'{prefix}date__gte'] = start_date
+    if end_date:
+        filters[f'{prefix}date__lte'] = end_date
+    return filters
+
+
+def _metrics_key(transaction_type, start_date, end_date):
+    return f'{transaction_type or ""}|{start_date or ""}|{end_date or ""}'
+
+
+def _metrics(total, count):
+    # SQLite suma los decimales como float: se redondea a centavos
+    total = Decimal(total or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+    average = (total / count).quantize(CENT, rounding=ROUND_HALF_UP) if count else Decimal(0)
+    return {'total': total, 'count': count, 'average': average}
+
+
+class CategoryClosure(models.Model):
+    """
+    Tabla de clausura de la jerarquía de categorías.
 
+    Guarda un par (ancestro, descendiente) por cada camino del árbol, incluido
+    el de cada categoría consigo misma (profundidad 0), de modo que el subárbol
+    de una categoría se obtiene con un solo join.
+    """
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
 
-class Transaction(models.Model):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_category_closure'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='category_closure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
+
+
+class Account(models.Model):
+    """Cuenta (banco, efectivo, tarjeta) a la que pertenecen las transacciones"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='accounts')
+    name = models.CharField(max_length=100)
+    currency = models.CharField(max_length=3, default=default_currency, validators=[validate_currency_code], help_text='Moneda de la cuenta; sus transacciones deben estar en esta moneda')
+    opening_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text='Saldo anterior a la primera transacción')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_account_name'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.currency})'
+
+
+class AccountCheckpoint(models.Model):
+    """
+    Saldo acumulado de una cuenta al cierre de un mes (sin el saldo inicial).
+
+    Hay un punto de control por cada mes con transacciones, así el saldo a una
+    fecha es el último punto de control anterior más las transacciones de ese mes.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='checkpoints')
+    date = models.DateField(help_text='Último día del mes')
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['account', 'date']
+        constraints = [
+            # También es el índice para buscar el último punto de control anterior a una fecha
+            models.UniqueConstraint(fields=['account', 'date'], name='unique_account_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f'{self.account_id} @ {self.date}: {self.balance}'
+
+
+class Transaction(SyncTrackedModel):
     TRANSACTION_TYPE_CHOICES = (
         ('income', 'Income'),
         ('expense', 'Expense'),
@@ -66,19 +228,207 @@ class Transaction(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
+    account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     transaction_type = models.CharField(max_length=7, choices=TRANSACTION_TYPE_CHOICES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=default_currency, validators=[validate_currency_code])
+    base_amount = models.DecimalField(max_digits=12, decimal_places=2, editable=False, help_text='Importe convertido a la moneda base del usuario')
     date = models.DateField()
     description = models.TextField()
+    recurring = models.ForeignKey('RecurringTransaction', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences', help_text='Transacción recurrente que generó esta ocurrencia')
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date', '-created_at']
+        constraints = [
+            # Clave de ocurrencia: el programador puede re-ejecutarse sin duplicar transacciones
+            models.UniqueConstraint(fields=['recurring', 'date'], name='unique_recurring_occurrence'),
+        ]
+        indexes = [
+            # Transacciones de una cuenta desde su último punto de control de saldo
+            models.Index(fields=['account', 'date'], name='transaction_account_date_idx'),
+            # Mayores importes del usuario y de una categoría (largest_transactions de las estadísticas) sin ordenar
+            # todo el historial; los rankings por categoría ordenan por el importe asignado, que no está indexado
+            models.Index(fields=['user', 'base_amount'], name='transaction_user_amount_idx'),
+            models.Index(fields=['user', 'category', 'base_amount'], name='transaction_cat_amount_idx'),
+            # Cambios desde una sincronización anterior
+            models.Index(fields=['user', 'sync_version'], name='transaction_sync_idx'),
+            # Consultas por rango de fechas del usuario sin recorrer los demás años
+            models.Index(fields=['user', 'date'], name='transaction_user_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.description} - {self.amount}'
 
+    def save(self, *args, **kwargs):
+        from .balances import BALANCE_FIELDS, apply_balance_changes, balance_changes
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'amount', 'currency', 'date'} & set(update_fields):
+            from currencies.rates import convert, get_base_currency
+            self.base_amount = convert(self.amount, self.currency, get_base_currency(self.user), self.date)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'base_amount'}
+
+        if update_fields is not None and not {'account_id', *BALANCE_FIELDS} & set(update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        previous = None
+        if not self._state.adding:
+            previous = Transaction.objects.filter(pk=self.pk).values_list(*BALANCE_FIELDS).first()
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+            apply_balance_changes(balance_changes(previous, self))
+
+
+class TransactionSplit(models.Model):
+    """
+    Línea de división de una transacción: parte de su importe asignada a una categoría.
+
+    Una transacción dividida no tiene categoría propia; sus líneas suman el
+    importe de la transacción (en su misma moneda) y los agregados por
+    categoría cuentan cada línea en su categoría, con la parte proporcional de
+    `base_amount`.
+    """
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='splits')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='splits')
+    amount = models.DecimalField(max_digits=10, decimal_places=2, help_text='Importe en la moneda de la transacción')
+    description = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            # También sirve de índice para el join desde la transacción
+            models.UniqueConstraint(fields=['transaction', 'category'], name='unique_transaction_split_category'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'transaction'], name='transaction_split_category_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.transaction_id} -> {self.category_id}: {self.amount}'
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Transacción de un año cerrado movida al archivo (comando `archive_transactions`).
+
+    Conserva el id y los campos de la transacción original; las líneas de
+    división se guardan embebidas en `splits` con la misma forma que en la API.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_transactions')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    recurring_id = models.BigIntegerField(null=True, blank=True)
+    transaction_type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3)
+    base_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    date = models.DateField()
+    description = models.TextField()
+    splits = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', 'date'], name='archived_user_date_idx'),
+            # Saldos de las cuentas en fechas archivadas
+            models.Index(fields=['account', 'date'], name='archived_account_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.description} - {self.amount}'
+
+
+class TransactionRollup(models.Model):
+    """Totales mensuales de las transacciones archivadas por categoría y tipo, en la moneda base"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transaction_rollups')
+    month = models.DateField(help_text='Primer día del mes')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    transaction_type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField()
+    last_date = models.DateField(null=True, blank=True, help_text='Fecha de la última transacción del mes')
+
+    class Meta:
+        ordering = ['month']
+        indexes = [
+            models.Index(fields=['user', 'month'], name='rollup_user_month_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} - {self.month:%Y-%m} - {self.transaction_type}: {self.total}'
+
+
+class TransactionArchive(models.Model):
+    """Horizonte del archivo de un usuario: sus transacciones hasta `archived_until` pueden estar archivadas"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='transaction_archive')
+    archived_until = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user.username} - {self.archived_until}'
+
+
+class RecurringTransaction(models.Model):
+    """Plantilla de transacción que se repite según una frecuencia (salario, alquiler, suscripciones)"""
+    FREQUENCY_CHOICES = (
+        ('daily', 'Diaria'),
+        ('weekly', 'Semanal'),
+        ('monthly', 'Mensual'),
+        ('yearly', 'Anual'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_transactions')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='recurring_transactions')
+    account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='recurring_transactions')
+    transaction_type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=default_currency, validators=[validate_currency_code])
+    description = models.TextField()
+    frequency = models.CharField(max_length=7, choices=FREQUENCY_CHOICES, default='monthly')
+    interval = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)], help_text='Cada cuántos períodos se repite (ej: 2 = cada dos meses)')
+    start_date = models.DateField(help_text='Primera ocurrencia; las mensuales y anuales se repiten en este mismo día')
+    end_date = models.DateField(null=True, blank=True, help_text='Última fecha posible (vacío = sin fin)')
+    next_run_date = models.DateField(null=True, blank=True, editable=False, help_text='Próxima ocurrencia pendiente (vacío = finalizada)')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_run_date', 'id']
+        indexes = [
+            # El programador solo recorre las plantillas vencidas
+            models.Index(fields=['is_active', 'next_run_date'], name='recurring_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.description} ({self.get_frequency_display()})'
+
+
+class CategorizationRule(models.Model):
+    """Regla para asignar automáticamente una categoría a las transacciones"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categorization_rules')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='rules')
+    keyword = models.CharField(max_length=100, blank=True, help_text='Texto a buscar en la descripción (sin distinguir mayúsculas ni acentos)')
+    transaction_type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPE_CHOICES, blank=True, help_text='Tipo de transacción al que aplica (vacío = ambos)')
+    min_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    priority = models.IntegerField(default=0, help_text='Ante varias reglas coincidentes gana la de mayor prioridad')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-priority', 'id']
+
+    def __str__(self):
+        return f'{self.keyword or "*"} -> {self.category.name}'
+
 
 class CategoryAnalysis(models.Model):
     """Modelo para almacenar análisis precalculados por categoría"""
@@ -104,7 +454,7 @@ class CategoryAnalysis(models.Model):
     percentage_of_total = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     
     # Datos adicionales
-    top_transactions = models.JSONField(default=list, blank=True)
+    top_transactions = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
     trend_data = models.JSONField(default=dict, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -121,19 +471,15 @@ class CategoryAnalysis(models.Model):
     def generate_analysis(cls, user, category, period, start_date, end_date):
         """Genera un análisis para una categoría específica en un período dado"""
         # Obtener transacciones del período
-        transactions = Transaction.objects.filter(
-            user=user,
-            category=category,
-            date__range=[start_date, end_date]
-        )
+        transactions = category.allocated_transactions().filter(date__range=[start_date, end_date])
         
-        # Calcular métricas
+        # Calcular métricas (las transacciones divididas cuentan solo su parte asignada)
         total_income = transactions.filter(transaction_type='income').aggregate(
-            total=Sum('amount'))['total'] or 0
+            total=Sum('allocation_amount'))['total'] or 0
         total_expenses = transactions.filter(transaction_type='expense').aggregate(
-            total=Sum('amount'))['total'] or 0
+            total=Sum('allocation_amount'))['total'] or 0
         transaction_count = transactions.count()
-        average_amount = transactions.aggregate(avg=Avg('amount'))['avg'] or 0
+        average_amount = transactions.aggregate(avg=Avg('allocation_amount'))['avg'] or 0
         
         # Calcular porcentaje del total (solo para gastos)
         if total_expenses > 0:
@@ -141,14 +487,14 @@ class CategoryAnalysis(models.Model):
                 user=user,
                 transaction_type='expense',
                 date__range=[start_date, end_date]
-            ).aggregate(total=Sum('amount'))['total'] or 0
+            ).aggregate(total=Sum('base_amount'))['total'] or 0
             percentage_of_total = (total_expenses / total_user_expenses * 100) if total_user_expenses > 0 else 0
         else:
             percentage_of_total = 0
         
         # Obtener transacciones más importantes
-        top_transactions = list(transactions.order_by('-amount')[:5].values(
-            'id', 'amount', 'transaction_type', 'date', 'description'
+        top_transactions = list(transactions.order_by('-allocation_amount')[:5].values(
+            'id', 'amount', 'currency', 'base_amount', 'allocation_amount', 'transaction_type', 'date', 'description'
         ))
         
         # Crear o actualizar el análisis
@@ -0,0 +1,134 @@
+"""
+Rankings y percentiles del importe de las transacciones por categoría.
+
+Ambos se calculan para todas las categorías en una sola consulta con funciones
+de ventana particionadas por la categoría de cada asignación (`ROW_NUMBER` y
+`COUNT(*) OVER`), filtrando en la base de datos las filas que hacen falta: las
+K primeras de cada categoría o las dos vecinas de cada percentil. Si la base
+de datos no soporta funciones de ventana (SQLite anterior a 3.25), se recorre
+un cursor ordenado por categoría e importe y se calcula en streaming, con una
+sola categoría en memoria a la vez.
+
+Los percentiles interpolan linealmente entre las posiciones vecinas, igual que
+`PERCENTILE_CONT`: el percentil p de n importes ordenados cae en la posición
+p * (n - 1) / 100 (contando desde 0).
+
+Las ventanas ordenan por el importe asignado a cada categoría, que se calcula
+en la consulta a partir de las líneas de las transacciones divididas, por lo
+que ningún índice evita ese orden; los índices por importe de Transaction solo
+sirven a `largest_transactions` de las estadísticas.
+"""
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import F, FloatField, IntegerField, Q, Window
+from django.db.models import Count, ExpressionWrapper
+from django.db.models.functions import Cast, RowNumber
+
+from .splits import allocations
+
+PERCENTILES = (50, 90)
+CENT = Decimal('0.01')
+
+
+def _supports_windows(queryset):
+    return connections[queryset.db].features.supports_over_clause
+
+
+def _amount_order():
+    # SQLite genera un ORDER BY inválido dentro de OVER para expresiones decimales: se ordena por su valor float
+    return Cast('allocation_amount', FloatField())
+
+
+def top_per_category(transactions, limit, fields=(), rollup=False):
+    """
+    Las `limit` asignaciones de mayor importe de cada categoría, en orden.
+
+    Devuelve `{categoría: [filas]}`; cada fila tiene `allocation_category`,
+    `allocation_amount` y los `fields` pedidos de la transacción.
+    """
+    columns = ('allocation_category', 'allocation_amount', *fields)
+    queryset = allocations(transactions, rollup)
+    result = {}
+    if _supports_windows(queryset):
+        rows = queryset.annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('allocation_category')],
+            order_by=[_amount_order().desc(), F('id').desc()],
+        )).filter(rank__lte=limit).values(*columns, 'rank').order_by()
+        for row in rows:
+            result.setdefault(row['allocation_category'], []).append(row)
+        for group in result.values():
+            group.sort(key=lambda row: row['rank'])
+            for row in group:
+                del row['rank']
+        return result
+
+    rows = queryset.values(*columns).order_by('allocation_category', '-allocation_amount', '-id')
+    for row in rows.iterator():
+        group = result.setdefault(row['allocation_category'], [])
+        if len(group) < limit:
+            group.append(row)
+    return result
+
+
+def _interpolate(values, size, percentile):
+    """Percentil de `size` importes ordenados; `values` son los importes por posición (desde 0)"""
+    position, remainder = divmod((size - 1) * percentile, 100)
+    lower = Decimal(values[position])
+    if not remainder:
+        return lower.quantize(CENT)
+    upper = Decimal(values[position + 1])
+    return (lower + (upper - lower) * remainder / 100).quantize(CENT)
+
+
+def percentiles_per_category(transactions, percentiles=PERCENTILES, rollup=False):
+    """
+    Percentiles del importe de las asignaciones de cada categoría.
+
+    Devuelve `{categoría: {'count': n, 'percentiles': {p: importe}}}`; los
+    percentiles son enteros entre 0 y 100.
+    """
+    queryset = allocations(transactions, rollup)
+    result = {}
+    if _supports_windows(queryset):
+        partition = [F('allocation_category')]
+        queryset = queryset.annotate(
+            position=Window(RowNumber(), partition_by=partition, order_by=[_amount_order().asc(), F('id').asc()]),
+            size=Window(Count('id'), partition_by=partition),
+        )
+        # Solo las dos posiciones vecinas de cada percentil (ROW_NUMBER empieza en 1)
+        wanted = Q()
+        for percentile in percentiles:
+            lower = ExpressionWrapper((F('size') - 1) * percentile / 100, output_field=IntegerField())
+            wanted |= Q(position=lower + 1) | Q(position=lower + 2)
+        groups = {}
+        for row in queryset.filter(wanted).values('allocation_category', 'allocation_amount', 'position', 'size').order_by():
+            group = groups.setdefault(row['allocation_category'], {'size': row['size'], 'values': {}})
+            group['values'][row['position'] - 1] = row['allocation_amount']
+        for category, group in groups.items():
+            result[category] = {
+                'count': group['size'],
+                'percentiles': {
+                    percentile: _interpolate(group['values'], group['size'], percentile) for percentile in percentiles
+                },
+            }
+        return result
+
+    def close(category, values):
+        result[category] = {
+            'count': len(values),
+            'percentiles': {percentile: _interpolate(values, len(values), percentile) for percentile in percentiles},
+        }
+
+    current, values = None, []
+    rows = queryset.values_list('allocation_category', 'allocation_amount').order_by('allocation_category', 'allocation_amount')
+    for category, amount in rows.iterator():
+        if values and category != current:
+            close(current, values)
+            values = []
+        current = category
+        values.append(amount)
+    if values:
+        close(current, values)
+    return result
@@ -0,0 +1,181 @@
+"""
+Programación y materialización de transacciones recurrentes.
+
+Cada plantilla guarda su próxima ocurrencia pendiente (`next_run_date`),
+indexada junto con `is_active`, de modo que el programador solo lee las
+plantillas vencidas. Las ocurrencias se calculan siempre a partir de
+`start_date` (no de la anterior), así una mensual del día 31 cae el 28/29 en
+febrero y vuelve al 31 en marzo.
+
+La materialización es idempotente: la restricción única (recurring, date) de
+Transaction actúa como clave de ocurrencia y `bulk_create(ignore_conflicts=True)`
+descarta las ya creadas si una ejecución se repite o se interrumpe a medias.
+Una plantilla en una moneda sin tipos de cambio se saltea (queda vencida y se
+reintenta en la próxima ejecución) sin frenar las de los demás usuarios.
+"""
+import logging
+from calendar import monthrange
+from datetime import date, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+from changelog import log as changelog
+from currencies.rates import MissingExchangeRate, get_base_currencies
+from sync.versions import bump_versions
+from .balances import apply_balance_changes, transaction_changes
+from .currency import fill_base_amounts
+from .models import RecurringTransaction, Transaction
+
+logger = logging.getLogger(__name__)
+
+DAYS_PER_PERIOD = {'daily': 1, 'weekly': 7}
+MONTHS_PER_PERIOD = {'monthly': 1, 'yearly': 12}
+
+
+def _add_months(value, months, day):
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    return date(year, month, min(day, monthrange(year, month)[1]))
+
+
+def occurrence(schedule, index):
+    """Fecha de la ocurrencia número `index` (0 = start_date)"""
+    if schedule.frequency in DAYS_PER_PERIOD:
+        return schedule.start_date + timedelta(days=DAYS_PER_PERIOD[schedule.frequency] * schedule.interval * index)
+    months = MONTHS_PER_PERIOD[schedule.frequency] * schedule.interval * index
+    return _add_months(schedule.start_date, months, schedule.start_date.day)
+
+
+def _first_index_on_or_after(schedule, value):
+    start = schedule.start_date
+    if value <= start:
+        return 0
+    if schedule.frequency in DAYS_PER_PERIOD:
+        step = DAYS_PER_PERIOD[schedule.frequency] * schedule.interval
+        return -(-(value - start).days // step)
+    step = MONTHS_PER_PERIOD[schedule.frequency] * schedule.interval
+    index = ((value.year - start.year) * 12 + value.month - start.month) // step
+    while occurrence(schedule, index) < value:
+        index += 1
+    return index
+
+
+def next_occurrence(schedule, on_or_after):
+    """Primera ocurrencia en o después de `on_or_after`, o None si la plantilla ya terminó"""
+    result = occurrence(schedule, _first_index_on_or_after(schedule, on_or_after))
+    if schedule.end_date and result > schedule.end_date:
+        return None
+    return result
+
+
+def due_occurrences(schedule, until):
+    """Ocurrencias pendientes hasta `until` (inclusive) y la siguiente a ellas"""
+    dates = []
+    index = _first_index_on_or_after(schedule, schedule.next_run_date)
+    current = occurrence(schedule, index)
+    while current <= until and not (schedule.end_date and current > schedule.end_date):
+        dates.append(current)
+        index += 1
+        current = occurrence(schedule, index)
+    if schedule.end_date and current > schedule.end_date:
+        current = None
+    return dates, current
+
+
+def materialize_due(until=None, batch_size=1000):
+    """
+    Crea las transacciones de todas las ocurrencias vencidas hasta `until`.
+
+    Procesa las plantillas vencidas por bloques: un SELECT por el índice de
+    próxima ejecución, un `bulk_create` con todas las ocurrencias del bloque y
+    un UPDATE de `next_run_date` por fecha, todo en una transacción de base de datos.
+    Devuelve `(plantillas procesadas, ocurrencias materializadas)`; las
+    ocurrencias que ya existían se ignoran sin error. Las plantillas sin tipo
+    de cambio para su moneda se registran en el log y no cuentan como procesadas.
+    """
+    from .signals import transactions_bulk_changed
+
+    until = until or timezone.localdate()
+    processed = materialized = 0
+    skipped = set()
+    while True:
+        with db_transaction.atomic():
+            schedules = list(
+                RecurringTransaction.objects.select_for_update(skip_locked=True)
+                .filter(is_active=True, next_run_date__lte=until)
+                .exclude(id__in=skipped)
+                .order_by('next_run_date', 'id')[:batch_size]
+            )
+            if not schedules:
+                break
+
+            transactions = []
+            next_runs = {}
+            base_currencies = get_base_currencies(schedule.user_id for schedule in schedules)
+            sync_versions = bump_versions(schedule.user_id for schedule in schedules)
+            for schedule in schedules:
+                dates, next_run_date = due_occurrences(schedule, until)
+                occurrences = [
+                    Transaction(
+                        user_id=schedule.user_id,
+                        category_id=schedule.category_id,
+                        account_id=schedule.account_id,
+                        transaction_type=schedule.transaction_type,
+                        amount=schedule.amount,
+                        currency=schedule.currency,
+                        date=occurrence_date,
+                        description=schedule.description,
+                        recurring_id=schedule.id,
+                        sync_version=sync_versions[schedule.user_id],
+                    )
+                    for occurrence_date in dates
+                ]
+                try:
+                    fill_base_amounts(occurrences, base_currencies)
+                except MissingExchangeRate as error:
+                    # La plantilla queda vencida: se materializa cuando se carguen los tipos de cambio
+                    logger.warning('Transacción recurrente %s salteada: %s', schedule.id, error)
+                    skipped.add(schedule.id)
+                    continue
+                next_runs.setdefault(next_run_date, []).append(schedule.id)
+                transactions.extend(occurrences)
+            schedules = [schedule for schedule in schedules if schedule.id not in skipped]
+            if not schedules:
+                continue
+
+            # Solo las ocurrencias que no existían afectan el saldo de su cuenta
+            with_account = [transaction for transaction in transactions if transaction.account_id]
+            if with_account:
+                existing = set(Transaction.objects.filter(
+                    recurring_id__in={transaction.recurring_id for transaction in with_account},
+                    date__in={transaction.date for transaction in with_account},
+                ).values_list('recurring_id', 'date'))
+                with_account = [
+                    transaction for transaction in with_account
+                    if (transaction.recurring_id, transaction.date) not in existing
+                ]
+            Transaction.objects.bulk_create(transactions, batch_size=batch_size, ignore_conflicts=True)
+            # Con ignore_conflicts las instancias no reciben su id: las ocurrencias creadas son
+            # las de estas plantillas con la versión de sincronización recién asignada
+            created = Transaction.objects.filter(recurring_id__in=[schedule.id for schedule in schedules]).filter(
+                reduce(or_, (Q(user_id=user_id, sync_version=version) for user_id, version in sync_versions.items()))
+            )
+            created_rows = changelog.rows(created)
+            changelog.record(Transaction, [(None, row) for row in created_rows.values()])
+            apply_balance_changes(transaction_changes(with_account))
+            # Las plantillas de un bloque suelen compartir la próxima fecha: un UPDATE por fecha
+            now = timezone.now()
+            for next_run_date, ids in next_runs.items():
+                RecurringTransaction.objects.filter(id__in=ids).update(next_run_date=next_run_date, updated_at=now)
+            processed += len(schedules)
+            materialized += len(created_rows)
+
+            if transactions:
+                transactions_bulk_changed.send(
+                    sender=Transaction, user_ids=[schedule.user_id for schedule in schedules]
+                )
+    return processed, materialized
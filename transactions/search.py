@@ -0,0 +1,161 @@
+"""
+Búsqueda de texto completo sobre la descripción de las transacciones.
+
+- SQLite: tabla virtual FTS5 de contenido externo, mantenida con triggers.
+- PostgreSQL: índice GIN sobre `to_tsvector('simple', description)`.
+- Otros motores (o SQLite sin FTS5): `icontains` por término.
+
+Cada término de la búsqueda se trata como prefijo ("net" encuentra "netflix")
+y todos los términos deben aparecer. Los resultados se ordenan por relevancia.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'transactions_transaction'
+FTS_TABLE = 'transactions_transaction_fts'
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF description ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END
+    """,
+}
+
+POSTGRES_INDEX = 'transactions_transaction_description_fts'
+POSTGRES_VECTOR = f"to_tsvector('simple', \"{TABLE}\".\"description\")"
+
+_fts_available = {}
+
+
+def _sqlite_supports_fts5(db_connection):
+    with db_connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def create_search_index(db_connection):
+    """Crea el índice de texto completo (usado por la migración)"""
+    _fts_available.pop(db_connection.alias, None)
+
+    if db_connection.vendor == 'postgresql':
+        with db_connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON {TABLE} '
+                f"USING GIN (to_tsvector('simple', description))"
+            )
+        return
+
+    if db_connection.vendor != 'sqlite' or not _sqlite_supports_fts5(db_connection):
+        return
+
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            f"description, content='{TABLE}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+    repair_search_index(db_connection)
+
+
+def repair_search_index(db_connection):
+    """
+    Recrea los triggers de SQLite que falten y reconstruye el índice.
+
+    Las migraciones que reconstruyen la tabla de transacciones en SQLite
+    eliminan sus triggers, por eso se ejecuta también después de cada `migrate`.
+    """
+    _fts_available.pop(db_connection.alias, None)
+    if db_connection.vendor != 'sqlite':
+        return
+
+    with db_connection.cursor() as cursor:
+        if FTS_TABLE not in db_connection.introspection.table_names(cursor):
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [TABLE]
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(db_connection):
+    """Elimina el índice de texto completo"""
+    _fts_available.pop(db_connection.alias, None)
+
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX}')
+        elif db_connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def _uses_fts5():
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _fts_available:
+        _fts_available[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[connection.alias]
+
+
+def search_terms(text):
+    """Normaliza la búsqueda en una lista de términos"""
+    return re.findall(r'\w+', text.lower())
+
+
+def search_transactions(queryset, text):
+    """
+    Filtra el queryset por los términos de `text` y lo ordena por relevancia.
+
+    Se combina con cualquier otro filtro ya aplicado al queryset.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    if _uses_fts5():
+        match = ' '.join(f'"{term}"*' for term in terms)
+        matches = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        # bm25 devuelve valores negativos: más negativo es más relevante
+        rank = (
+            f'(SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{TABLE}"."id")'
+        )
+        return queryset.filter(id__in=RawSQL(matches, [match])).annotate(
+            search_rank=RawSQL(rank, [match], output_field=FloatField())
+        ).order_by('search_rank', *queryset.model._meta.ordering)
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.filter(
+            RawSQL(f"{POSTGRES_VECTOR} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({POSTGRES_VECTOR}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField()
+            )
+        ).order_by('-search_rank', *queryset.model._meta.ordering)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(description__icontains=term)
+    return queryset.filter(condition)
@@ -1,6 +1,30 @@
+from django.db import transaction as db_transaction
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
-from .models import Category, Transaction, CategoryAnalysis
+from drf_spectacular.utils import extend_schema_field, extend_schema_serializer, OpenApiExample
+from currencies.serializers import CurrencyField
+from .models import (
+    Account, ArchivedTransaction, Category, CategoryClosure, Transaction, TransactionRollup, TransactionSplit,
+    RecurringTransaction, CategorizationRule, CategoryAnalysis
+)
+from .signals import transactions_bulk_changed
+
+
+def _owner_id(serializer):
+    """
+    Usuario dueño de lo que valida el serializer: el del objeto editado o, al crear, el de la petición.
+
+    Los miembros de un hogar editan datos de otros miembros; las categorías y
+    cuentas referenciadas deben ser del mismo usuario que el objeto.
+    """
+    return getattr(serializer.root.instance, 'user_id', None) or serializer.context['request'].user.pk
+
+
+class CategoryMetricsSerializer(serializers.Serializer):
+    """Total, cantidad y promedio de las asignaciones de una categoría en un período"""
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    count = serializers.IntegerField()
+    average = serializers.DecimalField(max_digits=14, decimal_places=2)
+
 
 @extend_schema_serializer(
     examples=[
@@ -10,6 +34,7 @@ from .models import Category, Transaction, CategoryAnalysis
                 'id': 1,
                 'name': 'Alimentación',
                 'user': 1,
+                'parent': None,
                 'color': '#3B82F6',
                 'icon': 'shopping-cart'
             }
@@ -20,13 +45,90 @@ class CategorySerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Category.
     
-    Permite serializar y deserializar categorías de transacciones.
+    Permite serializar y deserializar categorías de transacciones. En el
+    listado con `metrics=true` incluye las métricas de cada categoría en el
+    período pedido.
     """
+    # Solo presente si la vista pone el período (tipo, inicio, fin) en el contexto como `metrics_period`
+    metrics = serializers.SerializerMethodField(help_text='Solo en el listado con metrics=true')
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'user', 'color', 'icon']
+        fields = ['id', 'name', 'user', 'parent', 'color', 'icon', 'metrics']
         read_only_fields = ['id', 'user']
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if 'metrics_period' not in self.context:
+            fields.pop('metrics')
+        return fields
+
+    @extend_schema_field(CategoryMetricsSerializer)
+    def get_metrics(self, obj):
+        # Las categorías anotadas con with_metrics() para el mismo período no consultan la base de datos
+        metrics = obj.get_metrics(*self.context['metrics_period'], request=self.context.get('request'))
+        return CategoryMetricsSerializer(metrics).data
+
+    def validate_parent(self, value):
+        if value is None:
+            return value
+        if value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La categoría padre no pertenece al usuario.')
+        if self.instance is not None and CategoryClosure.objects.filter(
+            ancestor=self.instance, descendant=value
+        ).exists():
+            raise serializers.ValidationError('Una categoría no puede ser subcategoría de sí misma ni de sus subcategorías.')
+        return value
+
+
+class AccountSerializer(serializers.ModelSerializer):
+    """
+    Serializer para el modelo Account.
+    
+    Permite definir las cuentas (banco, efectivo, tarjeta) a las que pertenecen las transacciones.
+    """
+    currency = CurrencyField(convertible=True)
+
+    class Meta:
+        model = Account
+        fields = ['id', 'user', 'name', 'currency', 'opening_balance', 'is_active', 'created_at']
+        read_only_fields = ['id', 'user', 'created_at']
+
+    def validate_name(self, value):
+        accounts = Account.objects.filter(user_id=_owner_id(self), name=value)
+        if self.instance is not None:
+            accounts = accounts.exclude(pk=self.instance.pk)
+        if accounts.exists():
+            raise serializers.ValidationError('Ya existe una cuenta con este nombre.')
+        return value
+
+    def validate_currency(self, value):
+        if self.instance is not None and value != self.instance.currency and self.instance.transactions.exists():
+            raise serializers.ValidationError('No se puede cambiar la moneda de una cuenta con transacciones.')
+        return value
+
+
+class TransactionSplitSerializer(serializers.ModelSerializer):
+    """
+    Serializer para el modelo TransactionSplit.
+    
+    Cada línea asigna parte del importe de la transacción (en su misma moneda) a una categoría.
+    """
+    class Meta:
+        model = TransactionSplit
+        fields = ['id', 'category', 'amount', 'description']
+        read_only_fields = ['id']
+
+    def validate_category(self, value):
+        if value is not None and value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La categoría no pertenece al usuario.')
+        return value
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('El importe de cada línea debe ser mayor que cero.')
+        return value
+
 
 @extend_schema_serializer(
     examples=[
@@ -38,6 +140,8 @@ class CategorySerializer(serializers.ModelSerializer):
                 'category': 1,
                 'transaction_type': 'income',
                 'amount': '1500.00',
+                'currency': 'USD',
+                'base_amount': '1500.00',
                 'date': '2024-01-15',
                 'description': 'Salario mensual',
                 'created_at': '2024-01-15T10:30:00Z',
@@ -52,11 +156,28 @@ class CategorySerializer(serializers.ModelSerializer):
                 'category': 2,
                 'transaction_type': 'expense',
                 'amount': '50.00',
+                'currency': 'EUR',
+                'base_amount': '54.35',
                 'date': '2024-01-15',
                 'description': 'Compra de comestibles',
                 'created_at': '2024-01-15T14:20:00Z',
                 'updated_at': '2024-01-15T14:20:00Z'
             }
+        ),
+        OpenApiExample(
+            'Transacción dividida',
+            value={
+                'transaction_type': 'expense',
+                'amount': '120.00',
+                'currency': 'USD',
+                'date': '2024-01-20',
+                'description': 'Hipermercado',
+                'splits': [
+                    {'category': 2, 'amount': '80.00', 'description': 'Comestibles'},
+                    {'category': 5, 'amount': '40.00', 'description': 'Limpieza'}
+                ]
+            },
+            request_only=True
         )
     ]
 )
@@ -65,11 +186,234 @@ class TransactionSerializer(serializers.ModelSerializer):
     Serializer para el modelo Transaction.
     
     Permite serializar y deserializar transacciones financieras (ingresos y gastos).
+    Una transacción puede dividirse en líneas (`splits`) que reparten su importe
+    entre varias categorías; en ese caso no tiene categoría propia.
     """
+    currency = CurrencyField(convertible=True)
+    splits = TransactionSplitSerializer(many=True, required=False)
+
     class Meta:
         model = Transaction
-        fields = ['id', 'user', 'category', 'transaction_type', 'amount', 'date', 'description', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'category', 'account', 'transaction_type', 'amount', 'currency', 'base_amount', 'date', 'description', 'splits', 'recurring', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'base_amount', 'recurring', 'created_at', 'updated_at']
+
+    def validate_category(self, value):
+        if value is not None and value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La categoría no pertenece al usuario.')
+        return value
+
+    def validate_account(self, value):
+        if value is not None and value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La cuenta no pertenece al usuario.')
+        return value
+
+    def validate(self, attrs):
+        account = attrs.get('account', getattr(self.instance, 'account', None))
+        currency = attrs.get('currency', getattr(self.instance, 'currency', None))
+        if account is not None and currency != account.currency:
+            raise serializers.ValidationError({'currency': 'La moneda de la transacción debe coincidir con la de la cuenta.'})
+
+        splits = attrs.get('splits')
+        if splits is None:
+            # Sin líneas nuevas, una transacción ya dividida debe seguir cuadrando con ellas
+            if self.instance is not None and self.instance.splits.all():
+                if 'amount' in attrs and attrs['amount'] != self.instance.amount:
+                    raise serializers.ValidationError(
+                        'Para cambiar el importe de una transacción dividida se deben enviar sus líneas.')
+                if attrs.get('category') is not None:
+                    raise serializers.ValidationError(
+                        'Una transacción dividida no tiene categoría propia; envíe splits vacío para quitar la división.')
+            return attrs
+        if not splits:
+            return attrs
+
+        if len(splits) < 2:
+            raise serializers.ValidationError({'splits': 'Una transacción dividida necesita al menos dos líneas.'})
+        amount = attrs.get('amount', getattr(self.instance, 'amount', None))
+        if sum(split['amount'] for split in splits) != amount:
+            raise serializers.ValidationError({'splits': 'Las líneas deben sumar el importe de la transacción.'})
+        categories = [split['category'].pk for split in splits if split.get('category') is not None]
+        if len(categories) != len(set(categories)):
+            raise serializers.ValidationError({'splits': 'Cada categoría puede aparecer en una sola línea.'})
+        if attrs.get('category') is not None:
+            raise serializers.ValidationError(
+                {'category': 'Una transacción dividida no tiene categoría propia; la indican sus líneas.'})
+        attrs['category'] = None
+        return attrs
+
+    def create(self, validated_data):
+        splits = validated_data.pop('splits', None)
+        with db_transaction.atomic():
+            instance = super().create(validated_data)
+            if splits:
+                self._replace_splits(instance, splits)
+        return instance
+
+    def update(self, instance, validated_data):
+        splits = validated_data.pop('splits', None)
+        with db_transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if splits is not None:
+                self._replace_splits(instance, splits)
+        return instance
+
+    def _replace_splits(self, instance, splits):
+        instance.splits.all().delete()
+        TransactionSplit.objects.bulk_create(TransactionSplit(transaction=instance, **split) for split in splits)
+        # Las líneas se escriben en bloque: el historial en memoria del usuario se recarga
+        transactions_bulk_changed.send(sender=Transaction, user_ids=[instance.user_id])
+
+
+class ArchivedTransactionSerializer(serializers.ModelSerializer):
+    """
+    Serializer de solo lectura para las transacciones archivadas, con la misma forma que TransactionSerializer.
+    """
+    recurring = serializers.IntegerField(source='recurring_id', read_only=True)
+    splits = serializers.JSONField(read_only=True)
+
+    class Meta:
+        model = ArchivedTransaction
+        fields = TransactionSerializer.Meta.fields
+        read_only_fields = fields
+
+
+class TransactionRollupSerializer(serializers.ModelSerializer):
+    """
+    Serializer para los totales mensuales de las transacciones archivadas.
+    """
+    class Meta:
+        model = TransactionRollup
+        fields = ['month', 'category', 'transaction_type', 'total', 'count', 'last_date']
+
+
+class TransactionFilterSerializer(serializers.Serializer):
+    """
+    Filtro de transacciones para las operaciones masivas (los mismos filtros del listado).
+    """
+    transaction_type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPE_CHOICES, required=False)
+    category = serializers.IntegerField(required=False)
+    account = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    search = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('El filtro debe indicar al menos un criterio.')
+        return attrs
+
+
+class TransactionSelectionSerializer(serializers.Serializer):
+    """
+    Selección de transacciones del usuario para una operación masiva: una lista de ids o un filtro.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    filter = TransactionFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Indique `ids` o `filter` (solo uno de los dos).')
+        return attrs
+
+
+class TransactionChangesSerializer(serializers.Serializer):
+    """
+    Campos que una actualización masiva puede cambiar.
+    """
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), allow_null=True, required=False)
+    account = serializers.PrimaryKeyRelatedField(queryset=Account.objects.all(), allow_null=True, required=False)
+    transaction_type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPE_CHOICES, required=False)
+    description = serializers.CharField(allow_blank=True, required=False)
+
+    def validate_category(self, value):
+        if value is not None and value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La categoría no pertenece al usuario.')
+        return value
+
+    def validate_account(self, value):
+        if value is not None and value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La cuenta no pertenece al usuario.')
+        return value
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Indique al menos un campo a cambiar.')
+        return attrs
+
+
+class TransactionBulkUpdateSerializer(TransactionSelectionSerializer):
+    """
+    Actualización masiva: la selección de transacciones y los campos a cambiar.
+    """
+    changes = TransactionChangesSerializer()
+
+
+class RecurringTransactionSerializer(serializers.ModelSerializer):
+    """
+    Serializer para el modelo RecurringTransaction.
+    
+    Permite definir transacciones que se generan automáticamente con una
+    frecuencia diaria, semanal, mensual o anual.
+    """
+    currency = CurrencyField(convertible=True)
+
+    class Meta:
+        model = RecurringTransaction
+        fields = [
+            'id', 'user', 'category', 'account', 'transaction_type', 'amount', 'currency', 'description',
+            'frequency', 'interval', 'start_date', 'end_date', 'next_run_date',
+            'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'user', 'next_run_date', 'created_at', 'updated_at']
+
+    def validate_category(self, value):
+        if value is not None and value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La categoría no pertenece al usuario.')
+        return value
+
+    def validate_account(self, value):
+        if value is not None and value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La cuenta no pertenece al usuario.')
+        return value
+
+    def validate(self, attrs):
+        account = attrs.get('account', getattr(self.instance, 'account', None))
+        currency = attrs.get('currency', getattr(self.instance, 'currency', None))
+        if account is not None and currency != account.currency:
+            raise serializers.ValidationError({'currency': 'La moneda de la transacción debe coincidir con la de la cuenta.'})
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if end_date is not None and start_date is not None and end_date < start_date:
+            raise serializers.ValidationError('La fecha de fin no puede ser anterior a la fecha de inicio.')
+        return attrs
+
+
+class CategorizationRuleSerializer(serializers.ModelSerializer):
+    """
+    Serializer para el modelo CategorizationRule.
+    
+    Permite definir reglas de categorización automática por palabra clave,
+    tipo de transacción y rango de importe.
+    """
+    class Meta:
+        model = CategorizationRule
+        fields = [
+            'id', 'user', 'category', 'keyword', 'transaction_type',
+            'min_amount', 'max_amount', 'priority', 'is_active', 'created_at'
+        ]
+        read_only_fields = ['id', 'user', 'created_at']
+
+    def validate_category(self, value):
+        if value.user_id != _owner_id(self):
+            raise serializers.ValidationError('La categoría no pertenece al usuario.')
+        return value
+
+    def validate(self, attrs):
+        min_amount = attrs.get('min_amount', getattr(self.instance, 'min_amount', None))
+        max_amount = attrs.get('max_amount', getattr(self.instance, 'max_amount', None))
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            raise serializers.ValidationError('El importe mínimo no puede ser mayor que el máximo.')
+        return attrs
 
 
 class CategoryAnalysisSerializer(serializers.ModelSerializer):
@@ -97,6 +441,7 @@ class CategorySummarySerializer(serializers.Serializer):
     Serializer para resúmenes de categorías con métricas calculadas.
     """
     category_id = serializers.IntegerField()
+    parent_id = serializers.IntegerField(allow_null=True)
     category_name = serializers.CharField()
     category_color = serializers.CharField()
     category_icon = serializers.CharField()
@@ -122,7 +467,7 @@ class CategoryTrendSerializer(serializers.Serializer):
         help_text='Lista de puntos de datos con fecha y valor'
     )
     trend_direction = serializers.CharField(help_text='up, down, stable')
-    trend_percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+    trend_percentage = serializers.DecimalField(max_digits=12, decimal_places=2)
 
 
 class CategoryComparisonSerializer(serializers.Serializer):
@@ -137,4 +482,22 @@ class CategoryComparisonSerializer(serializers.Serializer):
     )
     total_income = serializers.DecimalField(max_digits=12, decimal_places=2)
     total_expenses = serializers.DecimalField(max_digits=12, decimal_places=2)
-    net_savings = serializers.DecimalField(max_digits=12, decimal_places=2) 
\ No newline at end of file
+    net_savings = serializers.DecimalField(max_digits=12, decimal_places=2) 
+
+
+class CategoryComparisonResponseSerializer(serializers.Serializer):
+    """
+    Serializer para la respuesta de la comparación de categorías por período.
+    """
+    currency = serializers.CharField(help_text='Moneda de los importes')
+    period = serializers.CharField(help_text='week, month, quarter, year')
+    periods = CategoryComparisonSerializer(many=True)
+
+
+class CategoryTrendsResponseSerializer(serializers.Serializer):
+    """
+    Serializer para la respuesta de las tendencias de categorías.
+    """
+    currency = serializers.CharField(help_text='Moneda de los importes')
+    period = serializers.CharField(help_text='week, month, quarter, year')
+    categories = CategoryTrendSerializer(many=True)
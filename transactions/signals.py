@@ -0,0 +1,66 @@
+from django.db import connections, transaction as db_transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from .balances import apply_balance_changes, transaction_changes
+from .categorization import rule_cache
+from .hierarchy import detach_children
+from .ledger_cache import ledger_cache
+from .models import CategorizationRule, Category, Transaction
+from .search import repair_search_index
+
+# Se envía una vez por operación masiva (bulk_create, update o delete sobre
+# querysets), que no disparan las señales por instancia. Argumentos: user_ids.
+transactions_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=Transaction)
+def update_ledger_on_save(sender, instance, **kwargs):
+    """Actualiza el historial columnar del usuario al confirmar la transacción de base de datos"""
+    values = (instance.pk, instance.date, instance.base_amount, instance.category_id, instance.transaction_type)
+    db_transaction.on_commit(
+        lambda: ledger_cache.apply(instance.user_id, lambda ledger: ledger.upsert(*values))
+    )
+
+
+@receiver(post_delete, sender=Transaction)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    transaction_id = instance.pk
+    db_transaction.on_commit(
+        lambda: ledger_cache.apply(instance.user_id, lambda ledger: ledger.remove(transaction_id))
+    )
+
+
+@receiver(post_delete, sender=Transaction)
+def update_account_balance_on_delete(sender, instance, **kwargs):
+    """Resta la transacción eliminada de los puntos de control de saldo de su cuenta"""
+    apply_balance_changes(transaction_changes([instance], sign=-1))
+
+
+@receiver(pre_delete, sender=Category)
+def detach_subcategories(sender, instance, **kwargs):
+    """Las subcategorías de una categoría eliminada pasan a ser raíces"""
+    detach_children(instance)
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_ledger_on_category_delete(sender, instance, **kwargs):
+    """Las transacciones de la categoría quedan sin categoría mediante un UPDATE masivo"""
+    db_transaction.on_commit(lambda: ledger_cache.invalidate(instance.user_id))
+
+
+@receiver(transactions_bulk_changed)
+def invalidate_ledger_on_bulk_change(sender, user_ids, **kwargs):
+    for user_id in set(user_ids):
+        db_transaction.on_commit(lambda user_id=user_id: ledger_cache.invalidate(user_id))
+
+
+@receiver(post_save, sender=CategorizationRule)
+@receiver(post_delete, sender=CategorizationRule)
+def invalidate_compiled_rules(sender, instance, **kwargs):
+    """Fuerza a recompilar las reglas del usuario en todos los procesos"""
+    db_transaction.on_commit(lambda: rule_cache.invalidate(instance.user_id))
+
+
+def repair_search_index_after_migrate(sender, using, **kwargs):
+    """Recrea los triggers del índice de texto completo eliminados al reconstruir la tabla"""
+    repair_search_index(connections[using])
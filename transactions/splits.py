@@ -0,0 +1,68 @@
+"""
+Asignación del importe de las transacciones a categorías.
+
+Una transacción sin dividir asigna todo su `base_amount` a su categoría; una
+dividida lo reparte entre sus líneas en proporción a sus importes (y no tiene
+categoría propia). Los agregados por categoría leen estas asignaciones con un
+solo LEFT JOIN contra la tabla de líneas: cada transacción aparece una vez por
+línea, o una vez si no está dividida.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import DecimalField, F, FloatField
+from django.db.models.functions import Cast, Coalesce, Round
+
+
+def allocation_category(rollup=False):
+    """
+    Expresión con la categoría de cada asignación.
+
+    Con `rollup` es cada uno de los ancestros de esa categoría (un join más con
+    la tabla de clausura), para acumular las subcategorías en sus ancestros.
+    """
+    if rollup:
+        return Coalesce('splits__category__ancestor_links__ancestor', 'category__ancestor_links__ancestor')
+    return Coalesce('splits__category', 'category')
+
+
+def _share(split_amount, base_amount, amount):
+    # SQLite guarda los decimales enteros como INTEGER: dividir por un float evita la división entera
+    share = Cast(
+        F(split_amount) * F(base_amount) / Cast(amount, FloatField()),
+        DecimalField(max_digits=20, decimal_places=6),
+    )
+    return Round(share, 2)
+
+
+def allocation_amount():
+    """Expresión con la parte de `base_amount` de cada asignación, redondeada a centavos"""
+    return Coalesce(
+        _share('splits__amount', 'base_amount', 'amount'), 'base_amount',
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def split_amount():
+    """Expresión con la parte de `base_amount` de la transacción asignada a cada línea (sobre TransactionSplit)"""
+    return Cast(
+        _share('amount', 'transaction__base_amount', 'transaction__amount'),
+        DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def allocations(queryset, rollup=False):
+    """Anota el queryset de transacciones con `allocation_category` y `allocation_amount`"""
+    return queryset.annotate(
+        allocation_category=allocation_category(rollup),
+        allocation_amount=allocation_amount(),
+    )
+
+
+def allocated_to(queryset, category_id):
+    """Asignaciones del queryset a una categoría (con los importes de sus líneas si está dividida)"""
+    return allocations(queryset).filter(allocation_category=category_id)
+
+
+def allocate_cents(cents, share, total):
+    """Parte en centavos de `cents` que corresponde a `share` de `total`, igual que `allocation_amount`"""
+    return int((Decimal(cents) * share / total).to_integral_value(rounding=ROUND_HALF_UP))
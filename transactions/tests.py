@@ -1,3 +1,354 @@
-from django.test import TestCase
+import json
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from financetracker import singleflight
+from financetracker.versioning import bump_version
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+from . import archive, recurrence
+from .ledger_cache import _version_key, ledger_cache
+from .models import Category, RecurringTransaction, Transaction
+
+BUDGETS = {
+    'crud': {'capacity': 10 ** 6, 'refill_rate': 10 ** 3},
+    'analytics': {'capacity': 10 ** 6, 'refill_rate': 10 ** 3},
+}
+
+
+@override_settings(THROTTLE_BUDGETS=BUDGETS)
+class APITestBase(APITestCase):
+    """Usuario autenticado por token, con las invalidaciones al confirmar ejecutadas en cada petición"""
+
+    def setUp(self):
+        cache.clear()
+        ledger_cache.clear()
+        self.user = User.objects.create_user('ana', password='x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+
+    def call(self, method, url, data=None, status=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')
+        if status is not None:
+            self.assertEqual(response.status_code, status, getattr(response, 'data', response.content))
+        return response
+
+    def category(self, name, parent=None):
+        return self.call('post', '/api/categories/', {'name': name, 'parent': parent}, status=201).data['id']
+
+    def transaction(self, amount, day, transaction_type='expense', category=None, splits=None, **extra):
+        data = {
+            'transaction_type': transaction_type, 'amount': amount, 'date': day, 'description': 'x',
+            'category': category, **extra,
+        }
+        if splits:
+            data['splits'] = splits
+        return self.call('post', '/api/transactions/', data, status=201).data
+
+
+class ArchivedAnalyticsTests(APITestBase):
+    """Las analíticas dan lo mismo antes y después de archivar"""
+
+    # Campos con transacciones individuales, que solo incluyen las que están en línea
+    ONLINE_ONLY = {'recent_transactions', 'largest_transactions', 'top_transactions', 'archived_until'}
+
+    def setUp(self):
+        super().setUp()
+        parent = self.category('Hogar')
+        self.categories = [parent, self.category('Luz', parent), self.category('Comida')]
+        random.seed(7)
+        rows = [
+            {
+                'transaction_type': random.choice(['income', 'expense']),
+                'amount': f'{random.randint(1, 300)}.{random.randint(0, 99):02d}',
+                'date': str(date(2021, 1, 1) + timedelta(days=random.randint(0, 3 * 365))),
+                'description': 'x',
+                'category': random.choice(self.categories + [None]),
+            }
+            for _ in range(150)
+        ]
+        self.call('post', '/api/transactions/import/', rows, status=201)
+        for day in ('2021-03-10', '2022-12-31', '2023-02-02'):
+            self.transaction('100.00', day, splits=[
+                {'category': self.categories[1], 'amount': '33.33'}, {'category': None, 'amount': '66.67'},
+            ])
+
+    def urls(self):
+        light = self.categories[1]
+        return [
+            '/api/transactions/statistics/',
+            '/api/transactions/statistics/?start_date=2022-02-10&end_date=2023-03-01',
+            f'/api/transactions/statistics/?category={light}',
+            '/api/categories/summary/?start_date=2021-02-14&end_date=2023-03-01&limit=50',
+            '/api/categories/summary/?start_date=2022-03-05&end_date=2022-03-20&limit=50',
+            '/api/categories/tree/?start_date=2021-02-14&end_date=2023-03-01',
+            '/api/categories/comparison/?end_date=2023-02-15&periods=6&period=quarter&rollup=true',
+            '/api/categories/trends/?end_date=2023-02-15&periods=10&period=week',
+            f'/api/categories/{light}/analysis/?start_date=2022-11-15&end_date=2023-01-20',
+            '/api/transactions/timeseries/?start_date=2022-06-10&end_date=2023-06-30',
+            '/api/transactions/timeseries/?start_date=2023-06-10&end_date=2023-08-30&resolution=day',
+        ]
+
+    def normalized(self, value):
+        if isinstance(value, dict):
+            return {key: self.normalized(item) for key, item in value.items() if key not in self.ONLINE_ONLY}
+        if isinstance(value, list):
+            return [self.normalized(item) for item in value]
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            try:
+                return round(float(value), 4)
+            except ValueError:
+                return value
+        return value
+
+    def snapshot(self):
+        responses = {}
+        for enabled in (True, False):
+            with self.settings(LEDGER_CACHE_ENABLED=enabled):
+                for url in self.urls():
+                    response = self.call('get', url, status=200)
+                    responses[enabled, url] = self.normalized(json.loads(response.content))
+        return responses
+
+    def test_analytics_include_archived_transactions(self):
+        before = self.snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertGreater(archive.archive_user(self.user.pk, date(2023, 1, 1)), 0)
+        after = self.snapshot()
+        for key, expected in before.items():
+            self.assertEqual(after[key], expected, key)
+
+    def test_marks_online_only_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive_user(self.user.pk, date(2023, 1, 1))
+        statistics = self.call('get', '/api/transactions/statistics/?start_date=2022-01-01', status=200).json()
+        self.assertEqual(statistics['archived_until'], '2022-12-31')
+        statistics = self.call('get', '/api/transactions/statistics/?start_date=2023-01-01', status=200).json()
+        self.assertNotIn('archived_until', statistics)
+
+
+class SplitCategorizationTests(APITestBase):
+    """Las reglas de categorización no asignan categoría a las transacciones divididas"""
+
+    def setUp(self):
+        super().setUp()
+        self.food = self.category('Comida')
+        self.home = self.category('Hogar')
+        self.call('post', '/api/categorization-rules/', {'category': self.food, 'keyword': 'super'}, status=201)
+        self.split = self.transaction('90.00', '2024-01-10', description='Super', splits=[
+            {'category': self.home, 'amount': '30.00'}, {'category': None, 'amount': '60.00'},
+        ])['id']
+        self.plain = self.transaction('10.00', '2024-01-11', description='Super')['id']
+
+    def category_of(self, transaction_id):
+        return self.call('get', f'/api/transactions/{transaction_id}/', status=200).data['category']
+
+    def test_apply_rules_skips_split_transactions(self):
+        for overwrite in ('false', 'true'):
+            self.call('post', f'/api/categorization-rules/apply/?overwrite={overwrite}', status=200)
+            self.assertIsNone(self.category_of(self.split))
+        self.assertEqual(self.category_of(self.plain), self.food)
+
+
+class CategoryMetricsTests(APITestBase):
+    """Las métricas anotadas en el listado coinciden con las de get_metrics()"""
+
+    def test_split_transactions_count_once(self):
+        food, home = self.category('Comida'), self.category('Hogar')
+        self.transaction('4.00', '2024-01-01', category=food)
+        split = self.transaction('10.00', '2024-01-02', splits=[
+            {'category': home, 'amount': '6.00'}, {'category': None, 'amount': '4.00'},
+        ])['id']
+        # Una transacción dividida con categoría propia: la línea sin categoría va a la de la transacción
+        Transaction.objects.filter(id=split).update(category=food)
+        listed = self.call('get', '/api/categories/?metrics=true&start_date=2024-01-01', status=200).json()
+        metrics = {row['id']: row['metrics'] for row in listed}
+        self.assertEqual(metrics[food], {'total': '8.00', 'count': 2, 'average': '4.00'})
+        self.assertEqual(metrics[home], {'total': '6.00', 'count': 1, 'average': '6.00'})
+        for category in Category.objects.filter(user=self.user):
+            expected = category.get_metrics(start_date=date(2024, 1, 1))
+            self.assertEqual(metrics[category.id], {
+                'total': str(expected['total']), 'count': expected['count'], 'average': str(expected['average']),
+            })
+        self.assertNotIn('metrics', self.call('get', '/api/categories/', status=200).json()[0])
+
+
+class MaterializeRecurringTests(APITestBase):
+    """Una plantilla sin tipos de cambio no frena la materialización de las demás"""
+
+    def schedule(self, currency):
+        return RecurringTransaction.objects.create(
+            user=self.user, transaction_type='expense', amount='10.00', currency=currency, description=currency,
+            frequency='monthly', start_date=date(2024, 1, 5), next_run_date=date(2024, 1, 5),
+        )
+
+    def test_missing_exchange_rate_skips_schedule(self):
+        missing, valid = self.schedule('JPY'), self.schedule(settings.DEFAULT_CURRENCY)
+        with self.captureOnCommitCallbacks(execute=True), self.assertLogs('transactions.recurrence', 'WARNING'):
+            processed, materialized = recurrence.materialize_due(until=date(2024, 3, 10), batch_size=1)
+        self.assertEqual((processed, materialized), (1, 3))
+        self.assertEqual(Transaction.objects.filter(recurring=valid).count(), 3)
+        self.assertFalse(Transaction.objects.filter(recurring=missing).exists())
+        missing.refresh_from_db()
+        self.assertEqual(missing.next_run_date, date(2024, 1, 5))
+
+    def test_counts_only_created_occurrences(self):
+        schedule = self.schedule(settings.DEFAULT_CURRENCY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(recurrence.materialize_due(until=date(2024, 2, 10)), (1, 2))
+        # Una ejecución interrumpida antes de avanzar la próxima fecha repite las ocurrencias ya creadas
+        RecurringTransaction.objects.filter(id=schedule.id).update(next_run_date=date(2024, 1, 5))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(recurrence.materialize_due(until=date(2024, 3, 10)), (1, 1))
+        self.assertEqual(Transaction.objects.filter(recurring=schedule).count(), 3)
+
+
+class AnalyticsCostTests(APITestBase):
+    """Los endpoints analíticos cuestan según los buckets calculados, no según el largo del rango"""
+
+    def cost(self, url):
+        return int(self.call('get', url, status=200)['X-RateLimit-Cost'])
+
+    def test_long_ranges_cost_their_buckets(self):
+        self.transaction('10.00', '2020-05-01')
+        with self.settings(THROTTLE_BUDGETS={**BUDGETS, 'analytics': {'capacity': 120, 'refill_rate': 0.001}}):
+            decade = 'start_date=2015-01-01&end_date=2024-12-31'
+            # La serie de diez años sale en 120 meses y las estadísticas son un solo agregado
+            self.assertEqual(self.cost(f'/api/transactions/timeseries/?{decade}'), 4)
+            self.assertLessEqual(self.cost(f'/api/transactions/statistics/?{decade}'), 2)
+            for _ in range(10):
+                self.assertLessEqual(self.cost(f'/api/transactions/timeseries/?{decade}&max_points=200'), 4)
+            # La serie diaria sí calcula 3653 puntos y no entra en lo que queda del presupuesto
+            self.call('get', f'/api/transactions/timeseries/?{decade}&resolution=day', status=429)
+
+
+class SingleFlightTests(APITestBase):
+    """Las peticiones posteriores a una escritura no reutilizan ejecuciones anteriores"""
+
+    def test_write_changes_flight_key(self):
+        keys = []
+        original = singleflight.flights.do
+
+        def record(key, compute, timeout):
+            keys.append(key)
+            return original(key, compute, timeout)
+
+        with mock.patch.object(singleflight.flights, 'do', record):
+            self.call('get', '/api/transactions/statistics/', status=200)
+            self.call('get', '/api/transactions/statistics/', status=200)
+            self.transaction('10.00', '2024-01-01')
+            self.call('get', '/api/transactions/statistics/', status=200)
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[1], keys[2])
+
+    def test_sweep_removes_stale_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            names = {'stale': 'a' * 64, 'lock': 'b' * 64 + '.lock', 'fresh': 'c' * 64 + '.lock', 'other': 'notas.txt'}
+            for label, name in names.items():
+                path = os.path.join(directory, name)
+                open(path, 'w').close()
+                if label != 'fresh':
+                    os.utime(path, (0, 0))
+            singleflight.SingleFlight()._sweep(directory, 60)
+            self.assertEqual(sorted(os.listdir(directory)), sorted([names['fresh'], names['other']]))
+
+
+class AccountBalanceTests(APITestBase):
+    """Los saldos por puntos de control coinciden con la suma directa de las transacciones"""
+
+    DAYS = [date(2023, 11, 30) + timedelta(days=offset) for offset in range(0, 200, 9)]
+
+    def setUp(self):
+        super().setUp()
+        self.bank = self.account('Banco', '1000.00')
+        self.cash = self.account('Efectivo', '50.00')
+        self.openings = {self.bank: Decimal('1000.00'), self.cash: Decimal('50.00')}
+
+    def account(self, name, opening_balance):
+        return self.call('post', '/api/accounts/', {
+            'name': name, 'currency': settings.DEFAULT_CURRENCY, 'opening_balance': opening_balance,
+        }, status=201).data['id']
+
+    def expected(self, account, day):
+        balance = self.openings[account]
+        for row in Transaction.objects.filter(account_id=account, date__lte=day):
+            balance += row.amount if row.transaction_type == 'income' else -row.amount
+        return balance
+
+    def balances(self):
+        return {
+            (account, day): Decimal(str(self.call(
+                'get', f'/api/accounts/{account}/balance/?date={day}', status=200
+            ).data['balance']))
+            for account in (self.bank, self.cash) for day in self.DAYS
+        }
+
+    def assert_balances(self, balances=None):
+        for (account, day), balance in (balances or self.balances()).items():
+            self.assertEqual(balance, self.expected(account, day), (account, day))
+
+    def test_out_of_order_inserts(self):
+        # Se cargan primero las más recientes, después las de meses anteriores
+        for day, amount, kind in [('2024-05-10', '300.00', 'income'), ('2024-03-03', '45.50', 'expense'),
+                                  ('2024-05-01', '20.00', 'expense'), ('2023-12-24', '99.99', 'expense'),
+                                  ('2024-01-31', '1200.00', 'income'), ('2024-03-03', '10.01', 'expense')]:
+            self.transaction(amount, day, kind, account=self.bank)
+        self.assert_balances()
+        history = self.call(
+            'get', f'/api/accounts/{self.bank}/balance-history/?start_date=2023-12-01&end_date=2024-05-31'
+                   '&interval=month', status=200
+        ).data['points']
+        self.assertEqual(Decimal(str(history[-1]['balance'])), self.expected(self.bank, date(2024, 5, 31)))
+
+    def test_bulk_update_and_delete(self):
+        ids = [
+            self.transaction(f'{10 * index}.25', str(date(2024, 1, 5) + timedelta(days=25 * index)),
+                             'income' if index % 3 == 0 else 'expense', account=self.bank)['id']
+            for index in range(1, 8)
+        ]
+        self.call('post', '/api/transactions/bulk-update/', {'ids': ids[:3], 'changes': {'account': self.cash}},
+                  status=200)
+        self.assert_balances()
+        self.call('post', '/api/transactions/bulk-update/', {
+            'filter': {'date_from': '2024-03-01'}, 'changes': {'transaction_type': 'income'},
+        }, status=200)
+        self.assert_balances()
+        self.call('post', '/api/transactions/bulk-delete/', {'ids': ids[1:5]}, status=200)
+        self.assert_balances()
+
+    def test_archive_keeps_balances(self):
+        for index in range(12):
+            self.transaction(f'{index + 1}.50', str(date(2023, 12, 1) + timedelta(days=15 * index)),
+                             'expense' if index % 2 else 'income', account=self.bank if index % 3 else self.cash)
+        before = self.balances()
+        self.assert_balances(before)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertGreater(archive.archive_user(self.user.pk, date(2024, 3, 1)), 0)
+        self.assertEqual(self.balances(), before)
+
+
+class LedgerVersionTests(APITestBase):
+    """Un historial cacheado no vuelve a valer si el caché compartido desaloja su contador de versión"""
+
+    def test_evicted_counter_invalidates_cached_ledger(self):
+        self.transaction('10.00', '2024-01-01')
+        stale = ledger_cache.get(self.user.pk)
+        # El contador se desaloja y otro proceso escribe (sin pasar por este historial): el
+        # contador reiniciado no debe volver a la versión con la que se cargó el historial
+        cache.delete(_version_key(self.user.pk))
+        row = Transaction.objects.get(user=self.user)
+        row.pk = None
+        Transaction.objects.bulk_create([row])
+        bump_version(_version_key(self.user.pk))
+        ledger = ledger_cache.get(self.user.pk)
+        self.assertIsNot(ledger, stale)
+        self.assertEqual(ledger.totals()['expense'], 2000)
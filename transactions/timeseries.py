@@ -0,0 +1,182 @@
+"""
+Series temporales de flujo de caja del usuario.
+
+Los ingresos y gastos se agrupan por día, semana (desde el lunes) o mes en la
+base de datos (o desde el historial columnar en memoria), y el neto acumulado
+parte del saldo de todo lo anterior al rango. Si la serie supera el
+presupuesto de puntos se reduce con LTTB (Largest-Triangle-Three-Buckets)
+sobre el acumulado, que conserva la forma del gráfico; los ingresos y gastos
+de los puntos descartados se suman al punto elegido siguiente, así los totales
+del rango no cambian.
+"""
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import DateField, F, Q, Sum
+from django.db.models.functions import Trunc
+
+RESOLUTIONS = ('day', 'week', 'month')
+DEFAULT_POINTS = 500
+MIN_POINTS = 3
+MAX_POINTS = 5000
+
+
+MONTHS_PER_BUCKET = {'month': 1, 'quarter': 3, 'year': 12}
+
+
+def bucket_start(value, resolution):
+    if resolution == 'week':
+        return value - timedelta(days=value.weekday())
+    if resolution in MONTHS_PER_BUCKET:
+        step = MONTHS_PER_BUCKET[resolution]
+        return date(value.year, value.month - (value.month - 1) % step, 1)
+    return value
+
+
+def shift_bucket(value, resolution, count=1):
+    """Inicio del período `count` posiciones después (o antes, si es negativo) del que empieza en `value`"""
+    if resolution == 'week':
+        return value + timedelta(days=7 * count)
+    if resolution in MONTHS_PER_BUCKET:
+        month_index = value.year * 12 + value.month - 1 + MONTHS_PER_BUCKET[resolution] * count
+        return date(month_index // 12, month_index % 12 + 1, 1)
+    return value + timedelta(days=count)
+
+
+def next_bucket(value, resolution):
+    return shift_bucket(value, resolution)
+
+
+def bucket_label(value, resolution):
+    """Etiqueta del período que empieza en `value` (2024-03, 2024-Q1, 2024 o la fecha de inicio)"""
+    if resolution == 'month':
+        return value.strftime('%Y-%m')
+    if resolution == 'quarter':
+        return f'{value.year}-Q{(value.month - 1) // 3 + 1}'
+    if resolution == 'year':
+        return str(value.year)
+    return value.isoformat()
+
+
+def last_buckets(end_date, resolution, count):
+    """Los `count` períodos que terminan con el que contiene `end_date`, como (inicio, fin); el último termina en `end_date`"""
+    first = shift_bucket(bucket_start(end_date, resolution), resolution, 1 - count)
+    buckets = []
+    for index in range(count):
+        start = shift_bucket(first, resolution, index)
+        buckets.append((start, min(shift_bucket(start, resolution) - timedelta(days=1), end_date)))
+    return buckets
+
+
+def bucket_count(start_date, end_date, resolution):
+    first, last = bucket_start(start_date, resolution), bucket_start(end_date, resolution)
+    if resolution == 'week':
+        return (last - first).days // 7 + 1
+    if resolution == 'month':
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days + 1
+
+
+def choose_resolution(start_date, end_date, max_points):
+    """La resolución más fina que entra en el presupuesto de puntos (o mensual si ninguna entra)"""
+    for resolution in RESOLUTIONS:
+        if bucket_count(start_date, end_date, resolution) <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def _cents(value):
+    # SQLite suma los decimales como float: se redondea en lugar de truncar
+    return int(Decimal(value or 0).scaleb(2).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def flows_from_ledger(ledger, start_date, end_date, resolution, transaction_type=None):
+    """Ingresos y gastos en centavos por período, desde el historial columnar"""
+    flows = {}
+    for day, (income, expense) in ledger.daily(start_date, end_date, transaction_type).items():
+        flow = flows.setdefault(bucket_start(day, resolution), [0, 0])
+        flow[0] += income
+        flow[1] += expense
+    return flows
+
+
+def flows_from_sql(transactions, resolution):
+    """Ingresos y gastos en centavos por período, con una consulta agrupada"""
+    bucket = F('date') if resolution == 'day' else Trunc('date', resolution, output_field=DateField())
+    rows = transactions.values(bucket=bucket).annotate(
+        income=Sum('base_amount', filter=Q(transaction_type='income')),
+        expense=Sum('base_amount', filter=Q(transaction_type='expense')),
+    ).order_by()
+    return {row['bucket']: [_cents(row['income']), _cents(row['expense'])] for row in rows}
+
+
+def opening_from_sql(transactions):
+    """Neto en centavos de las transacciones anteriores al rango"""
+    totals = transactions.aggregate(
+        income=Sum('base_amount', filter=Q(transaction_type='income')),
+        expense=Sum('base_amount', filter=Q(transaction_type='expense')),
+    )
+    return _cents(totals['income']) - _cents(totals['expense'])
+
+
+def build_series(flows, start_date, end_date, resolution, opening=0):
+    """
+    Puntos (fecha, ingresos, gastos, neto, acumulado) en centavos para todos los
+    períodos del rango, incluidos los vacíos. `opening` es el neto anterior al rango.
+    """
+    series = []
+    cumulative = opening
+    current = bucket_start(start_date, resolution)
+    while current <= end_date:
+        income, expense = flows.get(current, (0, 0))
+        cumulative += income - expense
+        series.append((current, income, expense, income - expense, cumulative))
+        current = next_bucket(current, resolution)
+    return series
+
+
+def lttb(values, threshold):
+    """Índices de los puntos elegidos por Largest-Triangle-Three-Buckets (x = posición)"""
+    size = len(values)
+    if threshold >= size or threshold < 3:
+        return list(range(size))
+
+    selected = [0]
+    bucket_size = (size - 2) / (threshold - 2)
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, size)
+        # Promedio del bucket siguiente como tercer vértice del triángulo
+        average_x = (end + next_end - 1) / 2
+        average_y = sum(values[end:next_end]) / (next_end - end)
+
+        best_area = -1
+        best = start
+        for index in range(start, end):
+            area = abs(
+                (anchor - average_x) * (values[index] - values[anchor])
+                - (anchor - index) * (average_y - values[anchor])
+            )
+            if area > best_area:
+                best_area = area
+                best = index
+        selected.append(best)
+        anchor = best
+    selected.append(size - 1)
+    return selected
+
+
+def downsample(series, max_points):
+    """Reduce la serie a `max_points` puntos conservando el acumulado y los totales de ingresos y gastos"""
+    indexes = lttb([point[4] for point in series], max_points)
+    result = []
+    previous = -1
+    for index in indexes:
+        income = sum(point[1] for point in series[previous + 1:index + 1])
+        expense = sum(point[2] for point in series[previous + 1:index + 1])
+        day, _, _, _, cumulative = series[index]
+        result.append((day, income, expense, income - expense, cumulative))
+        previous = index
+    return result
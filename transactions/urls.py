@@ -1,10 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, TransactionViewSet
+from .views import (
+    AccountViewSet, CategoryViewSet, TransactionViewSet, RecurringTransactionViewSet, CategorizationRuleViewSet
+)
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
 router.register(r'transactions', TransactionViewSet)
+router.register(r'recurring-transactions', RecurringTransactionViewSet)
+router.register(r'categorization-rules', CategorizationRuleViewSet)
+router.register(r'accounts', AccountViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,31 +1,80 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Avg, Q
+from django.db.models import Sum, Count, Avg, Max, Q, F, DateField
+from django.db.models.functions import Trunc
 from django.utils import timezone
 from datetime import datetime, timedelta
-from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
+from drf_spectacular.utils import OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
-from .models import Category, Transaction, CategoryAnalysis
+from financetracker.schema import extend_schema, extend_schema_view
+from django.db import transaction as db_transaction
+from .models import (
+    Account, ArchivedTransaction, Category, Transaction, TransactionArchive, TransactionRollup, TransactionSplit,
+    RecurringTransaction, CategorizationRule, CategoryAnalysis
+)
+from .aggregates import archive_horizon, archived_transactions, user_totals
+from . import archive, balances, bulk, hierarchy, ranking, splits, timeseries
+from .categorization import rule_cache, categorize, apply_rules_to_history
+from .recurrence import next_occurrence
+from .currency import fill_base_amounts
+from .ledger_cache import ledger_cache, from_cents, average_from_cents, to_ordinal, versions as ledger_versions, NO_CATEGORY
+from .fast_serialization import serialize_rows
+from .search import search_transactions
+from .signals import transactions_bulk_changed
+from changelog import log as changelog
+from financetracker import compact
+from financetracker.renderers import FastJSONRenderer
+from financetracker.singleflight import single_flight
+from financetracker.throttling import CostAwareMixin, request_dates, span_days
+from households import scope
+from sync.versions import bump_versions
 from .serializers import (
-    CategorySerializer, TransactionSerializer, CategoryAnalysisSerializer,
-    CategorySummarySerializer, CategoryTrendSerializer, CategoryComparisonSerializer
+    AccountSerializer, ArchivedTransactionSerializer, CategorySerializer, TransactionSerializer, TransactionBulkUpdateSerializer,
+    TransactionSelectionSerializer, TransactionRollupSerializer, RecurringTransactionSerializer, CategorizationRuleSerializer,
+    CategoryAnalysisSerializer,
+    CategorySummarySerializer, CategoryTrendSerializer, CategoryComparisonSerializer,
+    CategoryComparisonResponseSerializer, CategoryTrendsResponseSerializer
 )
 
 # Create your views here.
 
-class IsOwner(permissions.BasePermission):
-    """
-    Custom permission to only allow owners of an object to edit it.
-    """
-    def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
-
+@extend_schema(parameters=[scope.PARAMETER])
 @extend_schema_view(
     list=extend_schema(
         summary="Listar categorías",
-        description="Obtiene todas las categorías del usuario autenticado",
+        description="Obtiene todas las categorías del usuario autenticado. Con `metrics=true` cada categoría "
+                    "incluye el total, la cantidad y el promedio de sus asignaciones en el período, calculados "
+                    "para toda la lista en una sola consulta",
+        parameters=[
+            OpenApiParameter(
+                name='metrics',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Incluir las métricas de cada categoría (por defecto: false)'
+            ),
+            OpenApiParameter(
+                name='start_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de inicio de las métricas (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='end_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de fin de las métricas (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='transaction_type',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Tipo de transacción de las métricas (income/expense)'
+            ),
+        ],
         tags=['categories']
     ),
     create=extend_schema(
@@ -54,7 +103,7 @@ class IsOwner(permissions.BasePermission):
         tags=['categories']
     ),
 )
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CostAwareMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar categorías de transacciones.
     
@@ -63,10 +112,59 @@ class CategoryViewSet(viewsets.ModelViewSet):
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    permission_classes = [permissions.IsAuthenticated]
+    analytics_actions = ('analysis', 'summary', 'tree', 'comparison', 'trends', 'rankings')
+
+    PERIODS = ('week', 'month', 'quarter', 'year')
+    MAX_PERIODS = 60
+    MAX_RANKING = 50
+    RANKING_FIELDS = ('id', 'amount', 'currency', 'base_amount', 'transaction_type', 'date', 'description')
+    TOP_TRANSACTION_FIELDS = (
+        'id', 'amount', 'currency', 'base_amount', 'allocation_amount', 'transaction_type', 'date', 'description'
+    )
+    TREND_FIELDS = ('income', 'expense', 'total')
+    EMPTY_METRICS = {
+        'total_income': 0, 'total_expenses': 0, 'transaction_count': 0,
+        'average_amount': 0, 'last_transaction_date': None,
+    }
 
     def get_queryset(self):
-        return self.request.user.categories.all()
+        queryset = scope.visible(self.request, Category.objects.all())
+        period = self._metrics_period()
+        if period is not None:
+            queryset = queryset.with_metrics(*period)
+        return queryset
+
+    def get_data_version(self, request):
+        # Clave de single-flight: las escrituras de transacciones cambian la versión de los historiales
+        return ledger_versions(scope.user_ids(request))
+
+    def get_cost_buckets(self, request):
+        # El análisis arma la tendencia día por día
+        if self.action == 'analysis':
+            return span_days(request)
+        return super().get_cost_buckets(request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        period = self._metrics_period()
+        if period is not None or getattr(self, 'swagger_fake_view', False):
+            context['metrics_period'] = period
+        return context
+
+    def _metrics_period(self):
+        """(tipo, inicio, fin) de las métricas pedidas con `metrics=true` en el listado, o None"""
+        params = self.request.query_params
+        if self.action != 'list' or params.get('metrics', '').lower() not in ('1', 'true', 'yes'):
+            return None
+        try:
+            start_date, end_date = (
+                datetime.strptime(params[name], '%Y-%m-%d').date() if params.get(name) else None
+                for name in ('start_date', 'end_date')
+            )
+        except ValueError:
+            raise ValidationError({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'})
+        return params.get('transaction_type') or None, start_date, end_date
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -99,10 +197,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
                     OpenApiExample('Gastos', value='expense'),
                 ]
             ),
+            OpenApiParameter(
+                name='compact',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Devolver trend_data.daily y top_transactions en formato columnar (un array por campo)'
+            ),
         ],
         tags=['categories']
     )
     @action(detail=True, methods=['get'])
+    @single_flight
     def analysis(self, request, pk=None):
         """Obtiene un análisis detallado de una categoría específica"""
         try:
@@ -117,79 +222,55 @@ class CategoryViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Obtener transacciones del período
-            transactions = category.transactions.filter(
-                date__range=[start_date, end_date]
-            )
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
+            period_days = (end_dt - start_dt).days
 
-            if transaction_type:
-                transactions = transactions.filter(transaction_type=transaction_type)
+            previous_start = start_dt - timedelta(days=period_days)
+            previous_end = start_dt - timedelta(days=1)
+
+            # Calcular métricas desde el historial en memoria o, si no está disponible, con SQL
+            ledger = ledger_cache.get_combined(scope.user_ids(request))
+            if ledger is not None:
+                metrics = self._category_metrics_from_ledger(
+                    ledger, category, start_dt, end_dt, previous_start, previous_end, transaction_type)
+            else:
+                metrics = self._category_metrics_from_sql(
+                    category, start_date, end_date, previous_start, previous_end, transaction_type)
+            archived_until = archive_horizon(request, previous_start)
+            if archived_until is not None:
+                self._add_archived_metrics(
+                    request, metrics, archived_until, category, start_dt, end_dt, previous_start, previous_end,
+                    transaction_type)
 
-            # Calcular métricas
-            total_income = transactions.filter(transaction_type='income').aggregate(
-                total=Sum('amount'))['total'] or 0
-            total_expenses = transactions.filter(transaction_type='expense').aggregate(
-                total=Sum('amount'))['total'] or 0
-            transaction_count = transactions.count()
-            average_amount = transactions.aggregate(avg=Avg('amount'))['avg'] or 0
+            total_income = metrics['total_income']
+            total_expenses = metrics['total_expenses']
+            transaction_count = metrics['transaction_count']
+            average_amount = metrics['average_amount']
+            previous_total = metrics['previous_total']
+            top_transactions = metrics['top_transactions']
 
             # Calcular porcentajes del total
-            total_user_income = Transaction.objects.filter(
-                user=request.user,
-                transaction_type='income',
-                date__range=[start_date, end_date]
-            ).aggregate(total=Sum('amount'))['total'] or 0
-
-            total_user_expenses = Transaction.objects.filter(
-                user=request.user,
-                transaction_type='expense',
-                date__range=[start_date, end_date]
-            ).aggregate(total=Sum('amount'))['total'] or 0
+            totals = user_totals(request, start_date, end_date)
+            total_user_income = totals['total_income']
+            total_user_expenses = totals['total_expenses']
 
             percentage_of_income = (total_income / total_user_income * 100) if total_user_income > 0 else 0
             percentage_of_expenses = (total_expenses / total_user_expenses * 100) if total_user_expenses > 0 else 0
 
-            # Obtener última transacción
-            last_transaction = transactions.order_by('-date').first()
-
             # Calcular tendencia (comparar con período anterior)
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
-            period_days = (end_dt - start_dt).days
-
-            previous_start = start_dt - timedelta(days=period_days)
-            previous_end = start_dt - timedelta(days=1)
-
-            previous_transactions = category.transactions.filter(
-                date__range=[previous_start, previous_end]
-            )
-            if transaction_type:
-                previous_transactions = previous_transactions.filter(transaction_type=transaction_type)
-
-            previous_total = previous_transactions.aggregate(total=Sum('amount'))['total'] or 0
             current_total = total_income + total_expenses
 
-            if previous_total > 0:
-                trend_percentage = ((current_total - previous_total) / previous_total) * 100
-                if trend_percentage > 5:
-                    trend = 'up'
-                elif trend_percentage < -5:
-                    trend = 'down'
-                else:
-                    trend = 'stable'
-            else:
-                trend_percentage = 0
-                trend = 'stable'
-
-            # Obtener transacciones más importantes
-            top_transactions = list(transactions.order_by('-amount')[:10].values(
-                'id', 'amount', 'transaction_type', 'date', 'description'
-            ))
+            trend, trend_percentage = self._trend(current_total, previous_total)
 
             # Generar datos de tendencia por día/semana/mes
-            trend_data = self._generate_trend_data(transactions, start_dt, end_dt)
+            trend_data = self._generate_trend_data(metrics['daily'], start_dt, end_dt)
+            if compact.requested(request):
+                trend_data['daily'] = compact.keyed_columns(trend_data['daily'], 'date', self.TREND_FIELDS)
+                top_transactions = compact.columns(top_transactions, self.TOP_TRANSACTION_FIELDS)
 
             analysis_data = {
+                'currency': scope.currency(request),
                 'category_id': category.id,
                 'category_name': category.name,
                 'category_color': category.color,
@@ -209,14 +290,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 },
                 'trend': {
                     'direction': trend,
-                    'percentage': round(trend_percentage, 2),
+                    'percentage': trend_percentage,
                     'previous_period_total': previous_total,
                     'current_period_total': current_total
                 },
-                'last_transaction_date': last_transaction.date if last_transaction else None,
+                'last_transaction_date': metrics['last_transaction_date'],
                 'top_transactions': top_transactions,
                 'trend_data': trend_data
             }
+            if archive_horizon(request, start_dt) is not None:
+                # Los totales incluyen el archivo; top_transactions, solo las transacciones en línea
+                analysis_data['archived_until'] = archived_until
 
             return Response(analysis_data)
 
@@ -226,30 +310,129 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-    def _generate_trend_data(self, transactions, start_date, end_date):
-        """Genera datos de tendencia para gráficos"""
+    def _category_metrics_from_ledger(self, ledger, category, start_date, end_date,
+                                      previous_start, previous_end, transaction_type):
+        """Métricas de la categoría calculadas sobre el historial columnar"""
+        filters = {'transaction_type': transaction_type, 'allocated_to': category.id}
+        group = ledger.by_category(start_date, end_date, **filters).get(category.id)
+        previous = ledger.totals(previous_start, previous_end, **filters)
+
+        top_ids = ledger.largest(10, start_date, end_date, **filters)
+        rows = {
+            row['id']: row
+            for row in category.allocated_transactions().filter(id__in=top_ids).values(*self.TOP_TRANSACTION_FIELDS)
+        }
+
+        daily = {
+            day: (values[0] / 100, values[1] / 100)
+            for day, values in ledger.daily(start_date, end_date, **filters).items()
+        }
+
+        if group is None:
+            group = {'income': 0, 'expense': 0, 'count': 0, 'last_date': None}
+        return {
+            'total_income': from_cents(group['income']),
+            'total_expenses': from_cents(group['expense']),
+            'transaction_count': group['count'],
+            'average_amount': average_from_cents(group['income'] + group['expense'], group['count']),
+            'last_transaction_date': group['last_date'],
+            'previous_total': from_cents(previous['income'] + previous['expense']),
+            'top_transactions': [rows[transaction_id] for transaction_id in top_ids if transaction_id in rows],
+            'daily': daily,
+        }
+
+    def _category_metrics_from_sql(self, category, start_date, end_date,
+                                   previous_start, previous_end, transaction_type):
+        """Métricas de la categoría calculadas con consultas agregadas"""
+        transactions = category.allocated_transactions().filter(date__range=[start_date, end_date])
+        previous_transactions = category.allocated_transactions().filter(date__range=[previous_start, previous_end])
+        if transaction_type:
+            transactions = transactions.filter(transaction_type=transaction_type)
+            previous_transactions = previous_transactions.filter(transaction_type=transaction_type)
+
+        metrics = transactions.aggregate(
+            total_income=Sum('allocation_amount', filter=Q(transaction_type='income')),
+            total_expenses=Sum('allocation_amount', filter=Q(transaction_type='expense')),
+            transaction_count=Count('id'),
+            average_amount=Avg('allocation_amount'),
+            last_transaction_date=Max('date'),
+        )
+        daily = {}
+        for row in transactions.values('date', 'transaction_type').annotate(total=Sum('allocation_amount')).order_by():
+            day = daily.setdefault(row['date'], [0, 0])
+            day[0 if row['transaction_type'] == 'income' else 1] += float(row['total'])
+
+        return {
+            'total_income': metrics['total_income'] or 0,
+            'total_expenses': metrics['total_expenses'] or 0,
+            'transaction_count': metrics['transaction_count'],
+            'average_amount': metrics['average_amount'] or 0,
+            'last_transaction_date': metrics['last_transaction_date'],
+            'previous_total': previous_transactions.aggregate(total=Sum('allocation_amount'))['total'] or 0,
+            'top_transactions': list(
+                transactions.order_by('-allocation_amount')[:10].values(*self.TOP_TRANSACTION_FIELDS)
+            ),
+            'daily': daily,
+        }
+
+    def _add_archived_metrics(self, request, metrics, until, category, start_date, end_date,
+                              previous_start, previous_end, transaction_type):
+        """Suma a las métricas de la categoría las de sus transacciones archivadas"""
+        user_ids = scope.user_ids(request)
+        previous = archive.archived_groups(
+            user_ids, until, previous_start, previous_end, transaction_type, allocated_to=category.id
+        ).get(category.id)
+        if previous is not None:
+            metrics['previous_total'] += from_cents(previous['income'] + previous['expense'])
+        if start_date > until:
+            return
+
+        group = archive.archived_groups(
+            user_ids, until, start_date, end_date, transaction_type, allocated_to=category.id
+        ).get(category.id)
+        if group is None:
+            return
+        metrics.update(self._merge_metrics(metrics, group))
+        for day, _, kind, cents in archive.archived_allocations(
+            archived_transactions(request, start_date, min(end_date, until), transaction_type), category.id
+        ):
+            income, expense = metrics['daily'].get(day, (0, 0))
+            if kind == 'income':
+                income += cents / 100
+            else:
+                expense += cents / 100
+            metrics['daily'][day] = (income, expense)
+
+    def _merge_metrics(self, metrics, group):
+        """Métricas de una categoría más un acumulado en centavos (del archivo)"""
+        metrics = metrics or self.EMPTY_METRICS
+        total_income = metrics['total_income'] + from_cents(group['income'])
+        total_expenses = metrics['total_expenses'] + from_cents(group['expense'])
+        transaction_count = metrics['transaction_count'] + group['count']
+        last_date = metrics['last_transaction_date']
+        return {
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'transaction_count': transaction_count,
+            'average_amount': (total_income + total_expenses) / transaction_count if transaction_count else 0,
+            'last_transaction_date': group['last_date'] if last_date is None else max(last_date, group['last_date']),
+        }
+
+    def _generate_trend_data(self, daily_totals, start_date, end_date):
+        """Genera datos de tendencia para gráficos a partir de los totales (ingresos, gastos) por día"""
         # Agrupar por día
         daily_data = {}
         current_date = start_date
         
         while current_date <= end_date:
+            income, expense = daily_totals.get(current_date, (0, 0))
             daily_data[current_date.strftime('%Y-%m-%d')] = {
-                'income': 0,
-                'expense': 0,
-                'total': 0
+                'income': income,
+                'expense': expense,
+                'total': income + expense
             }
             current_date += timedelta(days=1)
 
-        # Llenar datos reales
-        for transaction in transactions:
-            date_str = transaction.date.strftime('%Y-%m-%d')
-            if date_str in daily_data:
-                if transaction.transaction_type == 'income':
-                    daily_data[date_str]['income'] += float(transaction.amount)
-                else:
-                    daily_data[date_str]['expense'] += float(transaction.amount)
-                daily_data[date_str]['total'] += float(transaction.amount)
-
         return {
             'daily': daily_data,
             'summary': {
@@ -260,6 +443,81 @@ class CategoryViewSet(viewsets.ModelViewSet):
             }
         }
 
+    def _category_groups(self, request, start_date, end_date, transaction_type, rollup=False):
+        """
+        Métricas por categoría del usuario, desde el historial en memoria o con una consulta agrupada.
+
+        Con `rollup` las métricas de cada categoría incluyen las de todas sus
+        subcategorías, para todos los niveles del árbol a la vez. Si el período
+        llega al archivo se suman las transacciones archivadas.
+        """
+        until = archive_horizon(request, start_date)
+        archived = {} if until is None else archive.archived_groups(
+            scope.user_ids(request), until, start_date, end_date, transaction_type
+        )
+        ledger = ledger_cache.get_combined(scope.user_ids(request))
+        if ledger is not None:
+            groups = archive.merge_groups(ledger.by_category(start_date, end_date, transaction_type), archived)
+            if rollup:
+                groups = self._rollup_groups(request, groups)
+            return {
+                None if category_id == NO_CATEGORY else category_id: {
+                    'total_income': from_cents(group['income']),
+                    'total_expenses': from_cents(group['expense']),
+                    'transaction_count': group['count'],
+                    'average_amount': average_from_cents(group['income'] + group['expense'], group['count']),
+                    'last_transaction_date': group['last_date'],
+                }
+                for category_id, group in groups.items()
+            }
+
+        transactions = Transaction.objects.filter(user_id__in=scope.user_ids(request), date__range=[start_date, end_date])
+        if transaction_type:
+            transactions = transactions.filter(transaction_type=transaction_type)
+
+        # Un join con las líneas de división; con rollup cada asignación se cuenta
+        # en su categoría y en todos sus ancestros (un join más con la clausura)
+        groups = splits.allocations(transactions, rollup).values(
+            category_group=F('allocation_category')
+        ).annotate(**self._metric_aggregates()).order_by()
+        metrics = {group['category_group']: self._metrics_from_row(group) for group in groups}
+        if rollup and archived:
+            archived = self._rollup_groups(request, archived)
+        self._merge_archived_groups(metrics, archived)
+        return metrics
+
+    def _rollup_groups(self, request, groups):
+        """Acumula los grupos en centavos en sus ancestros; las asignaciones sin categoría quedan aparte"""
+        uncategorized = groups.get(NO_CATEGORY)
+        groups = hierarchy.rollup(groups, hierarchy.ancestor_pairs(scope.user_ids(request)))
+        if uncategorized:
+            groups[NO_CATEGORY] = uncategorized
+        return groups
+
+    def _merge_archived_groups(self, metrics, archived):
+        """Suma a las métricas por categoría (None sin categoría) los acumulados en centavos del archivo"""
+        for category_id, group in archived.items():
+            key = None if category_id == NO_CATEGORY else category_id
+            metrics[key] = self._merge_metrics(metrics.get(key), group)
+
+    def _metric_aggregates(self):
+        return {
+            'total_income': Sum('allocation_amount', filter=Q(transaction_type='income')),
+            'total_expenses': Sum('allocation_amount', filter=Q(transaction_type='expense')),
+            'transaction_count': Count('id'),
+            'average_amount': Avg('allocation_amount'),
+            'last_transaction_date': Max('date'),
+        }
+
+    def _metrics_from_row(self, row):
+        return {
+            'total_income': row['total_income'] or 0,
+            'total_expenses': row['total_expenses'] or 0,
+            'transaction_count': row['transaction_count'],
+            'average_amount': row['average_amount'] or 0,
+            'last_transaction_date': row['last_transaction_date'],
+        }
+
     @extend_schema(
         summary="Resumen de todas las categorías",
         description="Obtiene un resumen de todas las categorías del usuario con métricas",
@@ -294,16 +552,24 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description='Número máximo de categorías a retornar (por defecto: 10)'
             ),
+            OpenApiParameter(
+                name='rollup',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Incluir en cada categoría los totales de sus subcategorías (por defecto: false)'
+            ),
         ],
         tags=['categories']
     )
     @action(detail=False, methods=['get'])
+    @single_flight
     def summary(self, request):
         """Obtiene un resumen de todas las categorías con métricas"""
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         transaction_type = request.query_params.get('transaction_type')
         limit = int(request.query_params.get('limit', 10))
+        rollup = request.query_params.get('rollup', '').lower() in ('1', 'true', 'yes')
 
         if not start_date or not end_date:
             return Response(
@@ -315,43 +581,23 @@ class CategoryViewSet(viewsets.ModelViewSet):
         summaries = []
 
         # Calcular totales del usuario
-        user_transactions = Transaction.objects.filter(
-            user=request.user,
-            date__range=[start_date, end_date]
-        )
-
-        if transaction_type:
-            user_transactions = user_transactions.filter(transaction_type=transaction_type)
-
-        total_user_income = user_transactions.filter(transaction_type='income').aggregate(
-            total=Sum('amount'))['total'] or 0
-        total_user_expenses = user_transactions.filter(transaction_type='expense').aggregate(
-            total=Sum('amount'))['total'] or 0
+        totals = user_totals(request, start_date, end_date, transaction_type)
+        total_user_income = totals['total_income']
+        total_user_expenses = totals['total_expenses']
 
+        # Métricas de todas las categorías en una sola pasada
+        category_metrics = self._category_groups(request, start_date, end_date, transaction_type, rollup)
         for category in categories:
-            # Obtener transacciones de la categoría
-            category_transactions = category.transactions.filter(
-                date__range=[start_date, end_date]
-            )
-
-            if transaction_type:
-                category_transactions = category_transactions.filter(transaction_type=transaction_type)
-
-            # Calcular métricas
-            total_income = category_transactions.filter(transaction_type='income').aggregate(
-                total=Sum('amount'))['total'] or 0
-            total_expenses = category_transactions.filter(transaction_type='expense').aggregate(
-                total=Sum('amount'))['total'] or 0
-            transaction_count = category_transactions.count()
-            average_amount = category_transactions.aggregate(avg=Avg('amount'))['avg'] or 0
+            metrics = category_metrics.get(category.id, self.EMPTY_METRICS)
+            total_income = metrics['total_income']
+            total_expenses = metrics['total_expenses']
+            transaction_count = metrics['transaction_count']
+            average_amount = metrics['average_amount']
 
             # Calcular porcentajes
             percentage_of_income = (total_income / total_user_income * 100) if total_user_income > 0 else 0
             percentage_of_expenses = (total_expenses / total_user_expenses * 100) if total_user_expenses > 0 else 0
 
-            # Obtener última transacción
-            last_transaction = category_transactions.order_by('-date').first()
-
             # Calcular tendencia simple
             if transaction_type:
                 main_amount = total_income if transaction_type == 'income' else total_expenses
@@ -360,6 +606,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
             summaries.append({
                 'category_id': category.id,
+                'parent_id': category.parent_id,
                 'category_name': category.name,
                 'category_color': category.color,
                 'category_icon': category.icon,
@@ -369,7 +616,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 'average_amount': average_amount,
                 'percentage_of_total_expenses': round(percentage_of_expenses, 2),
                 'percentage_of_total_income': round(percentage_of_income, 2),
-                'last_transaction_date': last_transaction.date if last_transaction else None,
+                'last_transaction_date': metrics['last_transaction_date'],
                 'trend': 'stable'  # Simplificado por ahora
             })
 
@@ -382,6 +629,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         summaries = summaries[:limit]
 
         return Response({
+            'currency': scope.currency(request),
             'period': {
                 'start_date': start_date,
                 'end_date': end_date
@@ -394,74 +642,597 @@ class CategoryViewSet(viewsets.ModelViewSet):
             }
         })
 
-
-@extend_schema_view(
-    list=extend_schema(
-        summary="Listar transacciones",
-        description="Obtiene todas las transacciones del usuario autenticado",
+    @extend_schema(
+        summary="Árbol de categorías",
+        description="Obtiene la jerarquía de categorías del usuario con los totales acumulados de cada "
+                    "subárbol en todos los niveles",
         parameters=[
+            OpenApiParameter(
+                name='start_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de inicio para el análisis (YYYY-MM-DD)',
+                required=True
+            ),
+            OpenApiParameter(
+                name='end_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de fin para el análisis (YYYY-MM-DD)',
+                required=True
+            ),
             OpenApiParameter(
                 name='transaction_type',
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
-                description='Filtrar por tipo de transacción (income/expense)',
+                description='Tipo de transacción a analizar (income/expense)',
                 examples=[
                     OpenApiExample('Ingresos', value='income'),
                     OpenApiExample('Gastos', value='expense'),
                 ]
             ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['categories']
+    )
+    @action(detail=False, methods=['get'])
+    @single_flight
+    def tree(self, request):
+        """Obtiene el árbol de categorías con totales acumulados por subárbol"""
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        transaction_type = request.query_params.get('transaction_type')
+
+        if not start_date or not end_date:
+            return Response(
+                {'error': 'start_date y end_date son requeridos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Totales de todos los niveles en una sola consulta agrupada por ancestro
+        category_metrics = self._category_groups(request, start_date, end_date, transaction_type, rollup=True)
+
+        categories = list(self.get_queryset().order_by('name'))
+        nodes = {
+            category.id: {
+                'category_id': category.id,
+                'category_name': category.name,
+                'category_color': category.color,
+                'category_icon': category.icon,
+                **category_metrics.get(category.id, self.EMPTY_METRICS),
+                'children': [],
+            }
+            for category in categories
+        }
+        roots = []
+        for category in categories:
+            parent = nodes.get(category.parent_id)
+            (parent['children'] if parent else roots).append(nodes[category.id])
+
+        return Response({
+            'currency': scope.currency(request),
+            'period': {
+                'start_date': start_date,
+                'end_date': end_date
+            },
+            'categories': roots,
+            'uncategorized': category_metrics.get(None, self.EMPTY_METRICS),
+        })
+
+    @extend_schema(
+        summary="Comparación de categorías entre períodos",
+        description="Compara los últimos N períodos (semanas, meses, trimestres o años) para todas las "
+                    "categorías del usuario. Cada período incluye las métricas de todas las categorías con "
+                    "movimientos en alguno de ellos y la tendencia respecto del período anterior",
+        parameters=[
+            OpenApiParameter(
+                name='period',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Duración de cada período (por defecto: month)',
+                enum=list(PERIODS)
+            ),
             OpenApiParameter(
-                name='category',
+                name='periods',
                 type=OpenApiTypes.INT,
                 location=OpenApiParameter.QUERY,
-                description='Filtrar por ID de categoría'
+                description=f'Cantidad de períodos a comparar, entre 2 y {MAX_PERIODS} (por defecto: 12)'
             ),
             OpenApiParameter(
-                name='date_from',
+                name='end_date',
                 type=OpenApiTypes.DATE,
                 location=OpenApiParameter.QUERY,
-                description='Filtrar transacciones desde esta fecha (YYYY-MM-DD)'
+                description='Fecha de fin del último período (YYYY-MM-DD, por defecto: hoy)'
             ),
             OpenApiParameter(
-                name='date_to',
-                type=OpenApiTypes.DATE,
+                name='transaction_type',
+                type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
-                description='Filtrar transacciones hasta esta fecha (YYYY-MM-DD)'
+                description='Tipo de transacción a analizar (income/expense)',
+                examples=[
+                    OpenApiExample('Ingresos', value='income'),
+                    OpenApiExample('Gastos', value='expense'),
+                ]
+            ),
+            OpenApiParameter(
+                name='rollup',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Incluir en cada categoría los totales de sus subcategorías (por defecto: false)'
             ),
         ],
-        tags=['transactions']
-    ),
-    create=extend_schema(
-        summary="Crear transacción",
-        description="Crea una nueva transacción (ingreso o gasto) para el usuario autenticado",
-        examples=[
-            OpenApiExample(
-                'Ingreso',
-                value={
-                    'category': 1,
-                    'transaction_type': 'income',
-                    'amount': '1500.00',
-                    'date': '2024-01-15',
-                    'description': 'Salario mensual'
-                }
+        responses={200: CategoryComparisonResponseSerializer},
+        tags=['categories']
+    )
+    @action(detail=False, methods=['get'])
+    @single_flight
+    def comparison(self, request):
+        """Compara las métricas de todas las categorías en los últimos N períodos"""
+        try:
+            period, buckets = self._parse_periods(request)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        transaction_type = request.query_params.get('transaction_type')
+        rollup = request.query_params.get('rollup', '').lower() in ('1', 'true', 'yes')
+
+        groups, totals = self._period_groups(request, period, buckets, transaction_type, rollup)
+        categories = self._active_categories(groups, transaction_type)
+
+        comparisons = []
+        for index, (start_date, end_date) in enumerate(buckets):
+            period_totals = totals[index]
+            summaries = []
+            for category in categories:
+                metrics = groups[index].get(category.id, self.EMPTY_METRICS)
+                previous = groups[index - 1].get(category.id, self.EMPTY_METRICS) if index else None
+                total_income = metrics['total_income']
+                total_expenses = metrics['total_expenses']
+                summaries.append({
+                    'category_id': category.id,
+                    'parent_id': category.parent_id,
+                    'category_name': category.name,
+                    'category_color': category.color,
+                    'category_icon': category.icon,
+                    'total_income': total_income,
+                    'total_expenses': total_expenses,
+                    'transaction_count': metrics['transaction_count'],
+                    'average_amount': metrics['average_amount'],
+                    'percentage_of_total_expenses': round(
+                        total_expenses / period_totals['total_expenses'] * 100, 2
+                    ) if period_totals['total_expenses'] > 0 else 0,
+                    'percentage_of_total_income': round(
+                        total_income / period_totals['total_income'] * 100, 2
+                    ) if period_totals['total_income'] > 0 else 0,
+                    'last_transaction_date': metrics['last_transaction_date'],
+                    'trend': self._trend(
+                        self._main_amount(metrics, transaction_type),
+                        self._main_amount(previous, transaction_type) if previous else 0,
+                    )[0],
+                })
+            comparisons.append({
+                'period': timeseries.bucket_label(start_date, period),
+                'start_date': start_date,
+                'end_date': end_date,
+                'categories': summaries,
+                'total_income': period_totals['total_income'],
+                'total_expenses': period_totals['total_expenses'],
+                'net_savings': period_totals['total_income'] - period_totals['total_expenses'],
+            })
+
+        return Response({
+            'currency': scope.currency(request),
+            'period': period,
+            'periods': CategoryComparisonSerializer(comparisons, many=True).data,
+        })
+
+    @extend_schema(
+        summary="Tendencias de categorías",
+        description="Evolución de cada categoría del usuario en los últimos N períodos, con la variación "
+                    "entre períodos consecutivos y la tendencia del último período respecto del anterior. "
+                    "El importe de cada punto son los gastos, o los del tipo indicado en `transaction_type`",
+        parameters=[
+            OpenApiParameter(
+                name='period',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Duración de cada período (por defecto: month)',
+                enum=list(PERIODS)
             ),
-            OpenApiExample(
-                'Gasto',
-                value={
-                    'category': 2,
-                    'transaction_type': 'expense',
-                    'amount': '50.00',
-                    'date': '2024-01-15',
-                    'description': 'Compra de comestibles'
-                }
+            OpenApiParameter(
+                name='periods',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f'Cantidad de períodos a comparar, entre 2 y {MAX_PERIODS} (por defecto: 12)'
+            ),
+            OpenApiParameter(
+                name='end_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de fin del último período (YYYY-MM-DD, por defecto: hoy)'
+            ),
+            OpenApiParameter(
+                name='transaction_type',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Tipo de transacción a analizar (income/expense)',
+                examples=[
+                    OpenApiExample('Ingresos', value='income'),
+                    OpenApiExample('Gastos', value='expense'),
+                ]
+            ),
+            OpenApiParameter(
+                name='rollup',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Incluir en cada categoría los totales de sus subcategorías (por defecto: false)'
             ),
         ],
-        tags=['transactions']
-    ),
-    retrieve=extend_schema(
-        summary="Obtener transacción",
-        description="Obtiene los detalles de una transacción específica",
-        tags=['transactions']
+        responses={200: CategoryTrendsResponseSerializer},
+        tags=['categories']
+    )
+    @action(detail=False, methods=['get'])
+    @single_flight
+    def trends(self, request):
+        """Obtiene la evolución de todas las categorías en los últimos N períodos"""
+        try:
+            period, buckets = self._parse_periods(request)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        transaction_type = request.query_params.get('transaction_type')
+        rollup = request.query_params.get('rollup', '').lower() in ('1', 'true', 'yes')
+
+        groups, _ = self._period_groups(request, period, buckets, transaction_type, rollup)
+        trends = []
+        for category in self._active_categories(groups, transaction_type):
+            data_points = []
+            previous = None
+            for index, (start_date, end_date) in enumerate(buckets):
+                amount = self._main_amount(groups[index].get(category.id, self.EMPTY_METRICS), transaction_type)
+                data_points.append({
+                    'period': timeseries.bucket_label(start_date, period),
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'amount': amount,
+                    'change': amount - previous if previous is not None else None,
+                    'change_percentage': self._trend(amount, previous)[1] if previous else None,
+                })
+                previous = amount
+
+            direction, percentage = self._trend(data_points[-1]['amount'], data_points[-2]['amount'])
+            trends.append({
+                'category_id': category.id,
+                'category_name': category.name,
+                'period': period,
+                'data_points': data_points,
+                'trend_direction': direction,
+                'trend_percentage': percentage,
+            })
+
+        return Response({
+            'currency': scope.currency(request),
+            'period': period,
+            'categories': CategoryTrendSerializer(trends, many=True).data,
+        })
+
+    @extend_schema(
+        summary="Rankings y percentiles por categoría",
+        description="Obtiene, para todas las categorías del usuario, las transacciones de mayor importe y los "
+                    "percentiles (por defecto mediana y p90) del importe. Cada uno sale de una sola consulta "
+                    "con funciones de ventana particionadas por categoría",
+        parameters=[
+            OpenApiParameter(
+                name='start_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de inicio para el análisis (YYYY-MM-DD)',
+                required=True
+            ),
+            OpenApiParameter(
+                name='end_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de fin para el análisis (YYYY-MM-DD)',
+                required=True
+            ),
+            OpenApiParameter(
+                name='transaction_type',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Tipo de transacción a analizar (income/expense)',
+                examples=[
+                    OpenApiExample('Ingresos', value='income'),
+                    OpenApiExample('Gastos', value='expense'),
+                ]
+            ),
+            OpenApiParameter(
+                name='limit',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f'Transacciones de mayor importe por categoría, hasta {MAX_RANKING} (por defecto: 5)'
+            ),
+            OpenApiParameter(
+                name='percentiles',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Percentiles separados por comas, entre 0 y 100 (por defecto: 50,90)'
+            ),
+            OpenApiParameter(
+                name='rollup',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Incluir en cada categoría las transacciones de sus subcategorías (por defecto: false)'
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['categories']
+    )
+    @action(detail=False, methods=['get'])
+    @single_flight
+    def rankings(self, request):
+        """Obtiene las transacciones de mayor importe y los percentiles de cada categoría"""
+        params = request.query_params
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
+        transaction_type = params.get('transaction_type')
+        rollup = params.get('rollup', '').lower() in ('1', 'true', 'yes')
+
+        if not start_date or not end_date:
+            return Response(
+                {'error': 'start_date y end_date son requeridos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(params.get('limit', 5))
+            percentiles = sorted({int(value) for value in params.get('percentiles', '50,90').split(',')})
+        except ValueError:
+            limit, percentiles = 0, []
+        if not 1 <= limit <= self.MAX_RANKING or not percentiles or not 0 <= percentiles[0] <= percentiles[-1] <= 100:
+            return Response(
+                {'error': f'limit debe estar entre 1 y {self.MAX_RANKING} y percentiles entre 0 y 100'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        transactions = Transaction.objects.filter(user_id__in=scope.user_ids(request), date__range=[start_date, end_date])
+        if transaction_type:
+            transactions = transactions.filter(transaction_type=transaction_type)
+        top = ranking.top_per_category(transactions, limit, self.RANKING_FIELDS, rollup)
+        distribution = ranking.percentiles_per_category(transactions, percentiles, rollup)
+
+        categories = []
+        for category in self.get_queryset().order_by('name'):
+            if category.id not in distribution:
+                continue
+            categories.append({
+                'category_id': category.id,
+                'parent_id': category.parent_id,
+                'category_name': category.name,
+                'category_color': category.color,
+                'transaction_count': distribution[category.id]['count'],
+                'percentiles': {
+                    f'p{percentile}': value for percentile, value in distribution[category.id]['percentiles'].items()
+                },
+                'top_transactions': [
+                    {field: value for field, value in row.items() if field != 'allocation_category'}
+                    for row in top.get(category.id, [])
+                ],
+            })
+
+        response = {
+            'currency': scope.currency(request),
+            'period': {
+                'start_date': start_date,
+                'end_date': end_date
+            },
+            'categories': categories,
+        }
+        archived_until = archive_horizon(request, start_date)
+        if archived_until is not None:
+            # Los rankings y percentiles se calculan sobre las transacciones en línea
+            response['archived_until'] = archived_until
+        return Response(response)
+
+    def _parse_periods(self, request):
+        """Tipo de período y los N últimos períodos pedidos como (inicio, fin)"""
+        params = request.query_params
+        period = params.get('period', 'month')
+        if period not in self.PERIODS:
+            raise ValueError(f"period debe ser uno de: {', '.join(self.PERIODS)}")
+        try:
+            count = int(params.get('periods', 12))
+        except ValueError:
+            count = 0
+        if not 2 <= count <= self.MAX_PERIODS:
+            raise ValueError(f'periods debe estar entre 2 y {self.MAX_PERIODS}')
+        try:
+            end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date() if params.get('end_date') \
+                else timezone.localdate()
+        except ValueError:
+            raise ValueError('Formato de fecha inválido. Use YYYY-MM-DD')
+        return period, timeseries.last_buckets(end_date, period, count)
+
+    def _period_groups(self, request, period, buckets, transaction_type, rollup):
+        """
+        Métricas por categoría y totales del usuario de cada período.
+
+        Desde el historial en memoria cada período es una pasada sobre su rango;
+        con SQL todos los períodos salen de una consulta agrupada por categoría y
+        período (el período es un `Trunc` de la fecha) más una por período para los totales.
+        """
+        if ledger_cache.get_combined(scope.user_ids(request)) is not None:
+            groups = [
+                self._category_groups(request, start_date, end_date, transaction_type, rollup)
+                for start_date, end_date in buckets
+            ]
+            totals = [user_totals(request, start_date, end_date, transaction_type) for start_date, end_date in buckets]
+            return groups, totals
+
+        transactions = Transaction.objects.filter(user_id__in=scope.user_ids(request), date__range=[buckets[0][0], buckets[-1][1]])
+        if transaction_type:
+            transactions = transactions.filter(transaction_type=transaction_type)
+        bucket = Trunc('date', period, output_field=DateField())
+        positions = {start_date: index for index, (start_date, _) in enumerate(buckets)}
+
+        groups = [{} for _ in buckets]
+        rows = splits.allocations(transactions, rollup).values(
+            category_group=F('allocation_category'), bucket=bucket
+        ).annotate(**self._metric_aggregates()).order_by()
+        for row in rows:
+            groups[positions[row['bucket']]][row['category_group']] = self._metrics_from_row(row)
+
+        totals = [{'total_income': 0, 'total_expenses': 0} for _ in buckets]
+        rows = transactions.values(bucket=bucket).annotate(
+            total_income=Sum('base_amount', filter=Q(transaction_type='income')),
+            total_expenses=Sum('base_amount', filter=Q(transaction_type='expense')),
+        ).order_by()
+        for row in rows:
+            totals[positions[row['bucket']]] = {
+                'total_income': row['total_income'] or 0,
+                'total_expenses': row['total_expenses'] or 0,
+            }
+
+        # Los períodos que llegan al archivo suman sus transacciones archivadas
+        until = archive_horizon(request, buckets[0][0])
+        if until is not None:
+            archived = archived_transactions(request, buckets[0][0], buckets[-1][1], transaction_type)
+            for bucket_date, (income, expense) in timeseries.flows_from_sql(archived, period).items():
+                index = positions[bucket_date]
+                totals[index] = {
+                    'total_income': totals[index]['total_income'] + from_cents(income),
+                    'total_expenses': totals[index]['total_expenses'] + from_cents(expense),
+                }
+            for index, (start_date, end_date) in enumerate(buckets):
+                if start_date > until:
+                    break
+                archived_groups = archive.archived_groups(
+                    scope.user_ids(request), until, start_date, end_date, transaction_type
+                )
+                if rollup:
+                    archived_groups = self._rollup_groups(request, archived_groups)
+                self._merge_archived_groups(groups[index], archived_groups)
+        return groups, totals
+
+    def _active_categories(self, groups, transaction_type):
+        """Categorías con movimientos en alguno de los períodos, por importe total descendente"""
+        amounts = {}
+        for period_groups in groups:
+            for category_id, metrics in period_groups.items():
+                amounts[category_id] = amounts.get(category_id, 0) + self._main_amount(metrics, transaction_type)
+        categories = [category for category in self.get_queryset() if category.id in amounts]
+        categories.sort(key=lambda category: amounts[category.id], reverse=True)
+        return categories
+
+    def _main_amount(self, metrics, transaction_type):
+        # Igual que en el resumen: los gastos, salvo que se pida otro tipo
+        return metrics['total_income'] if transaction_type == 'income' else metrics['total_expenses']
+
+    def _trend(self, current, previous):
+        """Dirección y porcentaje de variación de `current` respecto de `previous` (±5% es estable)"""
+        if not previous:
+            return 'stable', 0
+        percentage = round((current - previous) / previous * 100, 2)
+        if percentage > 5:
+            return 'up', percentage
+        if percentage < -5:
+            return 'down', percentage
+        return 'stable', percentage
+
+
+@extend_schema(parameters=[scope.PARAMETER])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar transacciones",
+        description="Obtiene todas las transacciones del usuario autenticado",
+        parameters=[
+            OpenApiParameter(
+                name='transaction_type',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Filtrar por tipo de transacción (income/expense)',
+                examples=[
+                    OpenApiExample('Ingresos', value='income'),
+                    OpenApiExample('Gastos', value='expense'),
+                ]
+            ),
+            OpenApiParameter(
+                name='category',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Filtrar por ID de categoría'
+            ),
+            OpenApiParameter(
+                name='account',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Filtrar por ID de cuenta'
+            ),
+            OpenApiParameter(
+                name='date_from',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Filtrar transacciones desde esta fecha (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='date_to',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Filtrar transacciones hasta esta fecha (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='search',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Búsqueda de texto completo en la descripción (por prefijo, ordenada por relevancia)',
+                examples=[
+                    OpenApiExample('Suscripción', value='netflix'),
+                ]
+            ),
+            OpenApiParameter(
+                name='include_archived',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Incluir las transacciones archivadas aunque el rango de fechas no llegue al archivo '
+                            '(por defecto solo se incluyen si date_from o date_to son anteriores al horizonte del archivo)'
+            ),
+            OpenApiParameter(
+                name='compact',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Devolver el listado en formato columnar: un objeto con un array por campo'
+            ),
+        ],
+        tags=['transactions']
+    ),
+    create=extend_schema(
+        summary="Crear transacción",
+        description="Crea una nueva transacción (ingreso o gasto) para el usuario autenticado",
+        examples=[
+            OpenApiExample(
+                'Ingreso',
+                value={
+                    'category': 1,
+                    'transaction_type': 'income',
+                    'amount': '1500.00',
+                    'date': '2024-01-15',
+                    'description': 'Salario mensual'
+                }
+            ),
+            OpenApiExample(
+                'Gasto',
+                value={
+                    'category': 2,
+                    'transaction_type': 'expense',
+                    'amount': '50.00',
+                    'date': '2024-01-15',
+                    'description': 'Compra de comestibles'
+                }
+            ),
+        ],
+        tags=['transactions']
+    ),
+    retrieve=extend_schema(
+        summary="Obtener transacción",
+        description="Obtiene los detalles de una transacción específica",
+        tags=['transactions']
     ),
     update=extend_schema(
         summary="Actualizar transacción",
@@ -479,7 +1250,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         tags=['transactions']
     ),
 )
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(CostAwareMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar transacciones financieras.
     
@@ -488,91 +1259,519 @@ class TransactionViewSet(viewsets.ModelViewSet):
     """
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
-    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    analytics_actions = ('statistics', 'timeseries')
+    # Filas importadas por unidad de costo
+    IMPORT_ROWS_PER_UNIT = 100
+    CATEGORY_STATS_FIELDS = ('category__name', 'category__color', 'total', 'count', 'avg_amount')
+    STATISTICS_TRANSACTION_FIELDS = (
+        'id', 'amount', 'currency', 'base_amount', 'transaction_type', 'date', 'description', 'category__name'
+    )
 
     def get_queryset(self):
-        queryset = self.request.user.transactions.all()
-        
+        return self._filter_transactions(
+            scope.visible(self.request, Transaction.objects.prefetch_related('splits')), self.request.query_params
+        )
+
+    def get_request_cost(self, request):
+        if self.action == 'import_transactions' and isinstance(request.data, list):
+            return -(-len(request.data) // self.IMPORT_ROWS_PER_UNIT)
+        return super().get_request_cost(request)
+
+    def get_data_version(self, request):
+        return ledger_versions(scope.user_ids(request))
+
+    def get_cost_buckets(self, request):
+        if self.action != 'timeseries':
+            return super().get_cost_buckets(request)
+        # Los puntos de la serie a la resolución que se calculará, no los días del rango
+        start_date, end_date = request_dates(request)
+        if start_date is None or end_date is None or end_date < start_date:
+            return 1
+        resolution = request.query_params.get('resolution', 'auto')
+        if resolution == 'auto':
+            try:
+                max_points = int(request.query_params.get('max_points', timeseries.DEFAULT_POINTS))
+            except ValueError:
+                return 1
+            resolution = timeseries.choose_resolution(start_date, end_date, max_points)
+        elif resolution not in timeseries.RESOLUTIONS:
+            return 1
+        return timeseries.bucket_count(start_date, end_date, resolution)
+
+    def _filter_transactions(self, queryset, params, search=search_transactions):
         # Filtros opcionales
-        transaction_type = self.request.query_params.get('transaction_type', None)
+        transaction_type = params.get('transaction_type', None)
         if transaction_type:
             queryset = queryset.filter(transaction_type=transaction_type)
             
-        category = self.request.query_params.get('category', None)
+        category = params.get('category', None)
         if category:
             queryset = queryset.filter(category_id=category)
+
+        account = params.get('account', None)
+        if account:
+            queryset = queryset.filter(account_id=account)
             
-        date_from = self.request.query_params.get('date_from', None)
+        date_from = params.get('date_from', None)
         if date_from:
             queryset = queryset.filter(date__gte=date_from)
             
-        date_to = self.request.query_params.get('date_to', None)
+        date_to = params.get('date_to', None)
         if date_to:
             queryset = queryset.filter(date__lte=date_to)
+
+        text = params.get('search', None)
+        if text:
+            queryset = search(queryset, text)
             
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        data = serializer.validated_data
+        if data.get('category') is not None or data.get('splits'):
+            serializer.save(user=self.request.user)
+            return
+
+        # Sin categoría se aplican las reglas de categorización del usuario
+        data.pop('category', None)
+        category_id = rule_cache.get(self.request.user.pk).classify(
+            data.get('description'), data['amount'], data['transaction_type']
+        )
+        serializer.save(user=self.request.user, category_id=category_id)
+
+    def list(self, request, *args, **kwargs):
+        # Ruta rápida para JSON: tuplas de values_list() en lugar de instancias del modelo
+        if self.paginator is not None or not isinstance(request.accepted_renderer, FastJSONRenderer):
+            response = super().list(request, *args, **kwargs)
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            response = Response(serialize_rows(queryset, self.get_serializer()))
+
+        archived = self._archived_rows(request) if self.paginator is None else []
+        if archived:
+            rows = [*response.data, *archived]
+            if not request.query_params.get('search'):
+                rows.sort(key=lambda row: (row['date'], row['created_at']), reverse=True)
+            response.data = rows
+        if compact.requested(request) and self.paginator is None:
+            fields = [name for name, field in self.get_serializer().fields.items() if not field.write_only]
+            response.data = compact.columns(response.data, fields)
+        return response
+
+    def _archived_rows(self, request):
+        """Transacciones archivadas del listado: solo si el rango de fechas pedido llega al archivo"""
+        params = request.query_params
+        horizon = self._archived_until(request)
+        if horizon is None:
+            return []
+        try:
+            date_from, date_to = (
+                datetime.strptime(params[name], '%Y-%m-%d').date() if params.get(name) else None
+                for name in ('date_from', 'date_to')
+            )
+        except ValueError:
+            return []
+        if params.get('include_archived', '').lower() not in ('1', 'true') \
+                and not archive.reaches_archive(horizon, date_from, date_to):
+            return []
+        queryset = self._filter_transactions(
+            scope.visible(request, ArchivedTransaction.objects.all()), params, search=archive.search_archived
+        )
+        return ArchivedTransactionSerializer(queryset, many=True).data
+
+    def _archived_until(self, request):
+        """Última fecha archivada de los datos de la petición (la mayor entre los miembros de un hogar)"""
+        archives = scope.visible(request, TransactionArchive.objects.all())
+        return archives.aggregate(until=Max('archived_until'))['until']
 
     @extend_schema(
-        summary="Estadísticas de transacciones",
-        description="Obtiene estadísticas generales de las transacciones del usuario",
+        summary="Importar transacciones",
+        description="Crea varias transacciones en una sola operación. Las que no indiquen categoría "
+                    "se categorizan con las reglas de categorización del usuario",
+        request=TransactionSerializer(many=True),
+        responses={201: OpenApiTypes.OBJECT},
+        examples=[
+            OpenApiExample(
+                'Importación',
+                value=[
+                    {'transaction_type': 'expense', 'amount': '12.99', 'date': '2024-01-05', 'description': 'NETFLIX.COM'},
+                    {'transaction_type': 'expense', 'amount': '45.20', 'date': '2024-01-06', 'description': 'Supermercado Día'},
+                ],
+                request_only=True
+            ),
+        ],
+        tags=['transactions']
+    )
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_transactions(self, request):
+        """Importa transacciones en bloque aplicando las reglas de categorización"""
+        serializer = TransactionSerializer(data=request.data, many=True, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+
+        split_lines = [data.pop('splits', None) or [] for data in serializer.validated_data]
+        transactions = [
+            Transaction(user=request.user, **data) for data in serializer.validated_data
+        ]
+        # Las transacciones divididas ya están categorizadas por sus líneas
+        unsplit = [transaction for transaction, lines in zip(transactions, split_lines) if not lines]
+        uncategorized = sum(1 for transaction in unsplit if transaction.category_id is None)
+        categorize(unsplit, request.user.pk)
+        fill_base_amounts(transactions)
+
+        with db_transaction.atomic():
+            sync_version = bump_versions([request.user.pk])[request.user.pk]
+            for transaction in transactions:
+                transaction.sync_version = sync_version
+            Transaction.objects.bulk_create(transactions, batch_size=1000)
+            changelog.record_created(transactions)
+            balances.apply_balance_changes(balances.transaction_changes(transactions))
+            TransactionSplit.objects.bulk_create(
+                (
+                    TransactionSplit(transaction=transaction, **line)
+                    for transaction, lines in zip(transactions, split_lines)
+                    for line in lines
+                ),
+                batch_size=1000,
+            )
+            transactions_bulk_changed.send(sender=Transaction, user_ids=[request.user.pk])
+
+        return Response({
+            'created': len(transactions),
+            'categorized': uncategorized - sum(1 for transaction in unsplit if transaction.category_id is None),
+        }, status=status.HTTP_201_CREATED)
+
+    def _bulk_selection(self, request, serializer):
+        """Transacciones seleccionadas por `ids` o `filter`, restringidas al usuario con un solo WHERE"""
+        queryset = request.user.transactions.all()
+        if 'ids' in serializer.validated_data:
+            return queryset.filter(id__in=serializer.validated_data['ids'])
+        return self._filter_transactions(queryset, serializer.validated_data['filter'])
+
+    @extend_schema(
+        summary="Actualización masiva de transacciones",
+        description="Aplica los mismos cambios (categoría, cuenta, tipo o descripción) a las transacciones "
+                    "indicadas por `ids` o por `filter` (los filtros del listado) con un solo UPDATE. Las "
+                    "transacciones divididas no se recategorizan. Los ids de otros usuarios se ignoran",
+        request=TransactionBulkUpdateSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        examples=[
+            OpenApiExample(
+                'Recategorizar por filtro',
+                value={'filter': {'search': 'netflix', 'date_from': '2024-01-01'}, 'changes': {'category': 3}},
+                request_only=True
+            ),
+        ],
+        tags=['transactions']
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """Actualiza varias transacciones en una sola operación"""
+        serializer = TransactionBulkUpdateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        queryset = self._bulk_selection(request, serializer)
+        changes = serializer.validated_data['changes']
+
+        account = changes.get('account')
+        if account is not None and queryset.exclude(currency=account.currency).exists():
+            return Response(
+                {'currency': 'La moneda de las transacciones debe coincidir con la de la cuenta.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({'updated': bulk.update_transactions(queryset, request.user.pk, changes)})
+
+    @extend_schema(
+        summary="Eliminación masiva de transacciones",
+        description="Elimina las transacciones indicadas por `ids` o por `filter` (los filtros del listado) "
+                    "con un solo DELETE. Los saldos de las cuentas y la sincronización se actualizan una "
+                    "vez por operación. Los ids de otros usuarios se ignoran",
+        request=TransactionSelectionSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        examples=[
+            OpenApiExample(
+                'Eliminar por ids',
+                value={'ids': [12, 15, 18]},
+                request_only=True
+            ),
+        ],
+        tags=['transactions']
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """Elimina varias transacciones en una sola operación"""
+        serializer = TransactionSelectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = self._bulk_selection(request, serializer)
+        return Response({'deleted': bulk.delete_transactions(queryset, request.user.pk)})
+
+    @extend_schema(
+        summary="Totales archivados",
+        description="Obtiene los totales mensuales por categoría y tipo de las transacciones archivadas "
+                    "(años cerrados movidos al archivo con `archive_transactions`)",
         parameters=[
             OpenApiParameter(
                 name='start_date',
                 type=OpenApiTypes.DATE,
                 location=OpenApiParameter.QUERY,
-                description='Fecha de inicio para las estadísticas (YYYY-MM-DD)'
+                description='Primer mes incluido (YYYY-MM-DD)'
             ),
             OpenApiParameter(
                 name='end_date',
                 type=OpenApiTypes.DATE,
                 location=OpenApiParameter.QUERY,
-                description='Fecha de fin para las estadísticas (YYYY-MM-DD)'
+                description='Último mes incluido (YYYY-MM-DD)'
             ),
         ],
+        responses={200: OpenApiTypes.OBJECT},
         tags=['transactions']
     )
-    @action(detail=False, methods=['get'])
-    def statistics(self, request):
-        """Obtiene estadísticas generales de las transacciones"""
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
+    @action(detail=False, methods=['get'], url_path='archive-summary')
+    def archive_summary(self, request):
+        """Obtiene los totales mensuales de las transacciones archivadas"""
+        rollups = scope.visible(request, TransactionRollup.objects.all())
+        try:
+            start_date = request.query_params.get('start_date')
+            if start_date:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+                rollups = rollups.filter(month__gte=timeseries.bucket_start(start_date, 'month'))
+            end_date = request.query_params.get('end_date')
+            if end_date:
+                rollups = rollups.filter(month__lte=datetime.strptime(end_date, '%Y-%m-%d').date())
+        except ValueError:
+            return Response({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
 
-        queryset = self.get_queryset()
+        return Response({
+            'currency': scope.currency(request),
+            'archived_until': self._archived_until(request),
+            'months': TransactionRollupSerializer(rollups.order_by('month', 'category', 'transaction_type'), many=True).data,
+        })
 
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
+    @extend_schema(
+        summary="Estadísticas de transacciones",
+        description="Obtiene estadísticas generales de las transacciones del usuario",
+        parameters=[
+            OpenApiParameter(
+                name='start_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de inicio para las estadísticas (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='end_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de fin para las estadísticas (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='compact',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Devolver by_category, recent_transactions y largest_transactions en formato columnar'
+            ),
+        ],
+        tags=['transactions']
+    )
+    @action(detail=False, methods=['get'])
+    @single_flight
+    def statistics(self, request):
+        """Obtiene estadísticas generales de las transacciones"""
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+
+        # La búsqueda de texto y el filtro por cuenta se resuelven en la base de datos
+        in_database = request.query_params.get('search') or request.query_params.get('account')
+        ledger = None if in_database else ledger_cache.get_combined(scope.user_ids(request))
+        archived = self._archived_statistics(start_date, end_date)
+        if ledger is not None:
+            statistics = self._statistics_from_ledger(ledger, start_date, end_date, archived)
+        else:
+            statistics = self._statistics_from_sql(start_date, end_date, archived)
+        if archived is not None:
+            # Los totales incluyen el archivo; las transacciones recientes y mayores, solo las en línea
+            statistics['archived_until'] = archived['until']
+        if compact.requested(request):
+            statistics['by_category'] = compact.columns(statistics['by_category'], self.CATEGORY_STATS_FIELDS)
+            for name in ('recent_transactions', 'largest_transactions'):
+                statistics[name] = compact.columns(statistics[name], self.STATISTICS_TRANSACTION_FIELDS)
+
+        return Response({
+            **statistics,
+            'currency': scope.currency(request),
+            'period': {
+                'start_date': start_date,
+                'end_date': end_date
+            }
+        })
+
+    def _date_bounds(self, start_date, end_date):
+        """Rango efectivo de las estadísticas: el más estrecho entre start/end_date y date_from/date_to"""
+        params = self.request.query_params
+        lower_bounds = [value for value in (params.get('date_from'), start_date) if value]
+        upper_bounds = [value for value in (params.get('date_to'), end_date) if value]
+        return (
+            max(lower_bounds, key=to_ordinal) if lower_bounds else None,
+            min(upper_bounds, key=to_ordinal) if upper_bounds else None,
+        )
+
+    def _archived_statistics(self, start_date, end_date):
+        """
+        Totales y acumulados por categoría (en centavos) de las transacciones archivadas, o None.
+
+        None si el rango no llega al archivo. Con los mismos filtros que el
+        listado; sin filtros de categoría, cuenta o texto los acumulados por
+        categoría salen de los totales mensuales.
+        """
+        request = self.request
+        params = request.query_params
+        lower, upper = self._date_bounds(start_date, end_date)
+        until = archive_horizon(request, lower)
+        if until is None:
+            return None
+        queryset = self._filter_transactions(
+            scope.visible(request, ArchivedTransaction.objects.all()), params, search=archive.search_archived
+        )
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        if any(params.get(name) for name in ('category', 'account', 'search')):
+            groups = archive.group_allocations(queryset)
+        else:
+            groups = archive.archived_groups(
+                scope.user_ids(request), until, lower, upper, params.get('transaction_type') or None
+            )
+        return {'until': until, 'totals': archive.archived_totals(queryset), 'groups': groups}
+
+    def _statistics_from_ledger(self, ledger, start_date, end_date, archived=None):
+        """Estadísticas calculadas sobre el historial columnar, con los mismos filtros que get_queryset"""
+        params = self.request.query_params
+        lower, upper = self._date_bounds(start_date, end_date)
+        filters = {
+            'start_date': lower,
+            'end_date': upper,
+            'transaction_type': params.get('transaction_type') or None,
+            'category_id': params.get('category') or None,
+        }
+
+        groups = ledger.by_category(**filters)
+        totals = ledger.totals(**filters)
+        if archived is not None:
+            archive.merge_groups(groups, archived['groups'])
+            totals = {name: totals[name] + archived['totals'][name] for name in ('income', 'expense', 'count')}
+        categories = {
+            category['id']: category
+            for category in Category.objects.filter(id__in=groups).values('id', 'name', 'color')
+        }
+        category_stats = []
+        for category_id, group in groups.items():
+            category = categories.get(category_id, {})
+            total = group['income'] + group['expense']
+            category_stats.append({
+                'category__name': category.get('name'),
+                'category__color': category.get('color'),
+                'total': from_cents(total),
+                'count': group['count'],
+                'avg_amount': average_from_cents(total, group['count']),
+            })
+        category_stats.sort(key=lambda stats: stats['total'], reverse=True)
+
+        # Los ids salen del historial; las filas se leen en una sola consulta por clave primaria
+        recent_ids = ledger.latest(5, **filters)
+        largest_ids = ledger.largest(5, **filters)
+        rows = {
+            row['id']: row for row in Transaction.objects.filter(
+                id__in=set(recent_ids + largest_ids)).values(*self.STATISTICS_TRANSACTION_FIELDS)
+        }
+
+        total_income = from_cents(totals['income'])
+        total_expenses = from_cents(totals['expense'])
+        return {
+            'summary': {
+                'total_income': total_income,
+                'total_expenses': total_expenses,
+                'net_savings': total_income - total_expenses,
+                'total_transactions': totals['count'],
+                'average_transaction': average_from_cents(totals['income'] + totals['expense'], totals['count']),
+            },
+            'by_category': category_stats,
+            'recent_transactions': [rows[pk] for pk in recent_ids if pk in rows],
+            'largest_transactions': [rows[pk] for pk in largest_ids if pk in rows],
+        }
+
+    def _statistics_from_sql(self, start_date, end_date, archived=None):
+        """Estadísticas calculadas con consultas agregadas"""
+        queryset = self.get_queryset()
+
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
             queryset = queryset.filter(date__lte=end_date)
 
         # Estadísticas generales
-        total_income = queryset.filter(transaction_type='income').aggregate(
-            total=Sum('amount'))['total'] or 0
-        total_expenses = queryset.filter(transaction_type='expense').aggregate(
-            total=Sum('amount'))['total'] or 0
+        filtered = any(
+            self.request.query_params.get(name) for name in ('category', 'account', 'date_from', 'date_to', 'search')
+        )
+        if filtered:
+            totals = queryset.aggregate(
+                total_income=Sum('base_amount', filter=Q(transaction_type='income')),
+                total_expenses=Sum('base_amount', filter=Q(transaction_type='expense')),
+            )
+            total_income = totals['total_income'] or 0
+            total_expenses = totals['total_expenses'] or 0
+        else:
+            # Sin filtros adicionales coincide con el agregado común memoizado
+            totals = user_totals(
+                self.request, start_date, end_date,
+                self.request.query_params.get('transaction_type')
+            )
+            total_income = totals['total_income']
+            total_expenses = totals['total_expenses']
         total_transactions = queryset.count()
-        average_transaction = queryset.aggregate(avg=Avg('amount'))['avg'] or 0
+        average_transaction = queryset.aggregate(avg=Avg('base_amount'))['avg'] or 0
+        if archived is not None:
+            if filtered:
+                # user_totals ya incluye el archivo
+                total_income += from_cents(archived['totals']['income'])
+                total_expenses += from_cents(archived['totals']['expense'])
+            total_transactions += archived['totals']['count']
+            average_transaction = (
+                (total_income + total_expenses) / total_transactions if total_transactions else 0
+            )
 
-        # Estadísticas por categoría
-        category_stats = queryset.values('category__name', 'category__color').annotate(
-            total=Sum('amount'),
+        # Estadísticas por categoría (las transacciones divididas se reparten entre sus líneas)
+        groups = list(splits.allocations(queryset).values(category_group=F('allocation_category')).annotate(
+            total=Sum('allocation_amount'),
             count=Count('id'),
-            avg_amount=Avg('amount')
-        ).order_by('-total')
+            avg_amount=Avg('allocation_amount')
+        ).order_by('-total'))
+        if archived is not None:
+            groups = self._merge_archived_stats(groups, archived['groups'])
+        categories = {
+            category['id']: category
+            for category in Category.objects.filter(
+                id__in=[group['category_group'] for group in groups]
+            ).values('id', 'name', 'color')
+        }
+        category_stats = [
+            {
+                'category__name': categories.get(group['category_group'], {}).get('name'),
+                'category__color': categories.get(group['category_group'], {}).get('color'),
+                'total': group['total'],
+                'count': group['count'],
+                'avg_amount': group['avg_amount'],
+            }
+            for group in groups
+        ]
 
         # Transacciones más recientes
-        recent_transactions = list(queryset.order_by('-date')[:5].values(
-            'id', 'amount', 'transaction_type', 'date', 'description', 'category__name'
-        ))
+        recent_transactions = list(queryset.order_by('-date')[:5].values(*self.STATISTICS_TRANSACTION_FIELDS))
 
         # Transacciones más grandes
-        largest_transactions = list(queryset.order_by('-amount')[:5].values(
-            'id', 'amount', 'transaction_type', 'date', 'description', 'category__name'
-        ))
+        largest_transactions = list(queryset.order_by('-base_amount')[:5].values(*self.STATISTICS_TRANSACTION_FIELDS))
 
-        return Response({
+        return {
             'summary': {
                 'total_income': total_income,
                 'total_expenses': total_expenses,
@@ -583,8 +1782,456 @@ class TransactionViewSet(viewsets.ModelViewSet):
             'by_category': category_stats,
             'recent_transactions': recent_transactions,
             'largest_transactions': largest_transactions,
-            'period': {
-                'start_date': start_date,
-                'end_date': end_date
-            }
+        }
+
+    def _merge_archived_stats(self, groups, archived):
+        """Suma a las filas por categoría (total, count, avg_amount) los acumulados en centavos del archivo"""
+        rows = {group['category_group']: group for group in groups}
+        for category_id, extra in archived.items():
+            key = None if category_id == NO_CATEGORY else category_id
+            row = rows.setdefault(key, {'category_group': key, 'total': 0, 'count': 0})
+            row['total'] = (row['total'] or 0) + from_cents(extra['income'] + extra['expense'])
+            row['count'] += extra['count']
+            row['avg_amount'] = row['total'] / row['count'] if row['count'] else 0
+        return sorted(rows.values(), key=lambda row: row['total'], reverse=True)
+
+    @extend_schema(
+        summary="Serie temporal de flujo de caja",
+        description="Ingresos, gastos, neto y neto acumulado del usuario por período, en su moneda base. "
+                    "El acumulado incluye todas las transacciones anteriores al rango. Si la serie supera "
+                    "`max_points` se reduce con LTTB sobre el acumulado; los ingresos y gastos de los períodos "
+                    "descartados se suman al punto siguiente, de modo que los totales del rango se conservan. "
+                    "Admite los mismos filtros que el listado (`account`, `category`, `search`, `transaction_type`).",
+        parameters=[
+            OpenApiParameter(
+                name='start_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description='Fecha de inicio de la serie (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='end_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description='Fecha de fin de la serie (YYYY-MM-DD)'
+            ),
+            OpenApiParameter(
+                name='resolution',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Agrupación de los puntos; `auto` (por defecto) elige la más fina que entra en `max_points`',
+                enum=['auto', *timeseries.RESOLUTIONS]
+            ),
+            OpenApiParameter(
+                name='max_points',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f'Cantidad máxima de puntos ({timeseries.MIN_POINTS}-{timeseries.MAX_POINTS}, '
+                            f'por defecto {timeseries.DEFAULT_POINTS})'
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['transactions']
+    )
+    @action(detail=False, methods=['get'])
+    @single_flight
+    def timeseries(self, request):
+        """Obtiene la serie temporal de flujo de caja del usuario"""
+        params = request.query_params
+        try:
+            start_date = datetime.strptime(params.get('start_date', ''), '%Y-%m-%d').date()
+            end_date = datetime.strptime(params.get('end_date', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {'error': 'start_date y end_date son requeridos (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if end_date < start_date:
+            return Response({'error': 'end_date no puede ser anterior a start_date'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            max_points = int(params.get('max_points', timeseries.DEFAULT_POINTS))
+        except ValueError:
+            max_points = 0
+        if not timeseries.MIN_POINTS <= max_points <= timeseries.MAX_POINTS:
+            return Response(
+                {'error': f'max_points debe estar entre {timeseries.MIN_POINTS} y {timeseries.MAX_POINTS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        resolution = params.get('resolution', 'auto')
+        if resolution == 'auto':
+            resolution = timeseries.choose_resolution(start_date, end_date, max_points)
+        elif resolution not in timeseries.RESOLUTIONS:
+            return Response(
+                {'error': f"resolution debe ser auto o uno de: {', '.join(timeseries.RESOLUTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Los filtros que el historial columnar no resuelve van a la base de datos
+        in_database = any(params.get(name) for name in ('search', 'account', 'category', 'date_from', 'date_to'))
+        ledger = None if in_database else ledger_cache.get_combined(scope.user_ids(request))
+        if ledger is not None:
+            transaction_type = params.get('transaction_type') or None
+            flows = timeseries.flows_from_ledger(ledger, start_date, end_date, resolution, transaction_type)
+            before = ledger.totals(end_date=start_date - timedelta(days=1), transaction_type=transaction_type)
+            opening = before['income'] - before['expense']
+        else:
+            queryset = self.get_queryset()
+            flows = timeseries.flows_from_sql(queryset.filter(date__range=(start_date, end_date)), resolution)
+            opening = timeseries.opening_from_sql(queryset.filter(date__lt=start_date))
+
+        # El archivo aporta a los períodos que llegan a él y al saldo inicial
+        archived_until = archive_horizon(request)
+        if archived_until is not None:
+            archived = self._filter_transactions(
+                scope.visible(request, ArchivedTransaction.objects.all()), params, search=archive.search_archived
+            )
+            if start_date <= archived_until:
+                archived_flows = timeseries.flows_from_sql(archived.filter(date__range=(start_date, end_date)), resolution)
+                for bucket, (income, expense) in archived_flows.items():
+                    flow = flows.setdefault(bucket, [0, 0])
+                    flow[0] += income
+                    flow[1] += expense
+            opening += timeseries.opening_from_sql(archived.filter(date__lt=start_date))
+
+        series = timeseries.build_series(flows, start_date, end_date, resolution, opening)
+        downsampled = len(series) > max_points
+        if downsampled:
+            series = timeseries.downsample(series, max_points)
+
+        return Response({
+            'currency': scope.currency(request),
+            'resolution': resolution,
+            'period': {'start_date': start_date, 'end_date': end_date},
+            'downsampled': downsampled,
+            'opening_balance': from_cents(opening),
+            'points': [
+                {
+                    'date': day,
+                    'income': from_cents(income),
+                    'expense': from_cents(expense),
+                    'net': from_cents(net),
+                    'cumulative': from_cents(cumulative),
+                }
+                for day, income, expense, net, cumulative in series
+            ],
+        })
+
+
+@extend_schema(parameters=[scope.PARAMETER])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar transacciones recurrentes",
+        description="Obtiene las transacciones recurrentes del usuario, por próxima ejecución",
+        tags=['transactions']
+    ),
+    create=extend_schema(
+        summary="Crear transacción recurrente",
+        description="Crea una transacción que se genera automáticamente según su frecuencia. "
+                    "Las ocurrencias se materializan con el comando `materialize_recurring_transactions`",
+        examples=[
+            OpenApiExample(
+                'Alquiler mensual',
+                value={
+                    'category': 2,
+                    'transaction_type': 'expense',
+                    'amount': '850.00',
+                    'description': 'Alquiler',
+                    'frequency': 'monthly',
+                    'interval': 1,
+                    'start_date': '2024-01-01',
+                    'end_date': None,
+                    'is_active': True
+                }
+            ),
+        ],
+        tags=['transactions']
+    ),
+    retrieve=extend_schema(
+        summary="Obtener transacción recurrente",
+        description="Obtiene los detalles de una transacción recurrente",
+        tags=['transactions']
+    ),
+    update=extend_schema(
+        summary="Actualizar transacción recurrente",
+        description="Actualiza completamente una transacción recurrente; las ocurrencias ya generadas no cambian",
+        tags=['transactions']
+    ),
+    partial_update=extend_schema(
+        summary="Actualizar parcialmente transacción recurrente",
+        description="Actualiza parcialmente una transacción recurrente; las ocurrencias ya generadas no cambian",
+        tags=['transactions']
+    ),
+    destroy=extend_schema(
+        summary="Eliminar transacción recurrente",
+        description="Elimina una transacción recurrente; las ocurrencias ya generadas se conservan",
+        tags=['transactions']
+    ),
+)
+class RecurringTransactionViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar transacciones recurrentes.
+    
+    Permite programar ingresos y gastos periódicos (salario, alquiler,
+    suscripciones) en lugar de registrarlos a mano cada vez.
+    """
+    queryset = RecurringTransaction.objects.all()
+    serializer_class = RecurringTransactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return scope.visible(self.request, RecurringTransaction.objects.all())
+
+    def perform_create(self, serializer):
+        schedule = serializer.save(user=self.request.user)
+        schedule.next_run_date = next_occurrence(schedule, schedule.start_date)
+        schedule.save(update_fields=['next_run_date'])
+
+    def perform_update(self, serializer):
+        # Se recalcula desde la ocurrencia pendiente para no volver a generar las anteriores
+        pending_from = serializer.instance.next_run_date or timezone.localdate()
+        schedule = serializer.save()
+        schedule.next_run_date = next_occurrence(schedule, max(pending_from, schedule.start_date))
+        schedule.save(update_fields=['next_run_date'])
+
+
+@extend_schema(parameters=[scope.PARAMETER])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar reglas de categorización",
+        description="Obtiene las reglas de categorización automática del usuario, por prioridad",
+        tags=['categories']
+    ),
+    create=extend_schema(
+        summary="Crear regla de categorización",
+        description="Crea una regla que asigna una categoría a las transacciones cuya descripción "
+                    "contenga la palabra clave y que cumplan el tipo y rango de importe indicados",
+        examples=[
+            OpenApiExample(
+                'Suscripciones',
+                value={
+                    'category': 3,
+                    'keyword': 'netflix',
+                    'transaction_type': 'expense',
+                    'min_amount': None,
+                    'max_amount': '50.00',
+                    'priority': 10,
+                    'is_active': True
+                }
+            ),
+        ],
+        tags=['categories']
+    ),
+    retrieve=extend_schema(
+        summary="Obtener regla de categorización",
+        description="Obtiene los detalles de una regla de categorización",
+        tags=['categories']
+    ),
+    update=extend_schema(
+        summary="Actualizar regla de categorización",
+        description="Actualiza completamente una regla de categorización",
+        tags=['categories']
+    ),
+    partial_update=extend_schema(
+        summary="Actualizar parcialmente regla de categorización",
+        description="Actualiza parcialmente una regla de categorización",
+        tags=['categories']
+    ),
+    destroy=extend_schema(
+        summary="Eliminar regla de categorización",
+        description="Elimina una regla de categorización",
+        tags=['categories']
+    ),
+)
+class CategorizationRuleViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar reglas de categorización automática.
+    
+    Las reglas se aplican al crear o importar transacciones sin categoría
+    y pueden volver a aplicarse sobre el historial.
+    """
+    queryset = CategorizationRule.objects.all()
+    serializer_class = CategorizationRuleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return scope.visible(self.request, CategorizationRule.objects.select_related('category'))
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(
+        summary="Aplicar reglas al historial",
+        description="Vuelve a aplicar las reglas activas a las transacciones existentes del usuario",
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name='overwrite',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Recategorizar también las transacciones que ya tienen categoría (por defecto solo las que no tienen)'
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['categories']
+    )
+    @action(detail=False, methods=['post'])
+    def apply(self, request):
+        """Aplica las reglas de categorización al historial de transacciones"""
+        overwrite = request.query_params.get('overwrite', '').lower() in ('1', 'true', 'yes')
+        updated = apply_rules_to_history(request.user.pk, overwrite=overwrite)
+        return Response({'updated': updated})
+
+
+@extend_schema(parameters=[scope.PARAMETER])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar cuentas",
+        description="Obtiene las cuentas del usuario autenticado",
+        tags=['accounts']
+    ),
+    create=extend_schema(
+        summary="Crear cuenta",
+        description="Crea una cuenta (banco, efectivo, tarjeta) con su moneda y saldo inicial",
+        examples=[
+            OpenApiExample(
+                'Cuenta bancaria',
+                value={'name': 'Banco', 'currency': 'USD', 'opening_balance': '1200.00'}
+            ),
+        ],
+        tags=['accounts']
+    ),
+    retrieve=extend_schema(
+        summary="Obtener cuenta",
+        description="Obtiene los detalles de una cuenta",
+        tags=['accounts']
+    ),
+    update=extend_schema(
+        summary="Actualizar cuenta",
+        description="Actualiza completamente una cuenta existente",
+        tags=['accounts']
+    ),
+    partial_update=extend_schema(
+        summary="Actualizar parcialmente cuenta",
+        description="Actualiza parcialmente una cuenta existente",
+        tags=['accounts']
+    ),
+    destroy=extend_schema(
+        summary="Eliminar cuenta",
+        description="Elimina una cuenta; sus transacciones se conservan sin cuenta",
+        tags=['accounts']
+    ),
+)
+class AccountViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar cuentas y consultar sus saldos.
+    
+    Los saldos se calculan a partir de puntos de control mensuales, por lo
+    que su costo no depende del largo del historial.
+    """
+    queryset = Account.objects.all()
+    serializer_class = AccountSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return scope.visible(self.request, Account.objects.all())
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(
+        summary="Saldo de una cuenta",
+        description="Obtiene el saldo de la cuenta al cierre de una fecha",
+        parameters=[
+            OpenApiParameter(
+                name='date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha del saldo (YYYY-MM-DD, por defecto hoy)'
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['accounts']
+    )
+    @action(detail=True, methods=['get'])
+    def balance(self, request, pk=None):
+        """Obtiene el saldo de una cuenta a una fecha"""
+        account = self.get_object()
+        try:
+            on_date = self._parse_date(request.query_params.get('date')) or timezone.localdate()
+        except ValueError:
+            return Response({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'account_id': account.id,
+            'currency': account.currency,
+            'date': on_date,
+            'balance': balances.balance_at(account, on_date, archive.archived_until(account.user_id)),
+        })
+
+    @extend_schema(
+        summary="Evolución del saldo de una cuenta",
+        description="Obtiene el saldo de la cuenta al cierre de cada día, semana o mes de un período, para gráficos",
+        parameters=[
+            OpenApiParameter(
+                name='start_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de inicio (YYYY-MM-DD)',
+                required=True
+            ),
+            OpenApiParameter(
+                name='end_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha de fin (YYYY-MM-DD)',
+                required=True
+            ),
+            OpenApiParameter(
+                name='interval',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Frecuencia de los puntos: day, week o month (por defecto: day)',
+                examples=[
+                    OpenApiExample('Diario', value='day'),
+                    OpenApiExample('Mensual', value='month'),
+                ]
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['accounts']
+    )
+    @action(detail=True, methods=['get'], url_path='balance-history')
+    def balance_history(self, request, pk=None):
+        """Obtiene la evolución del saldo de una cuenta en un período"""
+        account = self.get_object()
+        interval = request.query_params.get('interval', 'day')
+        if interval not in balances.INTERVALS:
+            return Response(
+                {'error': f"interval debe ser uno de: {', '.join(balances.INTERVALS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            start_date = self._parse_date(request.query_params.get('start_date'))
+            end_date = self._parse_date(request.query_params.get('end_date'))
+        except ValueError:
+            return Response({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        if not start_date or not end_date:
+            return Response({'error': 'start_date y end_date son requeridos'}, status=status.HTTP_400_BAD_REQUEST)
+        if end_date < start_date:
+            return Response(
+                {'error': 'end_date no puede ser anterior a start_date'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'account_id': account.id,
+            'currency': account.currency,
+            'interval': interval,
+            'period': {'start_date': start_date, 'end_date': end_date},
+            'points': balances.balance_history(
+                account, start_date, end_date, interval, archive.archived_until(account.user_id)
+            ),
         })
+
+    def _parse_date(self, value):
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
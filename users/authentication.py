@@ -0,0 +1,155 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from financetracker.versioning import bump_version, get_version
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class LocalTokenCache:
+    """
+    Caché LRU en memoria del proceso con expiración por entrada.
+
+    Guarda los tokens ya validados para que las peticiones autenticadas
+    no necesiten ninguna consulta a la base de datos.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, token = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_token_cache = LocalTokenCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.TOKEN_CACHE_LOCAL_TTL,
+)
+
+
+def _shared_cache_key(key):
+    # No se usa el token en claro como clave del caché compartido
+    return 'auth-token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _version_key(user_id):
+    return f'auth-token-version:{user_id}'
+
+
+def invalidate_token(key, user_id):
+    """Elimina un token de ambos niveles de caché e invalida los tokens del usuario cacheados en otros procesos"""
+    bump_version(_version_key(user_id))
+    local_token_cache.delete(key)
+    cache.delete(_shared_cache_key(key))
+
+
+def invalidate_user_tokens(user):
+    """Elimina del caché todos los tokens de un usuario"""
+    bump_version(_version_key(user.pk))
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        local_token_cache.delete(key)
+        cache.delete(_shared_cache_key(key))
+
+
+def is_token_expired(token):
+    expiration = settings.TOKEN_EXPIRATION
+    if expiration is None:
+        return False
+    return token.created + timedelta(seconds=expiration) < timezone.now()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Autenticación por token con caché en dos niveles.
+
+    Primero se consulta un LRU local del proceso, luego el caché compartido de
+    Django y solo ante un fallo en ambos se consulta la base de datos. Las
+    entradas se invalidan al eliminar el token o al modificar el usuario.
+
+    Cada entrada guarda la versión de los tokens de su usuario con la que se
+    leyó, y solo vale mientras esa versión (un contador en el caché compartido)
+    no cambie: eliminar o rotar un token lo revoca de inmediato también en los
+    LRU de los demás procesos, a cambio de una lectura del caché compartido
+    por petición.
+    """
+
+    def authenticate_credentials(self, key):
+        token = self._cached(local_token_cache.get(key))
+
+        if token is None:
+            entry = cache.get(_shared_cache_key(key))
+            token = self._cached(entry)
+            if token is None:
+                entry = self._load(key)
+                token = entry[1]
+                cache.set(_shared_cache_key(key), entry, settings.TOKEN_CACHE_SHARED_TTL)
+            local_token_cache.set(key, entry)
+
+        if not token.user.is_active:
+            invalidate_token(key, token.user_id)
+            raise exceptions.AuthenticationFailed('Usuario inactivo o eliminado.')
+
+        if is_token_expired(token):
+            invalidate_token(key, token.user_id)
+            raise exceptions.AuthenticationFailed('El token ha expirado.')
+
+        # Copias para que cada petición trabaje con sus propias instancias
+        token = copy.copy(token)
+        user = copy.copy(token.user)
+        return (user, token)
+
+    def _load(self, key):
+        """Entrada `(versión, token)` leída de la base de datos"""
+        user_id = Token.objects.filter(key=key).values_list('user_id', flat=True).first()
+        if user_id is None:
+            raise exceptions.AuthenticationFailed('Token inválido.')
+        # La versión se lee antes que el token: si se revoca en el medio, la entrada nace vencida
+        version = get_version(_version_key(user_id))
+        try:
+            return version, Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Token inválido.')
+
+    def _cached(self, entry):
+        """Token de una entrada del caché, o None si falta o se invalidaron los tokens de su usuario"""
+        if entry is None:
+            return None
+        version, token = entry
+        if version != get_version(_version_key(token.user_id)):
+            return None
+        return token
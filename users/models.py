@@ -1,3 +1,13 @@
+from django.contrib.auth.models import User
 from django.db import models
+from currencies.models import default_currency, validate_currency_code
 
 # Create your models here.
+
+class Profile(models.Model):
+    """Preferencias del usuario"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
+    base_currency = models.CharField(max_length=3, default=default_currency, validators=[validate_currency_code], help_text='Moneda en la que se informan los totales y análisis')
+
+    def __str__(self):
+        return f'{self.user.username} ({self.base_currency})'
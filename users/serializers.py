@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
+from currencies.serializers import CurrencyField
+from households.models import HouseholdMembership
+from .models import Profile
 
 @extend_schema_serializer(
     examples=[
@@ -34,4 +37,25 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'password')
-        read_only_fields = ('id',) 
\ No newline at end of file
+        read_only_fields = ('id',) 
+
+
+class ProfileSerializer(serializers.ModelSerializer):
+    """
+    Serializer para el modelo Profile.
+    
+    Permite consultar y modificar las preferencias del usuario.
+    """
+    username = serializers.CharField(source='user.username', read_only=True)
+    base_currency = CurrencyField(required=False)
+
+    class Meta:
+        model = Profile
+        fields = ('username', 'base_currency')
+
+    def validate_base_currency(self, value):
+        # Los totales de un hogar suman importes en la moneda base de cada miembro
+        households = HouseholdMembership.objects.filter(user_id=self.instance.user_id).exclude(household__currency=value)
+        if households.exists():
+            raise serializers.ValidationError('La moneda base debe ser la de los hogares de los que es miembro.')
+        return value
@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_token, invalidate_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Invalida el caché al eliminar (o rotar) un token"""
+    # Al confirmar: antes, otra petición todavía puede leer el token de la base y volver a cachearlo.
+    # La key es la clave primaria, que el delete deja en None al terminar
+    key, user_id = instance.key, instance.user_id
+    db_transaction.on_commit(lambda: invalidate_token(key, user_id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_updated_user_tokens(sender, instance, created, **kwargs):
+    """Invalida los tokens cacheados cuando cambia el usuario (por ejemplo, al desactivarlo)"""
+    if not created:
+        db_transaction.on_commit(lambda: invalidate_user_tokens(instance))
@@ -1,3 +1,48 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+from .authentication import _version_key, local_token_cache
 
-# Create your tests here.
+
+class CachedTokenAuthenticationTests(APITestCase):
+    """Un token revocado deja de valer aunque otro proceso lo tenga en su LRU local"""
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = User.objects.create_user('ana', password='x')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def get_profile(self):
+        return self.client.get('/api/auth/profile/').status_code
+
+    def test_deleted_token_is_rejected_by_stale_local_entries(self):
+        self.assertEqual(self.get_profile(), 200)
+        key, stale = self.token.key, local_token_cache.get(self.token.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        # El LRU de otro proceso todavía guarda la entrada anterior
+        local_token_cache.set(key, stale)
+        self.assertEqual(self.get_profile(), 401)
+
+    def test_evicted_version_counter_does_not_revive_token(self):
+        self.assertEqual(self.get_profile(), 200)
+        key, stale = self.token.key, local_token_cache.get(self.token.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        # El caché compartido desaloja el contador de versión del usuario
+        cache.delete(_version_key(self.user.pk))
+        local_token_cache.set(key, stale)
+        self.assertEqual(self.get_profile(), 401)
+
+    def test_rotated_token_is_rejected(self):
+        self.assertEqual(self.get_profile(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/rotate/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_profile(), 401)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + response.data['token'])
+        self.assertEqual(self.get_profile(), 200)
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import RegisterView
+from .views import RegisterView, RotateTokenView, ProfileView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='auth_register'),
+    path('token/rotate/', RotateTokenView.as_view(), name='auth_token_rotate'),
+    path('profile/', ProfileView.as_view(), name='auth_profile'),
 ] 
\ No newline at end of file
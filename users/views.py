@@ -1,8 +1,16 @@
 from django.contrib.auth.models import User
-from rest_framework import generics
-from rest_framework.permissions import AllowAny
-from drf_spectacular.utils import extend_schema, OpenApiExample
-from .serializers import UserSerializer
+from django.db import transaction
+from rest_framework import generics, serializers, status
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import OpenApiExample, inline_serializer
+from financetracker.schema import extend_schema
+from currencies.rates import MissingExchangeRate
+from transactions.currency import recompute_base_amounts
+from .models import Profile
+from .serializers import UserSerializer, ProfileSerializer
 
 # Create your views here.
 
@@ -31,3 +39,63 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = UserSerializer
+
+
+@extend_schema(
+    summary="Rotar token",
+    description="Invalida el token actual y devuelve uno nuevo para el usuario autenticado",
+    request=None,
+    responses=inline_serializer('RotatedToken', fields={'token': serializers.CharField()}),
+    tags=['authentication']
+)
+class RotateTokenView(APIView):
+    """
+    Vista para la rotación del token de autenticación.
+
+    El token anterior se elimina (lo que también lo invalida en el caché de
+    autenticación) y se genera uno nuevo en la misma transacción.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        with transaction.atomic():
+            Token.objects.filter(user=request.user).delete()
+            token = Token.objects.create(user=request.user)
+        return Response({'token': token.key}, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(
+    summary="Perfil del usuario",
+    description="Consulta o modifica las preferencias del usuario autenticado. Al cambiar la moneda base "
+                "se recalculan los importes de todas sus transacciones en la nueva moneda",
+    examples=[
+        OpenApiExample(
+            'Cambiar moneda base',
+            value={'base_currency': 'EUR'},
+            request_only=True
+        ),
+    ],
+    tags=['authentication']
+)
+class ProfileView(generics.RetrieveUpdateAPIView):
+    """
+    Vista para el perfil del usuario autenticado.
+
+    El perfil se crea con los valores por defecto la primera vez que se consulta.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = ProfileSerializer
+
+    def get_object(self):
+        profile, _ = Profile.objects.get_or_create(user=self.request.user)
+        return profile
+
+    def perform_update(self, serializer):
+        previous_currency = serializer.instance.base_currency
+        with transaction.atomic():
+            profile = serializer.save()
+            if profile.base_currency != previous_currency:
+                try:
+                    recompute_base_amounts(user_ids=[self.request.user.pk])
+                except MissingExchangeRate as error:
+                    raise serializers.ValidationError({'base_currency': [str(error)]})